@@ -8,6 +8,8 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
 from app.core.config import DB_URL
 from app.core.database.setup_db import Base
+from app.core.database.versions import catalog_versions_table  # noqa
+from app.domains.auth.models import RevokedToken  # noqa
 from app.domains.feedback.models import ContactMessage, SponsorshipRequest  # noqa
 from app.domains.memberships.models import MembershipType, UserMembership  # noqa
 from app.domains.news.models import News  # noqa
@@ -0,0 +1,69 @@
+"""search indexes for startswith/icontains filters
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 10:12:41.118204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column) - btree lower(column) text_pattern_ops для startswith
+PREFIX_INDEXES = [
+    ("users", "email"),
+    ("users", "firstname"),
+    ("users", "lastname"),
+    ("contact_messages", "email"),
+    ("contact_messages", "name"),
+]
+# (table, column) - GIN lower(column) gin_trgm_ops для icontains
+TRIGRAM_INDEXES = [
+    ("users", "email"),
+    ("users", "lastname"),
+    ("contact_messages", "email"),
+]
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # CONCURRENTLY не блокирует запись в таблицы, но не может выполняться внутри транзакции
+    with op.get_context().autocommit_block():
+        for table, column in PREFIX_INDEXES:
+            op.create_index(
+                f"ix_{table}_{column}_lower_pattern",
+                table,
+                [sa.text(f"lower({column}) text_pattern_ops")],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for table, column in TRIGRAM_INDEXES:
+            op.create_index(
+                f"ix_{table}_{column}_trgm",
+                table,
+                [sa.text(f"lower({column}) gin_trgm_ops")],
+                postgresql_using="gin",
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, column in TRIGRAM_INDEXES:
+            op.drop_index(f"ix_{table}_{column}_trgm", table_name=table, postgresql_concurrently=True, if_exists=True)
+        for table, column in PREFIX_INDEXES:
+            op.drop_index(
+                f"ix_{table}_{column}_lower_pattern", table_name=table, postgresql_concurrently=True, if_exists=True
+            )
+    # расширение pg_trgm не удаляется - его могут использовать объекты вне этой миграции
@@ -0,0 +1,49 @@
+"""news full-text search vector
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18 12:40:05.310218
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # stored generated column: postgres пересчитывает вектор при каждом insert/update body,
+    # добавление колонки переписывает таблицу news (вектор считается для существующих строк)
+    op.add_column(
+        "news",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed("json_to_tsvector('english', body, '[\"string\"]')", persisted=True),
+            nullable=True,
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_news_search_vector",
+            "news",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_news_search_vector", table_name="news", postgresql_concurrently=True, if_exists=True)
+    op.drop_column("news", "search_vector")
@@ -0,0 +1,31 @@
+"""checkout session id of user memberships
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18 17:31:05.662914
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users_memberships", sa.Column("stripe_checkout_session_id", sa.String(), nullable=True))
+    op.create_unique_constraint(
+        op.f("uq_users_memberships_stripe_checkout_session_id"), "users_memberships", ["stripe_checkout_session_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(op.f("uq_users_memberships_stripe_checkout_session_id"), "users_memberships", type_="unique")
+    op.drop_column("users_memberships", "stripe_checkout_session_id")
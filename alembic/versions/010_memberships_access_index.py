@@ -0,0 +1,42 @@
+"""partial index of user memberships with access by current_period_end
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18 19:02:37.418530
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY не блокирует запись в таблицу, но не может выполняться внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_memberships_access_period_end",
+            "users_memberships",
+            ["current_period_end"],
+            postgresql_where=sa.text("has_access"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_memberships_access_period_end",
+            table_name="users_memberships",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,32 @@
+"""catalog versions
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-18 20:11:52.734109
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "011"
+down_revision: Union[str, None] = "010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "catalog_versions",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("name", name=op.f("pk_catalog_versions")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("catalog_versions")
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, TypeVar
+
+from loguru import logger
+from passlib.hash import bcrypt
+
+from app.core.config import settings
+
+R = TypeVar("R")
+
+
+@dataclass
+class HashingStats:
+    """Counters of the hashing pool since the process start"""
+
+    calls: int = 0
+    pending: int = 0  # в очереди или выполняются сейчас
+    queue_time: float = 0.0  # секунды ожидания свободного потока, суммарно
+    max_queue_time: float = 0.0
+    run_time: float = 0.0
+
+    @property
+    def avg_queue_time(self) -> float:
+        return self.queue_time / self.calls if self.calls else 0.0
+
+
+class PasswordHasher:
+    """Runs bcrypt in a dedicated thread pool, so hashing doesn't block the event loop.
+
+    bcrypt releases the GIL, ``max_workers`` caps how many hashes run at once (and how many CPU cores they take),
+    other calls wait in the pool queue. Waits longer than ``queue_warning_seconds`` are logged.
+    """
+
+    def __init__(self, max_workers: int, queue_warning_seconds: float):
+        self.queue_warning_seconds = queue_warning_seconds
+        self.stats = HashingStats()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hasher")
+
+    async def hash(self, password: str) -> str:
+        return await self._run(bcrypt.hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._run(bcrypt.verify, password, password_hash)
+
+    async def _run(self, func: Callable[..., R], *args) -> R:
+        submitted_at = time.perf_counter()
+        self.stats.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._measure, submitted_at, func, *args
+            )
+        finally:
+            self.stats.pending -= 1
+
+    def _measure(self, submitted_at: float, func: Callable[..., R], *args) -> R:
+        started_at = time.perf_counter()
+        queue_time = started_at - submitted_at
+        try:
+            return func(*args)
+        finally:
+            # счетчики меняются из потоков пула, неточность при гонке допустима - это метрики
+            self.stats.calls += 1
+            self.stats.queue_time += queue_time
+            self.stats.max_queue_time = max(self.stats.max_queue_time, queue_time)
+            self.stats.run_time += time.perf_counter() - started_at
+            if queue_time > self.queue_warning_seconds:
+                logger.warning(
+                    f"Password hashing waited {queue_time * 1000:.0f}ms in the queue, pending: {self.stats.pending}"
+                )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASHING_WORKERS,
+    queue_warning_seconds=settings.PASSWORD_HASHING_QUEUE_WARNING_MS / 1000,
+)
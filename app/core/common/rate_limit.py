@@ -0,0 +1,206 @@
+import math
+import random
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from ipaddress import IPv4Network, IPv6Network, ip_address, ip_network
+
+import orjson
+from fastapi_exception_responses import Responses
+from loguru import logger
+from sqlalchemy import Column, Float, String, Table, bindparam, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+
+from app.core.common.password_hasher import password_hasher
+from app.core.config import settings
+from app.core.database.setup_db import Base, async_engine
+
+# tat (theoretical arrival time) - время в секундах epoch, когда "ведро" снова будет полным
+rate_limits_table = Table(
+    "rate_limits",
+    Base.metadata,
+    Column("key", String(), primary_key=True),
+    Column("tat", Float(), nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Rate:
+    """``count`` requests per ``period`` seconds, all of them may come in one burst"""
+
+    count: int
+    period: float
+
+    @classmethod
+    def parse(cls, value: str) -> "Rate":
+        """Parses ``"<count>/<seconds>"``, e.g. ``"5/60"``"""
+        count, _, period = value.partition("/")
+        rate = cls(int(count), float(period))
+        if rate.count < 1 or rate.period <= 0:
+            raise ValueError(f"Invalid rate <{value}>")
+        return rate
+
+    @property
+    def interval(self) -> float:
+        """Time to refill one token"""
+        return self.period / self.count
+
+
+class RateLimitBackend(ABC):
+    """Token bucket in the GCRA form: the state of a bucket is a single timestamp (see ``rate_limits_table``)"""
+
+    @abstractmethod
+    async def hit(self, key: str, rate: Rate) -> float:
+        """Takes a token from the bucket, returns 0 if the request is allowed, otherwise seconds to wait"""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Buckets of the current process, with several workers the effective limit is multiplied by their number"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._tats: dict[str, float] = {}
+
+    async def hit(self, key: str, rate: Rate) -> float:
+        now = time.monotonic()
+        tat = max(self._tats.get(key, now), now) + rate.interval
+        if tat - now > rate.period:
+            return tat - rate.period - now
+
+        if len(self._tats) >= self.max_keys:
+            # полные ведра хранить незачем
+            self._tats = {bucket: bucket_tat for bucket, bucket_tat in self._tats.items() if bucket_tat > now}
+        self._tats[key] = tat
+        return 0.0
+
+    def reset(self) -> None:
+        self._tats.clear()
+
+
+class PostgresRateLimitBackend(RateLimitBackend):
+    """Buckets shared by all nodes, one upsert per allowed request.
+
+    Time is taken from the database clock, so the clocks of the nodes don't matter.
+    The statement runs in its own autocommit connection, a rolled back request still spends its token.
+    """
+
+    # время базы, одинаковое для всех узлов
+    NOW = "extract(epoch FROM statement_timestamp())"
+    HIT = text(
+        f"INSERT INTO rate_limits AS bucket (key, tat) VALUES (:key, {NOW} + :interval) "
+        f"ON CONFLICT (key) DO UPDATE SET tat = greatest(bucket.tat, {NOW}) + :interval "
+        f"WHERE greatest(bucket.tat, {NOW}) + :interval - {NOW} <= :period "
+        "RETURNING tat"
+    ).bindparams(bindparam("interval", type_=Float()), bindparam("period", type_=Float()))
+    RETRY_AFTER = text(f"SELECT tat + :interval - :period - {NOW} FROM rate_limits WHERE key = :key").bindparams(
+        bindparam("interval", type_=Float()), bindparam("period", type_=Float())
+    )
+    CLEANUP = text(f"DELETE FROM rate_limits WHERE tat < {NOW}")
+
+    def __init__(self, engine: AsyncEngine, cleanup_probability: float = 0.001):
+        self.engine = engine
+        self.cleanup_probability = cleanup_probability
+
+    async def hit(self, key: str, rate: Rate) -> float:
+        params = {"key": key, "interval": rate.interval, "period": rate.period}
+        async with self.engine.begin() as connection:
+            if (await connection.execute(self.HIT, params)).first() is not None:
+                if random.random() < self.cleanup_probability:
+                    await connection.execute(self.CLEANUP)
+                return 0.0
+            retry_after = (await connection.execute(self.RETRY_AFTER, params)).scalar()
+        return max(retry_after or 0.0, 0.0)
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "postgres":
+        return PostgresRateLimitBackend(async_engine)
+    return MemoryRateLimitBackend()
+
+
+rate_limit_backend = get_rate_limit_backend()
+
+
+class RateLimitResponses(Responses):
+    TOO_MANY_REQUESTS = 429, "Too many requests"
+    SERVICE_BUSY = 503, "Service is busy, try again later"
+
+
+def _with_retry_after(exception: HTTPException, retry_after: float) -> HTTPException:
+    headers = {"Retry-After": str(max(math.ceil(retry_after), 1))}
+    return HTTPException(status_code=exception.status_code, detail=exception.detail, headers=headers)
+
+
+@lru_cache
+def get_trusted_proxies(trusted_proxies: str) -> tuple[IPv4Network | IPv6Network, ...]:
+    return tuple(ip_network(proxy, strict=False) for proxy in map(str.strip, trusted_proxies.split(",")) if proxy)
+
+
+def is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in get_trusted_proxies(settings.RATE_LIMIT_TRUSTED_PROXIES))
+
+
+def get_client_ip(request: Request) -> str:
+    """Client address, X-Real-IP is taken only from trusted proxies, otherwise any client could spoof it"""
+    client_host = request.client.host if request.client else "unknown"
+    # за nginx клиентский адрес приходит в X-Real-IP (см. compose/nginx/nginx.conf)
+    if (
+        settings.RATE_LIMIT_TRUST_X_REAL_IP
+        and (real_ip := request.headers.get("x-real-ip"))
+        and is_trusted_proxy(client_host)
+    ):
+        return real_ip
+    return client_host
+
+
+async def _get_account(request: Request, field: str) -> str | None:
+    """Account identifier from the JSON body, the body is cached by the request and parsed by FastAPI once more"""
+    try:
+        body = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        return None
+    account = body.get(field) if isinstance(body, dict) else None
+    return account.strip().lower() if isinstance(account, str) and account.strip() else None
+
+
+class RateLimit:
+    """Dependency limiting requests to an endpoint per client IP and, optionally, per account.
+
+    Rates are ``"<count>/<seconds>"`` strings, the account is taken from the ``account_field`` of the JSON body.
+    Exceeded limit responds with 429 and ``Retry-After``.
+    """
+
+    def __init__(self, scope: str, per_ip: str, per_account: str | None = None, account_field: str = "email"):
+        self.scope = scope
+        self.ip_rate = Rate.parse(per_ip)
+        self.account_rate = Rate.parse(per_account) if per_account else None
+        self.account_field = account_field
+
+    async def __call__(self, request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+
+        client_ip = get_client_ip(request)
+        retry_after = await rate_limit_backend.hit(f"{self.scope}:ip:{client_ip}", self.ip_rate)
+
+        if not retry_after and self.account_rate is not None:
+            account = await _get_account(request, self.account_field)
+            if account is not None:
+                retry_after = await rate_limit_backend.hit(f"{self.scope}:account:{account}", self.account_rate)
+
+        if retry_after:
+            logger.warning(f"Rate limit {self.scope} exceeded by {client_ip}, retry after {retry_after:.1f}s")
+            raise _with_retry_after(RateLimitResponses.TOO_MANY_REQUESTS, retry_after)
+
+
+async def admit_password_hashing() -> None:
+    """Admission control for endpoints hashing passwords: sheds load when the hashing queue is full"""
+    if password_hasher.stats.pending >= settings.PASSWORD_HASHING_MAX_PENDING:
+        raise _with_retry_after(RateLimitResponses.SERVICE_BUSY, 1)
@@ -1,20 +1,60 @@
-from typing import Annotated
+from typing import Annotated, Callable
 
 from fastapi.params import Depends, Query
+from pydantic import BaseModel
 
+from app.core.common.responses import InvalidRequestParamsResponses
+from app.core.utils.fields import FieldSet
+from app.core.utils.pagination import CountStrategy
 
-def get_pagination_params(
-    page: int = Query(1, ge=1, description="Page number"),
-    page_size: int = Query(25, ge=1, le=100, description="Page size"),
-) -> dict:
-    """returns limit, and offset  page_size, page_size * (page - 1)"""
-    return {
-        "limit": page_size,
-        "offset": page_size * (page - 1),
-        "page": page,
-        "page_size": page_size,
-    }
+
+def make_pagination_params(default_count_strategy: CountStrategy = CountStrategy.EXACT) -> Callable[..., dict]:
+    """Builds the pagination dependency with the endpoint's default count strategy"""
+
+    def get_pagination_params(
+        page: int = Query(1, ge=1, description="Page number"),
+        page_size: int = Query(25, ge=1, le=100, description="Page size"),
+        cursor: str | None = Query(None, description="Opaque cursor from `next_cursor` of the previous page"),
+        count: Annotated[
+            CountStrategy, Query(description="How the total count is calculated")
+        ] = default_count_strategy,
+    ) -> dict:
+        """returns limit, and offset  page_size, page_size * (page - 1)
+
+        If cursor is provided the page is fetched by keyset and offset is ignored
+        """
+        return {
+            "limit": page_size,
+            "offset": page_size * (page - 1),
+            "page": page,
+            "page_size": page_size,
+            "cursor": cursor,
+            "count_strategy": count,
+        }
+
+    return get_pagination_params
+
+
+get_pagination_params = make_pagination_params()
+
+
+def make_fields_params(schema: type[BaseModel]) -> Callable[..., FieldSet]:
+    """Builds the ``fields`` (sparse fieldset) dependency validated against the response schema"""
+
+    def get_fields_params(
+        fields: Annotated[
+            str | None,
+            Query(description="Comma separated fields to return, `user.email` selects a field of a nested object"),
+        ] = None,
+    ) -> FieldSet:
+        try:
+            return FieldSet.parse(schema, fields)
+        except ValueError:
+            raise InvalidRequestParamsResponses.INVALID_FIELDS
+
+    return get_fields_params
 
 
 PaginationParamsDep = Annotated[tuple[int, int], Depends(get_pagination_params)]
 OrderingParamsDep = Annotated[str | None, Query(description="Sorting parameters")]
+WindowCountPaginationParamsDep = Annotated[dict, Depends(make_pagination_params(CountStrategy.WINDOW))]
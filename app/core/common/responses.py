@@ -1,18 +1,66 @@
-from typing import Generic, TypeVar
+from typing import Any, Generic, Mapping, Sequence, TypeVar
 
+from fastapi import Response
 from fastapi_exception_responses import Responses
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
+
+from app.core.utils.pagination import COUNT_CAP, CountStrategy
 
 DataModel = TypeVar("DataModel", bound=BaseModel)
 
 
 class PaginatedResponse(BaseModel, Generic[DataModel]):
-    count: int
+    count: int | None
     page: int
     page_size: int
     data: list[DataModel]
+    cursor: str | None = None
+    next_cursor: str | None = None
+    count_strategy: CountStrategy = CountStrategy.EXACT
+    # true, если реальное количество больше count (стратегия capped, "1000+")
+    count_capped: bool = False
+
+    @model_validator(mode="after")
+    def cap_count(self):
+        if self.count_strategy is CountStrategy.CAPPED and self.count is not None and self.count > COUNT_CAP:
+            self.count = COUNT_CAP
+            self.count_capped = True
+        return self
+
+
+def build_paginated_response(schema: type[DataModel], data: Sequence[Mapping[str, Any]], **fields: Any) -> Response:
+    """Validates the page once and serializes it straight to JSON.
+
+    ``data`` are plain dicts of selected columns (see ``SQLAlchemyRepository.list(columns=...)``) or ORM objects.
+    FastAPI doesn't validate the returned ``Response`` against ``response_model`` again,
+    so the route should declare ``response_model=PaginatedResponse[schema]`` for the docs.
+    """
+    return build_json_response(PaginatedResponse[schema].model_validate({"data": data, **fields}))
+
+
+def build_json_response(model: BaseModel) -> Response:
+    """Serializes already validated model, used when the payload differs from the declared response_model"""
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of ``If-None-Match`` with the ETag, nginx turns ETags into weak ones when it compresses"""
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def build_cached_json_response(body: bytes, etag: str, if_none_match: str | None, max_age: int) -> Response:
+    """Serialized JSON with ``ETag``, 304 without a body if the client already has this version"""
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 class InvalidRequestParamsResponses(Responses):
     INVALID_FILTER_FIELD = 400, "Invalid filter field"
     INVALID_SORTER_FIELD = 400, "Invalid sorter field"
+    INVALID_CURSOR = 400, "Invalid pagination cursor"
+    INVALID_FIELDS = 400, "Invalid fields"
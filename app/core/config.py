@@ -1,5 +1,6 @@
 from os import getenv
 from pathlib import Path
+from typing import Literal
 
 from cryptography.fernet import Fernet
 from dotenv import load_dotenv
@@ -37,6 +38,53 @@ class Settings(BaseSettings, GmailConfig):
     DB_USER: str = "test"
     DB_NAME: str = "test"
 
+    # реплики для чтения: "host1:5432,host2", пусто - все запросы идут в primary
+    DB_REPLICA_HOSTS: str = ""
+    DB_REPLICA_RETRY_SECONDS: int = 30
+    READ_YOUR_WRITES_SECONDS: int = 5
+    # столько одинаковых запросов за один HTTP запрос считается вероятным N+1
+    N_PLUS_ONE_THRESHOLD: int = 5
+    # кэш пользователя для аутентификации, на каждом воркере свой; 0 - кэш выключен
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_SIZE: int = 1024
+    # потоки для bcrypt: столько хэшей считается одновременно, остальные ждут в очереди
+    PASSWORD_HASHING_WORKERS: int = 2
+    PASSWORD_HASHING_QUEUE_WARNING_MS: int = 500
+    # больше ожидающих хэширования - 503 для новых входов/регистраций
+    PASSWORD_HASHING_MAX_PENDING: int = 32
+
+    # лимиты публичных эндпоинтов "<запросов>/<секунд>"; memory - на каждом воркере свои, postgres - общие
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: Literal["memory", "postgres"] = "memory"
+    # X-Real-IP учитывается только от этих прокси: "10.0.0.5,172.28.0.0/16" (адреса или сети)
+    RATE_LIMIT_TRUST_X_REAL_IP: bool = False
+    RATE_LIMIT_TRUSTED_PROXIES: str = ""
+    RATE_LIMIT_LOGIN_IP: str = "20/60"
+    RATE_LIMIT_LOGIN_ACCOUNT: str = "5/60"
+    RATE_LIMIT_REGISTER_IP: str = "10/3600"
+    RATE_LIMIT_PASSWORD_RESET_IP: str = "10/3600"
+    RATE_LIMIT_PASSWORD_RESET_ACCOUNT: str = "3/3600"
+    RATE_LIMIT_FEEDBACK_IP: str = "10/3600"
+    # отозванные refresh токены: фильтр Блума на каждом воркере, подтягивает отзывы других воркеров раз в SYNC секунд
+    REVOKED_TOKENS_FILTER_CAPACITY: int = 100_000
+    REVOKED_TOKENS_FILTER_ERROR_RATE: float = 0.001
+    REVOKED_TOKENS_SYNC_SECONDS: int = 5
+    REVOKED_TOKENS_COMPACTION_SECONDS: int = 3600
+    # SSE потоки обновлений членства, лимиты на процесс
+    MEMBERSHIP_STREAMS_MAX: int = 1000
+    MEMBERSHIP_STREAMS_PER_USER: int = 3
+    MEMBERSHIP_STREAMS_HEARTBEAT_SECONDS: float = 15
+    # сверка членств с подписками Stripe, 0 - только вручную (python -m app.domains.memberships.reconciliation)
+    MEMBERSHIP_RECONCILIATION_INTERVAL_SECONDS: int = 6 * 3600
+    MEMBERSHIP_RECONCILIATION_PAGE_SIZE: int = 100
+    # доступ снимается через GRACE секунд после current_period_end, если продление так и не пришло
+    MEMBERSHIP_EXPIRY_SWEEP_SECONDS: int = 300
+    MEMBERSHIP_EXPIRY_GRACE_SECONDS: int = 24 * 3600
+    MEMBERSHIP_EXPIRY_BATCH_SIZE: int = 1000
+    # кэш типов членства: как часто узел сверяет версию с базой и сколько его хранят браузеры/nginx
+    MEMBERSHIP_TYPES_CACHE_CHECK_SECONDS: float = 5
+    MEMBERSHIP_TYPES_CACHE_MAX_AGE_SECONDS: int = 60
+
     SECRET_KEY: str
     ALGORITHM: str
     FERNET_KEY: str
@@ -53,6 +101,21 @@ class Settings(BaseSettings, GmailConfig):
     STRIPE_API_KEY: str
     STRIPE_WEBHOOK_SECRET_KEY: str
     STRIPE_PRICE_ID_TEST: str
+    # клиент Stripe: пусто - api.stripe.com, иначе адрес (например, локального fake Stripe)
+    STRIPE_API_BASE: str = ""
+    STRIPE_MAX_CONNECTIONS: int = 20
+    STRIPE_MAX_CONCURRENT_REQUESTS: int = 20
+    # таймауты одного HTTP запроса и всего вызова, включая ожидание слота и повторы
+    STRIPE_CONNECT_TIMEOUT_SECONDS: float = 3
+    STRIPE_REQUEST_TIMEOUT_SECONDS: float = 10
+    STRIPE_CALL_TIMEOUT_SECONDS: float = 30
+    STRIPE_MAX_NETWORK_RETRIES: int = 2
+    # обработка вебхуков: воркеров на процесс, опрос таблицы, повторы с экспоненциальной задержкой
+    STRIPE_EVENT_WORKERS: int = 2
+    STRIPE_EVENT_POLL_SECONDS: float = 5
+    STRIPE_EVENT_MAX_ATTEMPTS: int = 10
+    STRIPE_EVENT_RETRY_BASE_SECONDS: float = 10
+    STRIPE_EVENT_RETRY_MAX_SECONDS: float = 3600
 
     FRONTEND_DOMAIN_HTTP: str
     FRONTEND_DOMAIN: str
@@ -73,3 +136,8 @@ DB_URL: str = f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}@{
 TEST_DB_URL: str = (
     f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/test"
 )
+DB_REPLICA_URLS: list[str] = [
+    f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}@{host if ':' in host else f'{host}:{settings.DB_PORT}'}/{settings.DB_NAME}"
+    for host in map(str.strip, settings.DB_REPLICA_HOSTS.split(","))
+    if host
+]
@@ -1,11 +1,20 @@
 from abc import ABC, abstractmethod
-from typing import Any, Generic, Sequence, TypeVar
-
-from sqlalchemy import asc, delete, desc, func, select, update
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Generic, Iterator, Sequence, TypeVar
+
+import orjson
+from sqlalchemy import and_, delete, false, func, insert, literal, or_, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.engine import Result
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql.expression import ClauseElement, Executable
 
 from app.core.utils.filters import build_conditions
+from app.core.utils.pagination import COUNT_CAP, CountStrategy, decode_cursor, parse_ordering
 
 
 class BaseRepository(ABC):
@@ -32,6 +41,11 @@ class BaseRepository(ABC):
 
 T = TypeVar("T")
 
+# строк в одном multi-row INSERT / executemany, чтобы не упереться в лимит параметров postgres (32767)
+BULK_CHUNK_SIZE = 1000
+# имя колонки count(*) over() в стратегии подсчета WINDOW
+TOTAL_COUNT_LABEL = "_total_count"
+
 
 class InvalidOrderAttributeError(BaseException):
     pass
@@ -41,6 +55,24 @@ class InvalidFilterError(BaseException):
     pass
 
 
+class InvalidCursorError(BaseException):
+    pass
+
+
+class Explain(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` of a statement, bound parameters are kept as is"""
+
+    inherit_cache = False
+
+    def __init__(self, stmt):
+        self.stmt = stmt
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kwargs) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.stmt, **kwargs)
+
+
 class SQLAlchemyRepository(BaseRepository, Generic[T]):
     model: T = None
 
@@ -48,39 +80,163 @@ class SQLAlchemyRepository(BaseRepository, Generic[T]):
         self.session = session
 
     async def list(
-        self, limit: int = None, offset: int = None, order_by: str = None, filters: dict[str, Any] = None, stmt=None
-    ) -> [Sequence[T], int]:
-        if stmt is None:
+        self,
+        limit: int = None,
+        offset: int = None,
+        order_by: str = None,
+        filters: dict[str, Any] = None,
+        stmt=None,
+        cursor: str = None,
+        count_strategy: CountStrategy = CountStrategy.EXACT,
+        columns: Sequence[str] = None,
+    ) -> [Sequence[T] | Sequence[dict[str, Any]], int | None]:
+        """Returns a page of rows and the total count.
+
+        Pages are addressed either by ``offset`` or, when ``cursor`` is passed, by the sort key
+        of the last row of the previous page (keyset pagination), so deep pages cost the same as the first one.
+        The way the count is calculated is selected by ``count_strategy``, ``None`` is returned for ``NONE``.
+        If ``columns`` are passed only these columns (and the ordering ones) are selected
+        and rows are returned as plain dicts without building ORM instances.
+        """
+        ordering = self._get_ordering(order_by)
+
+        if columns is not None:
+            selected = [self._get_column(column_name) for column_name in columns]
+            selected.extend(column for column, _ in ordering if column.key not in columns)
+            stmt = select(*selected)
+        elif stmt is None:
             stmt = select(self.model)
-        count_stmt = select(func.count()).select_from(self.model)
-
-        if filters:
-            try:
-                conditions = build_conditions(self.model, filters)
-            except ValueError as e:
-                raise InvalidFilterError(f"Invalid filter for <{self.model.__name__}>. Error: {e}")
-            stmt = stmt.filter(*conditions)
-            count_stmt = count_stmt.filter(*conditions)
 
-        if order_by is not None:
-            for param in order_by.split(","):
-                desc_order = param.startswith("-")
-                field_name = param.strip("-")
+        conditions = self._get_conditions(filters)
+        stmt = stmt.filter(*conditions)
 
-                if not hasattr(self.model, param.strip("-")):
-                    raise InvalidOrderAttributeError(f"Model <{self.model.__name__}> don't have attribute <{param}>")
-                stmt = stmt.order_by(desc(field_name) if desc_order else asc(field_name))
+        stmt = stmt.order_by(*_get_order_clauses(ordering))
 
-        if limit is not None and offset is not None:
+        if cursor is not None:
+            stmt = stmt.filter(self._get_keyset_condition(ordering, cursor))
+            if limit is not None:
+                stmt = stmt.limit(limit)
+        elif limit is not None and offset is not None:
             stmt = stmt.offset(offset).limit(limit)
 
-        stmt = stmt.filter_by(_deleted=False)
-        count_stmt = count_stmt.filter_by(_deleted=False)
+        # в режиме курсора окно посчитает только строки после курсора, поэтому нужен отдельный запрос
+        if count_strategy is CountStrategy.WINDOW and cursor is None:
+            data, count = await self._fetch_with_window_count(stmt, as_dicts=columns is not None)
+            # страница за пределами выборки - окно пустое, итог неизвестен
+            if not data and offset:
+                count = await self._count(conditions, CountStrategy.EXACT)
+            return data, count
 
-        data = (await self.session.execute(stmt)).scalars().all()
-        count = (await self.session.execute(count_stmt)).scalar_one()
+        result = await self.session.execute(stmt)
+        data = [dict(row) for row in result.mappings()] if columns is not None else result.scalars().all()
+        return data, await self._count(conditions, count_strategy)
 
-        return data, count
+    def _get_conditions(self, filters: dict[str, Any] | None) -> Sequence:
+        conditions = [self.model._deleted.is_(False)]
+        if filters:
+            try:
+                conditions.extend(build_conditions(self.model, filters))
+            except ValueError as e:
+                raise InvalidFilterError(f"Invalid filter for <{self.model.__name__}>. Error: {e}")
+        return conditions
+
+    async def _fetch_with_window_count(self, stmt, as_dicts: bool) -> [Sequence, int]:
+        result = await self.session.execute(stmt.add_columns(func.count().over().label(TOTAL_COUNT_LABEL)))
+
+        if as_dicts:
+            data = [dict(row) for row in result.mappings()]
+            counts = [row.pop(TOTAL_COUNT_LABEL) for row in data]
+        else:
+            rows = result.all()
+            data = [row[0] for row in rows]
+            counts = [row[1] for row in rows]
+
+        return data, counts[0] if counts else 0
+
+    async def _count(self, conditions: Sequence, count_strategy: CountStrategy) -> int | None:
+        if count_strategy is CountStrategy.NONE:
+            return None
+
+        if count_strategy is CountStrategy.ESTIMATED:
+            estimate = await self._estimate_count(conditions)
+            if estimate is not None:
+                return estimate
+
+        if count_strategy is CountStrategy.CAPPED:
+            subquery = select(self.model.id).filter(*conditions).limit(COUNT_CAP + 1).subquery()
+            return (await self.session.execute(select(func.count()).select_from(subquery))).scalar_one()
+
+        count_stmt = select(func.count()).select_from(self.model).filter(*conditions)
+        return (await self.session.execute(count_stmt)).scalar_one()
+
+    async def _estimate_count(self, conditions: Sequence) -> int | None:
+        """Returns the planner estimate of the row count, ``None`` if the planner has no statistics.
+
+        Without filters (only the soft-delete condition) the estimate is taken from ``pg_class.reltuples``,
+        otherwise from the root node of the EXPLAIN plan.
+        """
+        if len(conditions) == 1:
+            stmt = text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)")
+            estimate = (await self.session.execute(stmt, {"table_name": self.model.__tablename__})).scalar()
+        else:
+            plan = (await self.session.execute(Explain(select(self.model.id).filter(*conditions)))).scalar()
+            if isinstance(plan, str):
+                plan = orjson.loads(plan)
+            estimate = plan[0]["Plan"]["Plan Rows"]
+
+        # reltuples = -1, если таблица ни разу не анализировалась
+        if estimate is None or estimate < 0:
+            return None
+        return int(estimate)
+
+    def _get_ordering(self, order_by: str | None) -> Sequence[tuple[InstrumentedAttribute, bool]]:
+        ordering = []
+
+        for field_name, desc_order in parse_ordering(order_by):
+            column = getattr(self.model, field_name, None)
+            if not isinstance(column, InstrumentedAttribute):
+                raise InvalidOrderAttributeError(f"Model <{self.model.__name__}> don't have attribute <{field_name}>")
+            ordering.append((column, desc_order))
+
+        return ordering
+
+    def _get_column(self, column_name: str) -> InstrumentedAttribute:
+        column = getattr(self.model, column_name, None)
+        if not isinstance(column, InstrumentedAttribute):
+            raise ValueError(f"Model <{self.model.__name__}> don't have column <{column_name}>")
+        return column
+
+    def _get_keyset_condition(self, ordering: Sequence[tuple[InstrumentedAttribute, bool]], cursor: str):
+        """Builds the "after the cursor row" condition for the ordering.
+
+        NULL sort keys are ordered as greater than any value, like postgres does by default
+        (NULLS LAST for ascending and NULLS FIRST for descending columns, see ``_get_order_clauses``).
+        """
+        try:
+            raw_values = decode_cursor(cursor, [(column.key, desc_order) for column, desc_order in ordering])
+            values = [
+                _coerce_cursor_value(column, value) for (column, _), value in zip(ordering, raw_values, strict=True)
+            ]
+        except (ValueError, TypeError, NotImplementedError) as e:
+            raise InvalidCursorError(f"Invalid cursor for <{self.model.__name__}>. Error: {e}")
+
+        columns = [column for column, _ in ordering]
+        directions = {desc_order for _, desc_order in ordering}
+
+        # одинаковое направление сортировки - сравнение кортежей (row value), которое обслуживается одним индексом;
+        # с NULL сравнение кортежей не работает
+        if len(directions) == 1 and not any(_is_nullable(column) for column in columns):
+            literals = [literal(value, column.type) for column, value in zip(columns, values, strict=True)]
+            return tuple_(*columns) < tuple_(*literals) if directions.pop() else tuple_(*columns) > tuple_(*literals)
+
+        # (a > x) OR (a = x AND b < y) OR ...
+        conditions = []
+        for index, (column, desc_order) in enumerate(ordering):
+            equal_prefix = [_equals(columns[i], values[i]) for i in range(index)]
+            after = _after(column, values[index], desc_order)
+            if after is not None:
+                conditions.append(and_(*equal_prefix, after))
+        return or_(false(), *conditions)
 
     async def get_count(self) -> int:
         stmt = select(func.count()).select_from(self.model)
@@ -120,3 +276,113 @@ class SQLAlchemyRepository(BaseRepository, Generic[T]):
 
     async def remove(self, row_id: int) -> Result[int]:
         return await self.session.execute(delete(self.model).where(self.model.id == row_id).returning(self.model.id))
+
+    async def bulk_create(self, rows: Sequence[dict[str, Any]], chunk_size: int = BULK_CHUNK_SIZE) -> Sequence[T]:
+        """Inserts rows with multi-row VALUES ... RETURNING, ``chunk_size`` rows per statement"""
+        created = []
+        for chunk in _chunked(rows, chunk_size):
+            created.extend((await self.session.scalars(insert(self.model).returning(self.model), chunk)).all())
+        return created
+
+    async def bulk_update(self, update_data: dict[int, dict[str, Any]], chunk_size: int = BULK_CHUNK_SIZE) -> None:
+        """Updates rows by id, ``update_data`` maps id to the values of the row.
+
+        Runs as executemany of ``UPDATE ... WHERE id = ...`` (rows may update different columns),
+        RETURNING isn't supported by postgres for executemany updates.
+        """
+        rows = [{"id": object_id, **values} for object_id, values in update_data.items()]
+        for chunk in _chunked(rows, chunk_size):
+            await self.session.execute(update(self.model), chunk)
+
+    async def upsert(
+        self,
+        rows: Sequence[dict[str, Any]],
+        index_elements: Sequence[str] = ("id",),
+        update_fields: Sequence[str] = None,
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> Sequence[T]:
+        """INSERT ... ON CONFLICT (index_elements) DO UPDATE, returns inserted and updated rows.
+
+        By default all passed fields except the conflict target are updated,
+        with empty ``update_fields`` conflicting rows are skipped (DO NOTHING) and aren't returned.
+        One chunk must not contain two rows with the same conflict target.
+        """
+        if not rows:
+            return []
+
+        stmt = pg_insert(self.model)
+        if update_fields is None:
+            update_fields = [field for field in rows[0] if field not in index_elements]
+        if update_fields:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={field: stmt.excluded[field] for field in update_fields},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+        stmt = stmt.returning(self.model).execution_options(populate_existing=True)
+
+        result = []
+        for chunk in _chunked(rows, chunk_size):
+            result.extend((await self.session.scalars(stmt, chunk)).all())
+        return result
+
+    async def bulk_remove(self, row_ids: Sequence[int], chunk_size: int = BULK_CHUNK_SIZE) -> Sequence[int]:
+        """Deletes rows by ids, returns ids of deleted rows"""
+        removed = []
+        for chunk in _chunked(row_ids, chunk_size):
+            stmt = delete(self.model).where(self.model.id.in_(chunk)).returning(self.model.id)
+            removed.extend((await self.session.scalars(stmt)).all())
+        return removed
+
+
+def _chunked(items: Sequence, chunk_size: int) -> Iterator[Sequence]:
+    for start in range(0, len(items), chunk_size):
+        yield items[start : start + chunk_size]
+
+
+def _is_nullable(column: InstrumentedAttribute) -> bool:
+    return any(getattr(expression, "nullable", True) for expression in getattr(column.property, "columns", ()))
+
+
+def _get_order_clauses(ordering: Sequence[tuple[InstrumentedAttribute, bool]]) -> list:
+    """ORDER BY clauses, the NULLS placement of nullable columns is explicit as the keyset conditions rely on it"""
+    clauses = []
+    for column, desc_order in ordering:
+        if not _is_nullable(column):
+            clauses.append(column.desc() if desc_order else column.asc())
+        else:
+            clauses.append(column.desc().nulls_first() if desc_order else column.asc().nulls_last())
+    return clauses
+
+
+def _equals(column: InstrumentedAttribute, value: Any):
+    return column.is_(None) if value is None else column == literal(value, column.type)
+
+
+def _after(column: InstrumentedAttribute, value: Any, desc_order: bool):
+    """Condition of the values following ``value`` in the column order, ``None`` if nothing follows it"""
+    if value is None:
+        # NULL - наибольшее значение: при убывании за ним идут все непустые, при возрастании - ничего
+        return column.is_not(None) if desc_order else None
+    value = literal(value, column.type)
+    if desc_order:
+        return column < value
+    return or_(column > value, column.is_(None)) if _is_nullable(column) else column > value
+
+
+def _coerce_cursor_value(column: InstrumentedAttribute, value: Any) -> Any:
+    """Restores the python value of a sort key decoded from the JSON cursor"""
+    if value is None:
+        return None
+
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if issubclass(python_type, Enum):
+        return python_type(value)
+    if python_type is Decimal:
+        return Decimal(value)
+    if not isinstance(value, python_type):
+        raise ValueError(f"Unexpected cursor value for <{column.key}>")
+    return value
@@ -0,0 +1,36 @@
+from sqlalchemy import Index, func, text
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def _has_trigram_extension(ddl, target, bind, **kwargs) -> bool:
+    return bind.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+
+
+def prefix_search_index(column: InstrumentedAttribute) -> Index:
+    """Btree index on lower(column) for the ``startswith`` filter (``lower(column) LIKE 'x%'``)"""
+    table_name = column.class_.__tablename__
+    return Index(
+        f"ix_{table_name}_{column.key}_lower_pattern",
+        func.lower(column).label(f"{column.key}_lower"),
+        postgresql_ops={f"{column.key}_lower": "text_pattern_ops"},
+    )
+
+
+def trigram_search_index(column: InstrumentedAttribute) -> Index:
+    """GIN pg_trgm index on lower(column) for the ``icontains`` filter (``lower(column) LIKE '%x%'``).
+
+    The index is skipped by ``create_all`` if the pg_trgm extension isn't available in the database.
+    """
+    table_name = column.class_.__tablename__
+    return Index(
+        f"ix_{table_name}_{column.key}_trgm",
+        func.lower(column).label(f"{column.key}_lower"),
+        postgresql_using="gin",
+        postgresql_ops={f"{column.key}_lower": "gin_trgm_ops"},
+    ).ddl_if(callable_=_has_trigram_extension)
+
+
+def fulltext_search_index(column: InstrumentedAttribute) -> Index:
+    """GIN index on a ``tsvector`` column for full-text search (``column @@ tsquery``)"""
+    table_name = column.class_.__tablename__
+    return Index(f"ix_{table_name}_{column.key}", column, postgresql_using="gin")
@@ -0,0 +1,48 @@
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class QueryStats:
+    """SQL statements executed while handling one request"""
+
+    count: int = 0
+    duration: float = 0.0  # секунды
+    statements: Counter = field(default_factory=Counter)
+
+    def get_repeated_statements(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements executed at least ``threshold`` times, the same SQL with different parameters is a likely N+1"""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+# объект статистики создается в middleware, дочерние задачи получают копию контекста с тем же объектом
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def start_query_stats() -> QueryStats:
+    stats = QueryStats()
+    query_stats.set(stats)
+    return stats
+
+
+# слушаем класс Engine, чтобы учитывались запросы и к primary, и к репликам
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # время храним в контексте выполнения, упавший запрос не оставит мусора в conn.info
+    context.query_start_time = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = query_stats.get()
+    if stats is None:
+        return
+
+    stats.count += 1
+    stats.duration += time.perf_counter() - context.query_start_time
+    stats.statements[statement] += 1
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from functools import wraps
+from itertools import cycle
+from typing import Any, Awaitable, Callable, TypeVar
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import ORMExecuteState, Session, SessionTransaction
+
+from app.core.config import settings
+from app.core.database.setup_db import replica_engines, session_factory
+
+# id пользователя текущего запроса, выставляется в get_current_user
+current_user_id: ContextVar[int | None] = ContextVar("current_user_id", default=None)
+
+# ошибки соединения/восстановления реплики, после которых запрос безопасно повторить на primary
+REPLICA_ERRORS = (OSError, asyncio.TimeoutError, OperationalError, InterfaceError)
+
+R = TypeVar("R")
+
+
+class ReplicaRouter:
+    """Chooses the engine for read-only operations.
+
+    Replicas are used round-robin, a failed replica is skipped for ``retry_after`` seconds.
+    Users who wrote something during the last ``read_your_writes_window`` seconds are kept on the primary,
+    so they don't see stale data because of the replication lag. The window is tracked per process.
+    """
+
+    def __init__(self, engines: list[AsyncEngine], retry_after: float, read_your_writes_window: float):
+        self.engines = engines
+        self.retry_after = retry_after
+        self.read_your_writes_window = read_your_writes_window
+        self._engines_cycle = cycle(engines)
+        self._failed_until: dict[AsyncEngine, float] = {}
+        self._recent_writers: dict[int, float] = {}
+
+    def get_engine(self, user_id: int | None = None) -> AsyncEngine | None:
+        """Returns a healthy replica engine, ``None`` if the primary has to be used"""
+        now = time.monotonic()
+
+        if user_id is not None and self._recent_writers.get(user_id, 0) > now:
+            return None
+
+        for _ in range(len(self.engines)):
+            engine = next(self._engines_cycle)
+            if self._failed_until.get(engine, 0) <= now:
+                return engine
+
+        return None
+
+    def mark_failed(self, engine: AsyncEngine) -> None:
+        self._failed_until[engine] = time.monotonic() + self.retry_after
+
+    def record_write(self, user_id: int | None) -> None:
+        if user_id is None or not self.engines:
+            return
+
+        now = time.monotonic()
+        if len(self._recent_writers) > 10_000:
+            self._recent_writers = {key: until for key, until in self._recent_writers.items() if until > now}
+        self._recent_writers[user_id] = now + self.read_your_writes_window
+
+
+replica_router = ReplicaRouter(
+    replica_engines,
+    retry_after=settings.DB_REPLICA_RETRY_SECONDS,
+    read_your_writes_window=settings.READ_YOUR_WRITES_SECONDS,
+)
+
+
+def read_only(method: Callable[..., Awaitable[R]]) -> Callable[..., Awaitable[R]]:
+    """Runs a read-only service method against a replica.
+
+    The service's unit of work is replaced by the same unit of work bound to a replica session for the call.
+    If the replica is unavailable the replica is marked as failed and the method is repeated on the primary.
+    """
+
+    @wraps(method)
+    async def wrapper(self, *args: Any, **kwargs: Any) -> R:
+        engine = replica_router.get_engine(current_user_id.get())
+        if engine is None:
+            return await method(self, *args, **kwargs)
+
+        primary_uow = self.uow
+        try:
+            async with session_factory(bind=engine, info={"read_only": True}) as session:
+                self.uow = type(primary_uow)(session)
+                return await method(self, *args, **kwargs)
+        except REPLICA_ERRORS as e:
+            logger.warning(f"Replica {engine.url.host} failed, falling back to primary: {e!r}")
+            replica_router.mark_failed(engine)
+        finally:
+            self.uow = primary_uow
+
+        return await method(self, *args, **kwargs)
+
+    return wrapper
+
+
+@event.listens_for(Session, "after_begin")
+def _begin_read_only_transaction(session: Session, transaction: SessionTransaction, connection) -> None:
+    # запись через сессию реплики отклоняется сервером (SQLSTATE 25006, не из REPLICA_ERRORS) и не повторяется на primary
+    if session.info.get("read_only"):
+        connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_orm_writes(orm_execute_state: ORMExecuteState) -> None:
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush_writes(session: Session, flush_context) -> None:
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _record_user_write(session: Session) -> None:
+    if session.info.pop("has_writes", False):
+        replica_router.record_write(current_user_id.get())
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_rolled_back_writes(session: Session, previous_transaction: SessionTransaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop("has_writes", None)
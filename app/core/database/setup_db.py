@@ -1,6 +1,6 @@
 from typing import AsyncGenerator
 
-from sqlalchemy import MetaData, text
+from sqlalchemy import DDL, MetaData, event, text
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -9,7 +9,7 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
-from app.core.config import CONVENTION, DB_URL, DEV_MODE
+from app.core.config import CONVENTION, DB_REPLICA_URLS, DB_URL, DEV_MODE
 
 async_engine: AsyncEngine = create_async_engine(
     url=DB_URL,
@@ -17,6 +17,11 @@ async_engine: AsyncEngine = create_async_engine(
     pool_size=10,
     max_overflow=20,
 )
+# pre_ping - упавшая реплика обнаруживается при выдаче соединения, а не посреди запроса
+replica_engines: list[AsyncEngine] = [
+    create_async_engine(url=url, echo=DEV_MODE, pool_size=10, max_overflow=20, pool_pre_ping=True)
+    for url in DB_REPLICA_URLS
+]
 session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
     bind=async_engine,
     autoflush=False,
@@ -29,6 +34,13 @@ session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
 # чтобы после завершения работы с сессией пошло выполнение дальше yield и вызвался метод
 # __aexit__ асинхронного контекстного менеджера
 async def session_getter() -> AsyncGenerator[AsyncSession, None]:
+    """Request-scoped session.
+
+    FastAPI caches the dependency per request, so every unit of work of the request gets this session.
+    The session takes a pool connection on its first query and gives it back when the outermost
+    ``async with uow`` block ends, so password hashing, Stripe calls and answers from the in-process caches
+    don't hold a connection.
+    """
     async with session_factory() as session:
         yield session
 
@@ -37,3 +49,16 @@ class Base(DeclarativeBase):
     metadata = MetaData(naming_convention=CONVENTION)
 
     _deleted: Mapped[bool] = mapped_column(default=False, server_default=text("false"))
+
+
+# для create_all (тесты), в миграциях расширение создается явно; в сборках postgres без contrib его может не быть
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL(
+        "DO $$ BEGIN "
+        "IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') "
+        "THEN CREATE EXTENSION IF NOT EXISTS pg_trgm; END IF; "
+        "END $$"
+    ),
+)
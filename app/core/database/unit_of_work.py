@@ -4,18 +4,42 @@ from app.core.database.setup_db import session_factory
 
 
 class SQLAlchemyUnitOfWork:
+    """Transaction boundary around the repositories.
+
+    Unit of works of one request share the request-scoped session (see ``session_getter``),
+    so ``async with uow`` blocks may be nested, also across different unit of works:
+    only the outermost block commits or rolls back, inner blocks are wrapped in savepoints.
+    """
+
     def __init__(self, session: AsyncSession = None):
         self._session = session or session_factory()
 
     async def __aenter__(self):
+        # глубина вложенности хранится в сессии, а не в UoW, т.к. сессия общая для всех UoW запроса
+        depth = self._session.info.get("uow_depth", 0)
+        if depth:
+            self._session.info.setdefault("uow_savepoints", []).append(await self._session.begin_nested())
+        self._session.info["uow_depth"] = depth + 1
         return self  # Возвращает сам объект, чтобы можно было использовать внутри контекстного менеджера async with
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        depth = self._session.info["uow_depth"] - 1
+        self._session.info["uow_depth"] = depth
+
+        if depth:
+            savepoint = self._session.info["uow_savepoints"].pop()
+            if exc_type:
+                await savepoint.rollback()
+            else:
+                await savepoint.commit()
+            return
+
         if exc_type:  # тип ошибки, если она произошла
             await self.rollback()
         else:
             await self.commit()
 
+        # соединение возвращается в пул, следующий блок запроса возьмет его заново
         await self._session.close()
 
     async def rollback(self):
@@ -0,0 +1,28 @@
+from sqlalchemy import BigInteger, Column, String, Table, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database.setup_db import Base
+
+# версии редко меняющихся справочников, кэши узлов сверяют свою версию с базой (см. MembershipTypeCatalog)
+catalog_versions_table = Table(
+    "catalog_versions",
+    Base.metadata,
+    Column("name", String(), primary_key=True),
+    Column("version", BigInteger(), nullable=False),
+)
+
+
+async def get_catalog_version(session: AsyncSession, name: str) -> int:
+    stmt = select(catalog_versions_table.c.version).where(catalog_versions_table.c.name == name)
+    return (await session.scalar(stmt)) or 0
+
+
+async def bump_catalog_version(session: AsyncSession, name: str) -> int:
+    """Increments the version in the current transaction, other nodes see it together with the changed data"""
+    stmt = insert(catalog_versions_table).values(name=name, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[catalog_versions_table.c.name],
+        set_={"version": catalog_versions_table.c.version + 1},
+    ).returning(catalog_versions_table.c.version)
+    return (await session.execute(stmt)).scalar_one()
@@ -0,0 +1,65 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """Bounded in-process LRU cache, entries expire ``ttl`` seconds after they are set.
+
+    The cache is per process: with several workers an invalidation reaches only the worker that made it,
+    the others see the old value for at most ``ttl`` seconds. ``ttl=0`` disables the cache.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # растет при каждой инвалидации, см. set(generation=...)
+        self.generation = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, generation: int | None = None) -> None:
+        """Stores the value, evicting the least recently used entry if the cache is full.
+
+        ``generation`` is the value of ``self.generation`` read before the value was loaded,
+        if something was invalidated since then the value may be stale and isn't stored.
+        """
+        if self.ttl <= 0 or (generation is not None and generation != self.generation):
+            return
+
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self.generation += 1
+        self._data.pop(key, None)
+
+    def pop_where(self, predicate: Callable[[V], bool]) -> None:
+        """Removes entries whose value matches the predicate, O(maxsize)"""
+        self.generation += 1
+        for key in [key for key, (_, value) in self._data.items() if predicate(value)]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Sequence
+
+from pydantic import BaseModel, create_model
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, selectinload
+
+# {"id": None, "user": {"email": None}}: None - поле целиком, словарь - только перечисленные поля вложенной схемы
+FieldsTree = dict[str, "FieldsTree | None"]
+
+
+@dataclass(frozen=True)
+class FieldSet:
+    """Sparse fieldset requested with the ``fields`` query parameter.
+
+    ``fields`` holds normalized dotted names (``user.email`` selects a field of the nested schema),
+    ``None`` means that all fields of the schema are requested.
+    """
+
+    base_schema: type[BaseModel]
+    fields: tuple[str, ...] | None = None
+
+    @classmethod
+    def parse(cls, base_schema: type[BaseModel], fields: str | None) -> "FieldSet":
+        """Validates comma separated field names against the schema, raises ValueError for unknown fields"""
+        names = sorted({name.strip() for name in (fields or "").split(",") if name.strip()})
+        for name in names:
+            _check_field_path(base_schema, name.split("."))
+        return cls(base_schema, tuple(names) or None)
+
+    @property
+    def schema(self) -> type[BaseModel]:
+        """Response schema with only the requested fields"""
+        if self.fields is None:
+            return self.base_schema
+        return _get_partial_schema(self.base_schema, self.fields)
+
+    @property
+    def tree(self) -> FieldsTree | None:
+        return None if self.fields is None else _build_fields_tree(self.fields)
+
+    @property
+    def columns(self) -> list[str]:
+        """Top-level fields to select"""
+        return list(self.base_schema.model_fields) if self.fields is None else list(self.tree)
+
+
+def get_load_options(model, tree: FieldsTree, extra_columns: Sequence[str] = ()) -> list:
+    """Loader options that load only the requested columns of the model and of its requested relationships.
+
+    Relationships are loaded with ``selectinload``, their foreign keys are added to the loaded columns.
+    """
+    mapper = inspect(model)
+    columns = [getattr(model, name) for name in extra_columns if name in mapper.column_attrs]
+    options = []
+
+    for name, subtree in tree.items():
+        if name not in mapper.relationships:
+            columns.append(getattr(model, name))
+            continue
+
+        relationship = mapper.relationships[name]
+        columns.extend(
+            getattr(model, mapper.get_property_by_column(column).key) for column in relationship.local_columns
+        )
+        loader = selectinload(getattr(model, name))
+        if subtree:
+            loader = loader.options(*get_load_options(relationship.mapper.class_, subtree))
+        options.append(loader)
+
+    return [load_only(*columns), *options]
+
+
+def _get_nested_schema(annotation: Any) -> type[BaseModel] | None:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    return None
+
+
+def _check_field_path(schema: type[BaseModel], path: list[str]) -> None:
+    field = schema.model_fields.get(path[0])
+    if field is None:
+        raise ValueError(f"Schema <{schema.__name__}> don't have field <{path[0]}>")
+
+    if len(path) > 1:
+        nested_schema = _get_nested_schema(field.annotation)
+        if nested_schema is None:
+            raise ValueError(f"Field <{path[0]}> of <{schema.__name__}> has no nested fields")
+        _check_field_path(nested_schema, path[1:])
+
+
+def _build_fields_tree(fields: Sequence[str]) -> FieldsTree:
+    tree = {}
+    for name in fields:
+        head, _, rest = name.partition(".")
+        if not rest:
+            tree[head] = None
+        elif head not in tree or tree[head] is not None:
+            tree.setdefault(head, []).append(rest)
+    return {name: subtree and _build_fields_tree(subtree) for name, subtree in tree.items()}
+
+
+@lru_cache(maxsize=256)
+def _get_partial_schema(schema: type[BaseModel], fields: tuple[str, ...]) -> type[BaseModel]:
+    return _build_partial_schema(schema, _build_fields_tree(fields))
+
+
+def _build_partial_schema(schema: type[BaseModel], tree: FieldsTree) -> type[BaseModel]:
+    definitions = {}
+    for name, subtree in tree.items():
+        field = schema.model_fields[name]
+        annotation = field.annotation
+        if subtree:
+            annotation = _build_partial_schema(_get_nested_schema(annotation), subtree)
+        definitions[name] = (annotation, field)
+
+    return create_model(
+        f"Partial{schema.__name__}",
+        __config__={**schema.model_config, "from_attributes": True},
+        **definitions,
+    )
@@ -1,5 +1,13 @@
+from sqlalchemy import func
 from sqlalchemy.orm import InstrumentedAttribute
 
+LIKE_ESCAPE = "/"
+
+
+def escape_like(value: str) -> str:
+    """Escapes LIKE wildcards, so the value is matched literally"""
+    return value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2).replace("%", f"{LIKE_ESCAPE}%").replace("_", f"{LIKE_ESCAPE}_")
+
 
 def get_condition(column, operator: str, value):  # noqa
     if operator == "eq":
@@ -15,10 +23,11 @@ def get_condition(column, operator: str, value):  # noqa
     elif operator == "nte":
         return column <= value
 
+    # lower(column) LIKE ... вместо ILIKE - такие выражения обслуживают индексы из app/core/database/indexes.py
     elif operator == "icontains":
-        return column.ilike(f"%{value}%")
+        return func.lower(column).contains(func.lower(escape_like(value)), escape=LIKE_ESCAPE)
     elif operator == "startswith":
-        return column.ilike(f"{value}%")
+        return func.lower(column).startswith(func.lower(escape_like(value)), escape=LIKE_ESCAPE)
     elif operator == "endswith":
         return column.endswith(f"%{value}")
     elif operator == "iendswith":
@@ -0,0 +1,84 @@
+import base64
+import binascii
+from collections.abc import Mapping
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Sequence
+
+import orjson
+
+TIE_BREAKER_FIELD = "id"
+COUNT_CAP = 1000
+
+
+class CountStrategy(str, Enum):
+    """How the total count of a paginated list is calculated"""
+
+    EXACT = "exact"  # отдельный select count(*)
+    WINDOW = "window"  # count(*) over() в том же запросе, что и страница
+    ESTIMATED = "estimated"  # оценка планировщика (pg_class.reltuples / EXPLAIN)
+    CAPPED = "capped"  # точное значение до COUNT_CAP, дальше "1000+"
+    NONE = "none"
+
+
+def parse_ordering(order_by: str | None) -> list[tuple[str, bool]]:
+    """Returns (field_name, descending) pairs for the ordering string.
+
+    The ``id`` tie-breaker is always appended (in the direction of the last field),
+    so the resulting order is total and stable between pages.
+    """
+    ordering = []
+
+    if order_by:
+        for param in order_by.split(","):
+            param = param.strip()
+            if param:
+                ordering.append((param.strip("-"), param.startswith("-")))
+
+    if TIE_BREAKER_FIELD not in (field_name for field_name, _ in ordering):
+        ordering.append((TIE_BREAKER_FIELD, ordering[-1][1] if ordering else False))
+
+    return ordering
+
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError
+
+
+def encode_cursor(ordering: list[tuple[str, bool]], values: list[Any]) -> str:
+    """Packs the sort key of the last row into an opaque url-safe string"""
+    keys = [f"-{field_name}" if desc_order else field_name for field_name, desc_order in ordering]
+    payload = orjson.dumps({"k": keys, "v": values}, default=_default)
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, ordering: list[tuple[str, bool]]) -> list[Any]:
+    """Returns raw sort key values stored in the cursor, raises ValueError if it doesn't match the ordering"""
+    try:
+        payload = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        keys, values = payload["k"], payload["v"]
+    except (binascii.Error, orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+        raise ValueError("Malformed cursor")
+
+    expected_keys = [f"-{field_name}" if desc_order else field_name for field_name, desc_order in ordering]
+    if keys != expected_keys or len(values) != len(ordering):
+        raise ValueError("Cursor doesn't match the requested ordering")
+
+    return values
+
+
+def get_next_cursor(rows: Sequence[Any], order_by: str | None, limit: int | None) -> str | None:
+    """Builds the cursor pointing after the last row of a full page, ``None`` if there is no next page"""
+    if not rows or limit is None or len(rows) < limit:
+        return None
+
+    last_row = rows[-1]
+    ordering = parse_ordering(order_by)
+    if isinstance(last_row, Mapping):
+        values = [last_row[field_name] for field_name, _ in ordering]
+    else:
+        values = [getattr(last_row, field_name) for field_name, _ in ordering]
+
+    return encode_cursor(ordering, values)
@@ -1,11 +1,14 @@
-from typing import Annotated
+from datetime import datetime
+from typing import Annotated, Sequence
 
 from fastapi import Depends
+from sqlalchemy import delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database.base_repository import SQLAlchemyRepository
 from app.core.database.setup_db import session_getter
 from app.core.database.unit_of_work import SQLAlchemyUnitOfWork
+from app.domains.auth.models import RevokedToken
 from app.domains.permissions.models import Permission, UserPermission
 from app.domains.users.infrastructure import UserRepository
 
@@ -18,12 +21,34 @@ class UserPermissionRepository(SQLAlchemyRepository):
     model = UserPermission
 
 
+class RevokedTokenRepository(SQLAlchemyRepository):
+    model = RevokedToken
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None:
+        await self.upsert([{"jti": jti, "expires_at": expires_at}], index_elements=("jti",), update_fields=())
+
+    async def is_revoked(self, jti: str) -> bool:
+        return await self.session.get(RevokedToken, jti) is not None
+
+    async def get_active(self, revoked_since: datetime | None = None) -> Sequence[tuple[str, datetime]]:
+        """``(jti, revoked_at)`` of not expired tokens"""
+        stmt = select(RevokedToken.jti, RevokedToken.revoked_at).where(RevokedToken.expires_at > func.now())
+        if revoked_since is not None:
+            stmt = stmt.where(RevokedToken.revoked_at > revoked_since)
+        return (await self.session.execute(stmt)).tuples().all()
+
+    async def delete_expired(self) -> int:
+        result = await self.session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= func.now()))
+        return result.rowcount
+
+
 class AuthUnitOfWork(SQLAlchemyUnitOfWork):
     def __init__(self, session=None):
         super().__init__(session)
         self.user_repository = UserRepository(self._session)
         self.permission_repository = PermissionRepository(self._session)
         self.user_permission_repository = UserPermissionRepository(self._session)
+        self.revoked_token_repository = RevokedTokenRepository(self._session)
 
 
 def get_auth_unit_of_work(session: Annotated[AsyncSession, Depends(session_getter)]) -> AuthUnitOfWork:
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from app.core.config import settings
+from app.core.utils.bloom import BloomFilter
+
+
+class RevokedTokenFilter:
+    """In-process Bloom filter of revoked refresh token ids, makes the "not revoked" check free of queries.
+
+    Only ids found in the filter are looked up in ``revoked_tokens``. Tokens revoked by this worker are added
+    immediately, tokens revoked by other workers are picked up by the periodic ``sync``
+    (``REVOKED_TOKENS_SYNC_SECONDS``), until then they are accepted by this worker.
+    The filter is rebuilt from the table after expired rows are deleted or when it's full.
+    """
+
+    # запас на транзакции, закоммиченные позже, но с более ранним revoked_at
+    SYNC_OVERLAP = timedelta(minutes=1)
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.loaded = False
+        # максимальный revoked_at из загруженных строк, по часам базы
+        self.synced_at: datetime | None = None
+        self._bloom = BloomFilter(capacity, error_rate)
+
+    def load(self, revoked: Iterable[tuple[str, datetime]]) -> None:
+        """Replaces the filter with the ``(jti, revoked_at)`` rows of the table"""
+        revoked = list(revoked)
+        bloom = BloomFilter(max(self.capacity, 2 * len(revoked)), self.error_rate)
+        for jti, _ in revoked:
+            bloom.add(jti)
+        self._bloom = bloom
+        self.synced_at = max((revoked_at for _, revoked_at in revoked), default=self.synced_at)
+        self.loaded = True
+
+    def add(self, jti: str, revoked_at: datetime | None = None) -> None:
+        self._bloom.add(jti)
+        if revoked_at is not None and (self.synced_at is None or revoked_at > self.synced_at):
+            self.synced_at = revoked_at
+
+    def get_sync_start(self) -> datetime | None:
+        return self.synced_at - self.SYNC_OVERLAP if self.synced_at is not None else None
+
+    @property
+    def needs_rebuild(self) -> bool:
+        return self._bloom.is_full
+
+    def might_be_revoked(self, jti: str) -> bool:
+        return jti in self._bloom
+
+
+revoked_token_filter = RevokedTokenFilter(
+    capacity=settings.REVOKED_TOKENS_FILTER_CAPACITY,
+    error_rate=settings.REVOKED_TOKENS_FILTER_ERROR_RATE,
+)
@@ -1,9 +1,12 @@
+from datetime import datetime, timezone
 from typing import Annotated
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query
 from fastapi_exception_responses import Responses
 from starlette.responses import Response
 
+from app.core.common.rate_limit import RateLimit, RateLimitResponses, admit_password_hashing
+from app.core.config import settings
 from app.domains.auth.schemas import (
     AccessToken,
     ChangePasswordSchema,
@@ -12,20 +15,28 @@ from app.domains.auth.schemas import (
     RegisterFormData,
     ResetPasswordSchema,
 )
-from app.domains.auth.services import AuthServiceDep
+from app.domains.auth.services import AuthServiceDep, RevokedTokenServiceDep
+from app.domains.permissions.services import PermissionServiceDep
 from app.domains.shared.deps import (
     CurrentUserDep,
     RefreshTokenDep,
-    create_access_token,
     create_refresh_token,
+    create_user_access_token,
+    get_refresh_token_payload,
+    refresh_token_cookie,
 )
-from app.domains.users.models import UserSchema
+from app.domains.users.models import User, UserSchema
 from app.domains.users.services import UserServiceDep
 
 router = APIRouter(tags=["Authentication"], prefix="/auth")
 
 
-class RegisterResponses(Responses):
+async def issue_access_token(user: User, permission_service: PermissionServiceDep) -> str:
+    # user загружен из БД до прав, см. create_user_access_token
+    return create_user_access_token(user, await permission_service.get_user_permission_set(user.id))
+
+
+class RegisterResponses(RateLimitResponses):
     EMAIL_ALREADY_IN_USE = 409, "Provided email is already in use"
 
 
@@ -34,6 +45,10 @@ class RegisterResponses(Responses):
     summary="User registration",
     responses=RegisterResponses.responses,
     status_code=201,
+    dependencies=[
+        Depends(RateLimit("register", per_ip=settings.RATE_LIMIT_REGISTER_IP)),
+        Depends(admit_password_hashing),
+    ],
 )
 async def register(
     register_form_data: RegisterFormData,
@@ -43,23 +58,32 @@ async def register(
     return UserSchema.model_validate(user)
 
 
-class LoginResponses(Responses):
+class LoginResponses(RateLimitResponses):
     WRONG_CREDENTIALS = 401, "Wrong credentials"
 
 
-@router.post("/login", summary="User login", responses=LoginResponses.responses)
+@router.post(
+    "/login",
+    summary="User login",
+    responses=LoginResponses.responses,
+    dependencies=[
+        Depends(RateLimit("login", per_ip=settings.RATE_LIMIT_LOGIN_IP, per_account=settings.RATE_LIMIT_LOGIN_ACCOUNT)),
+        Depends(admit_password_hashing),
+    ],
+)
 async def login(
     response: Response,
     login_data: LoginForm,
     user_service: UserServiceDep,
+    permission_service: PermissionServiceDep,
 ) -> JWTTokenResponse:
     email, password, remember = login_data.model_dump().values()
     user = await user_service.get_user_by_kwargs(email=email)
 
-    if user is None or not user.verify_password(password):
+    if user is None or not await user.check_password(password):
         raise LoginResponses.WRONG_CREDENTIALS
 
-    access_token = create_access_token({"email": user.email})
+    access_token = await issue_access_token(user, permission_service)
     refresh_token = create_refresh_token({"email": user.email}, remember_me=remember)
 
     # Optional adding access_token into Headers
@@ -81,8 +105,15 @@ class RefreshAccessTokenResponses(Responses):
 async def refresh_access_token(
     response: Response,
     refresh_token_payload: RefreshTokenDep,
+    user_service: UserServiceDep,
+    permission_service: PermissionServiceDep,
 ) -> AccessToken:
-    access_token = create_access_token({"email": refresh_token_payload["email"]})
+    # не из кэша: версия прав в новом токене должна быть актуальной
+    user = await user_service.get_user_by_kwargs(email=refresh_token_payload["email"])
+    if user is None:
+        raise RefreshAccessTokenResponses.INVALID_TOKEN
+
+    access_token = await issue_access_token(user, permission_service)
     response.headers["Authorization"] = f"Bearer {access_token}"
     return AccessToken(access_token=access_token)
 
@@ -98,7 +129,12 @@ class LogoutResponses(Responses):
 async def logout(
     response: Response,
     current_user: CurrentUserDep,  # noqa auth dependency
+    revoked_token_service: RevokedTokenServiceDep,
+    refresh_token: Annotated[str | None, Depends(refresh_token_cookie)],
 ) -> str:
+    payload = get_refresh_token_payload(refresh_token)
+    if payload is not None and payload.get("jti"):
+        await revoked_token_service.revoke(payload["jti"], datetime.fromtimestamp(payload["exp"], tz=timezone.utc))
     response.delete_cookie("refresh_token")
     return "Successfully logged out"
 
@@ -106,6 +142,16 @@ async def logout(
 @router.post(
     "/password-reset",
     summary="Creates a password reset token",
+    responses=RateLimitResponses.responses,
+    dependencies=[
+        Depends(
+            RateLimit(
+                "password-reset",
+                per_ip=settings.RATE_LIMIT_PASSWORD_RESET_IP,
+                per_account=settings.RATE_LIMIT_PASSWORD_RESET_ACCOUNT,
+            )
+        )
+    ],
 )
 async def reset_password(auth_service: AuthServiceDep, data: ResetPasswordSchema) -> None:
     await auth_service.reset_password(data.email)
@@ -130,11 +176,15 @@ async def verify_reset_token(
         raise VerifyTokenResponses.INVALID_TOKEN
 
 
-class ConfirmPasswordResetResponses(Responses):
+class ConfirmPasswordResetResponses(RateLimitResponses):
     INVALID_TOKEN = 400, "Invalid token"
 
 
-@router.post("/password-reset/confirm")
+@router.post(
+    "/password-reset/confirm",
+    responses=ConfirmPasswordResetResponses.responses,
+    dependencies=[Depends(admit_password_hashing)],
+)
 async def confirm_password_reset(
     token: Annotated[str, Query(...)],
     auth_service: AuthServiceDep,
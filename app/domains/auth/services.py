@@ -1,15 +1,21 @@
+import asyncio
+import time
 from datetime import datetime, timezone
 from typing import Annotated
 
 from fastapi import Depends
 from fastapi_exception_responses import Responses
+from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
 
 from app.core.common.cryptographer import Cryptographer
 from app.core.config import fernet, settings
 from app.domains.auth.infrastructure import AuthUnitOfWork, get_auth_unit_of_work
+from app.domains.auth.revocation import revoked_token_filter
 from app.domains.auth.schemas import RegisterFormData
 from app.domains.emails.plugins.gmail_plugin import GmailPlugin
 from app.domains.emails.services import get_email_service
+from app.domains.users.services import invalidate_cached_user
 
 
 class RegisterResponses(Responses):
@@ -34,8 +40,10 @@ class AuthService:
         if user_data["password"] != user_data.pop("repeat_password"):
             raise RegisterResponses.PASSWORDS_DONT_MATCH
 
+        password = user_data.pop("password")
         async with self.uow:
             user = await self.uow.user_repository.create(**user_data)
+            await user.set_password(password)
 
         return user
 
@@ -46,9 +54,10 @@ class AuthService:
             if user is None:
                 raise ValueError("user with provided email not found")
 
-            user.password = password
+            await user.set_password(password)
             await self.uow._session.flush()  # noqa property's setter manual calling
             await self.uow.user_repository.update(user.id, {"last_password_change": datetime.now(tz=timezone.utc)})
+        invalidate_cached_user(user.id)
 
     async def reset_password(self, email: str):
         token = self.cryptographer.create_token(email)
@@ -76,3 +85,73 @@ def get_auth_service(uow: Annotated[AuthUnitOfWork, Depends(get_auth_unit_of_wor
 
 
 AuthServiceDep = Annotated[AuthService, Depends(get_auth_service)]
+
+
+class RevokedTokenService:
+    """Revocation of refresh tokens, see ``RevokedTokenFilter``"""
+
+    def __init__(self, uow):
+        self.uow: AuthUnitOfWork = uow
+
+    async def load_filter(self) -> None:
+        async with self.uow:
+            revoked = await self.uow.revoked_token_repository.get_active()
+        revoked_token_filter.load(revoked)
+
+    async def sync_filter(self) -> None:
+        """Adds tokens revoked by other workers since the last sync"""
+        if not revoked_token_filter.loaded or revoked_token_filter.needs_rebuild:
+            await self.load_filter()
+            return
+
+        async with self.uow:
+            revoked = await self.uow.revoked_token_repository.get_active(revoked_token_filter.get_sync_start())
+        for jti, revoked_at in revoked:
+            revoked_token_filter.add(jti, revoked_at)
+
+    async def compact(self) -> None:
+        """Deletes expired tokens and rebuilds the filter without them"""
+        async with self.uow:
+            deleted = await self.uow.revoked_token_repository.delete_expired()
+            revoked = await self.uow.revoked_token_repository.get_active()
+        revoked_token_filter.load(revoked)
+        logger.info(f"Revoked tokens compacted: {deleted} expired deleted, {len(revoked)} left")
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None:
+        async with self.uow:
+            await self.uow.revoked_token_repository.revoke(jti, expires_at)
+        revoked_token_filter.add(jti)
+
+    async def is_revoked(self, jti: str) -> bool:
+        # фильтр загружается при старте приложения, здесь - если тогда БД была недоступна
+        if not revoked_token_filter.loaded:
+            await self.load_filter()
+        if not revoked_token_filter.might_be_revoked(jti):
+            return False
+        async with self.uow:
+            return await self.uow.revoked_token_repository.is_revoked(jti)
+
+
+async def maintain_revoked_tokens() -> None:
+    """Background task of every worker: syncs the filter and periodically compacts the table"""
+    compacted_at = time.monotonic()
+    while True:
+        await asyncio.sleep(settings.REVOKED_TOKENS_SYNC_SECONDS)
+        service = RevokedTokenService(AuthUnitOfWork())
+        try:
+            if time.monotonic() - compacted_at >= settings.REVOKED_TOKENS_COMPACTION_SECONDS:
+                await service.compact()
+                compacted_at = time.monotonic()
+            else:
+                await service.sync_filter()
+        except (OSError, SQLAlchemyError) as e:
+            logger.warning(f"Revoked tokens maintenance failed: {e!r}")
+
+
+def get_revoked_token_service(
+    uow: Annotated[AuthUnitOfWork, Depends(get_auth_unit_of_work)],
+) -> RevokedTokenService:
+    return RevokedTokenService(uow)
+
+
+RevokedTokenServiceDep = Annotated[RevokedTokenService, Depends(get_revoked_token_service)]
@@ -7,3 +7,4 @@ from pydantic import BaseModel
 class ContactMessagesFilter(BaseModel):
     email__startswith: Annotated[str | None, Query(description="Email filter")] = None
     name__startswith: Annotated[str | None, Query(description="Name filter")] = None
+    email__icontains: Annotated[str | None, Query(description="Email contains")] = None
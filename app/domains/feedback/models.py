@@ -4,6 +4,7 @@ from pydantic import BaseModel, EmailStr, Field
 from sqlalchemy import String, text
 from sqlalchemy.orm import Mapped, mapped_column
 
+from app.core.database.indexes import prefix_search_index, trigram_search_index
 from app.core.database.mixins import UCIMixin
 from app.core.database.setup_db import Base
 
@@ -18,6 +19,12 @@ class ContactMessage(Base, UCIMixin):
     answered: Mapped[bool] = mapped_column(default=False, server_default=text("false"))
 
 
+# индексы под фильтры startswith/icontains (см. app/core/utils/filters.py)
+prefix_search_index(ContactMessage.email)
+prefix_search_index(ContactMessage.name)
+trigram_search_index(ContactMessage.email)
+
+
 class SponsorshipRequest(Base, UCIMixin):
     __tablename__ = "sponsorship_requests"
 
@@ -1,12 +1,16 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from fastapi_exception_responses import Responses
 from pydantic import BaseModel
 
-from app.core.common.request_params import OrderingParamsDep, PaginationParamsDep
-from app.core.common.responses import InvalidRequestParamsResponses, PaginatedResponse
-from app.core.database.base_repository import InvalidOrderAttributeError
+from app.core.common.rate_limit import RateLimit, RateLimitResponses
+from app.core.common.request_params import OrderingParamsDep, PaginationParamsDep, make_fields_params
+from app.core.common.responses import InvalidRequestParamsResponses, PaginatedResponse, build_paginated_response
+from app.core.config import settings
+from app.core.database.base_repository import InvalidCursorError, InvalidOrderAttributeError
+from app.core.utils.fields import FieldSet
+from app.core.utils.pagination import get_next_cursor
 from app.domains.feedback.filters import ContactMessagesFilter
 from app.domains.feedback.models import ContactMessageSchema, CreateContactMessageSchema
 from app.domains.feedback.services import FeedbackServiceDep
@@ -15,7 +19,11 @@ from app.domains.shared.deps import AdminUserDep
 router = APIRouter(prefix="/contact-messages", tags=["Contact Messages"])
 
 
-@router.post("/")
+@router.post(
+    "/",
+    responses=RateLimitResponses.responses,
+    dependencies=[Depends(RateLimit("contact-messages", per_ip=settings.RATE_LIMIT_FEEDBACK_IP))],
+)
 async def create_contact_message(
     contact_message_service: FeedbackServiceDep, message_data: CreateContactMessageSchema
 ) -> ContactMessageSchema:
@@ -23,30 +31,43 @@ async def create_contact_message(
     return ContactMessageSchema.from_orm(contact_message)
 
 
-@router.get("/", responses=InvalidRequestParamsResponses.responses)
+@router.get(
+    "/",
+    responses=InvalidRequestParamsResponses.responses,
+    response_model=PaginatedResponse[ContactMessageSchema],
+)
 async def get_contact_messages(
     admin: AdminUserDep,  # noqa Admin auth argument
     contact_message_service: FeedbackServiceDep,
     params: PaginationParamsDep,
+    fields: Annotated[FieldSet, Depends(make_fields_params(ContactMessageSchema))],
     ordering: OrderingParamsDep = None,
     filters: Annotated[ContactMessagesFilter, Depends()] = None,
-) -> PaginatedResponse[ContactMessageSchema]:
+) -> Response:
     try:
         messages, messages_count = await contact_message_service.get_all_paginated_counted(
             order_by=ordering,
             filters=filters.model_dump(exclude_none=True),
             limit=params["limit"],
             offset=params["offset"],
+            cursor=params["cursor"],
+            count_strategy=params["count_strategy"],
+            columns=fields.columns,
         )
-        data = [ContactMessageSchema.from_orm(message) for message in messages]
-        return PaginatedResponse(
+        return build_paginated_response(
+            fields.schema,
+            messages,
             count=messages_count,
-            data=data,
             page=params["page"],
             page_size=params["page_size"],
+            cursor=params["cursor"],
+            next_cursor=get_next_cursor(messages, ordering, params["limit"]),
+            count_strategy=params["count_strategy"],
         )
     except InvalidOrderAttributeError:
         raise InvalidRequestParamsResponses.INVALID_SORTER_FIELD
+    except InvalidCursorError:
+        raise InvalidRequestParamsResponses.INVALID_CURSOR
 
 
 class AnswerContactMessageResponses(Responses):
@@ -1,13 +1,19 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from pydantic import TypeAdapter
 
+from app.core.common.rate_limit import RateLimit, RateLimitResponses
+from app.core.config import settings
 from app.domains.feedback.models import CreateSponsorshipRequestSchema, SponsorshipRequestSchema
 from app.domains.feedback.services import FeedbackServiceDep
 
 router = APIRouter(prefix="/sponsorship-requests", tags=["Sponsorship Requests"])
 
 
-@router.post("/")
+@router.post(
+    "/",
+    responses=RateLimitResponses.responses,
+    dependencies=[Depends(RateLimit("sponsorship-requests", per_ip=settings.RATE_LIMIT_FEEDBACK_IP))],
+)
 async def create_sponsorship_request(
     sponsorship_request_data: CreateSponsorshipRequestSchema,
     service: FeedbackServiceDep,
@@ -1,7 +1,8 @@
-from typing import Annotated, Any
+from typing import Annotated, Any, Sequence
 
 from fastapi import Depends
 
+from app.core.utils.pagination import CountStrategy
 from app.domains.emails.plugins.gmail_plugin import GmailPlugin
 from app.domains.emails.services import get_email_service
 from app.domains.feedback.infrastructure import FeedbackUnitOfWork, get_feedback_unit_of_work
@@ -19,10 +20,19 @@ class FeedbackService:
             return await self.uow.contact_message_repository.create(**message_data)
 
     async def get_all_paginated_counted(
-        self, limit: int = None, offset: int = None, order_by: str = None, filters: dict[str, Any] = None
+        self,
+        limit: int = None,
+        offset: int = None,
+        order_by: str = None,
+        filters: dict[str, Any] = None,
+        cursor: str = None,
+        count_strategy: CountStrategy = CountStrategy.EXACT,
+        columns: Sequence[str] = None,
     ):
         async with self.uow:
-            return await self.uow.contact_message_repository.list(limit, offset, order_by, filters)
+            return await self.uow.contact_message_repository.list(
+                limit, offset, order_by, filters, cursor=cursor, count_strategy=count_strategy, columns=columns
+            )
 
     async def answer_contact_message(self, contact_message_id: int, subject, answer_message: str, plain: bool = True):
         async with self.uow:
@@ -0,0 +1,79 @@
+import hashlib
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Iterable, Mapping
+
+import orjson
+
+from app.core.config import settings
+from app.domains.memberships.models import MembershipType, MembershipTypeSchema
+
+
+def get_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+@dataclass(frozen=True)
+class MembershipTypeEntry:
+    schema: MembershipTypeSchema
+    body: bytes
+    etag: str
+
+
+@dataclass(frozen=True)
+class MembershipTypesSnapshot:
+    """Immutable catalog state: validated schemas, their serialized JSON and ETags"""
+
+    version: int
+    body: bytes
+    etag: str
+    entries: Mapping[int, MembershipTypeEntry]
+
+    @classmethod
+    def build(cls, version: int, membership_types: Iterable[MembershipType]) -> "MembershipTypesSnapshot":
+        schemas = sorted(
+            (MembershipTypeSchema.model_validate(membership_type) for membership_type in membership_types),
+            key=lambda schema: schema.id,
+        )
+        entries = {}
+        for schema in schemas:
+            body = schema.model_dump_json().encode()
+            entries[schema.id] = MembershipTypeEntry(schema, body, get_etag(body))
+        body = orjson.dumps([schema.model_dump(mode="json") for schema in schemas])
+        return cls(version, body, get_etag(body), MappingProxyType(entries))
+
+    @property
+    def membership_types(self) -> list[MembershipTypeSchema]:
+        return [entry.schema for entry in self.entries.values()]
+
+
+class MembershipTypeCatalog:
+    """Membership types of the process, loaded on startup and replaced as a whole.
+
+    Types change only through ``MembershipService.update_membership_type``, it bumps the catalog version
+    in the same transaction (see ``catalog_versions_table``). The node that made the update drops its snapshot
+    at once, the others compare their version with the database at most every ``check_interval`` seconds
+    and reload the snapshot when it has changed.
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self.snapshot: MembershipTypesSnapshot | None = None
+        self._checked_at = 0.0
+
+    def is_fresh(self) -> bool:
+        return self.snapshot is not None and time.monotonic() - self._checked_at < self.check_interval
+
+    def load(self, snapshot: MembershipTypesSnapshot) -> None:
+        self.snapshot = snapshot
+        self.mark_checked()
+
+    def mark_checked(self) -> None:
+        self._checked_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        self.snapshot = None
+
+
+membership_type_catalog = MembershipTypeCatalog(check_interval=settings.MEMBERSHIP_TYPES_CACHE_CHECK_SECONDS)
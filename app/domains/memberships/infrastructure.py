@@ -1,23 +1,96 @@
-from typing import Annotated
+from datetime import datetime
+from typing import Annotated, Sequence
 
+import orjson
 from fastapi import Depends
+from sqlalchemy import ARRAY, Row, Text, bindparam, func, or_, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database.base_repository import SQLAlchemyRepository
 from app.core.database.setup_db import session_getter
 from app.core.database.unit_of_work import SQLAlchemyUnitOfWork
+from app.core.database.versions import bump_catalog_version, get_catalog_version
 from app.domains.memberships.models import MembershipType, UserMembership
 from app.domains.payments.infrastructure import PaymentRepository
 from app.domains.users.infrastructure import UserRepository
 
+# канал Postgres NOTIFY, см. MembershipUpdatesBroker
+MEMBERSHIP_UPDATES_CHANNEL = "membership_updates"
+# строка catalog_versions, см. MembershipTypeCatalog
+MEMBERSHIP_TYPES_CATALOG = "membership_types"
+
 
 class MembershipRepository(SQLAlchemyRepository[MembershipType]):
     model = MembershipType
 
+    async def get_catalog_version(self) -> int:
+        return await get_catalog_version(self.session, MEMBERSHIP_TYPES_CATALOG)
+
+    async def bump_catalog_version(self) -> int:
+        return await bump_catalog_version(self.session, MEMBERSHIP_TYPES_CATALOG)
+
 
 class UserMembershipRepository(SQLAlchemyRepository[UserMembership]):
     model = UserMembership
 
+    async def lock_user(self, user_id: int) -> None:
+        """Transaction-level advisory lock of the user's membership, released on commit or rollback"""
+        await self.session.execute(select(func.pg_advisory_xact_lock(func.hashtext(self.model.__tablename__), user_id)))
+
+    async def notify_updated(self, user_membership: UserMembership) -> None:
+        """Postgres delivers the notification to the listening nodes when the transaction commits"""
+        if user_membership.id is None:
+            await self.session.flush([user_membership])
+        payload = orjson.dumps({"user_id": user_membership.user_id, "user_membership_id": user_membership.id})
+        await self.session.execute(select(func.pg_notify(MEMBERSHIP_UPDATES_CHANNEL, payload.decode())))
+
+    async def notify_updated_many(self, user_memberships: Sequence[UserMembership | Row]) -> None:
+        """``notify_updated`` for many memberships in one statement"""
+        if not user_memberships:
+            return
+        payloads = [
+            orjson.dumps({"user_id": user_membership.user_id, "user_membership_id": user_membership.id}).decode()
+            for user_membership in user_memberships
+        ]
+        stmt = text("SELECT pg_notify(:channel, payload) FROM unnest(:payloads) AS payload").bindparams(
+            bindparam("payloads", type_=ARRAY(Text()))
+        )
+        await self.session.execute(stmt, {"channel": MEMBERSHIP_UPDATES_CHANNEL, "payloads": payloads})
+
+    async def get_by_stripe_subscriptions(
+        self, subscription_ids: Sequence[str], user_membership_ids: Sequence[int] = ()
+    ) -> Sequence[UserMembership]:
+        """Memberships of the subscriptions and memberships with the passed ids, one query"""
+        stmt = select(UserMembership).where(
+            or_(
+                UserMembership.stripe_subscription_id.in_(subscription_ids),
+                UserMembership.id.in_(user_membership_ids),
+            )
+        )
+        return (await self.session.scalars(stmt)).all()
+
+    async def expire_access(self, period_ended_before: datetime, limit: int) -> Sequence[Row]:
+        """Revokes access of at most ``limit`` memberships whose period ended, returns their ``id`` and ``user_id``.
+
+        Uses the partial index ``ix_users_memberships_access_period_end``,
+        rows locked by other transactions are skipped and expired by the next run.
+        """
+        expired = (
+            select(UserMembership.id)
+            .where(UserMembership.has_access, UserMembership.current_period_end < period_ended_before)
+            .order_by(UserMembership.current_period_end)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(UserMembership)
+            .where(UserMembership.id.in_(expired.scalar_subquery()))
+            .values(has_access=False)
+            .returning(UserMembership.id, UserMembership.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        return (await self.session.execute(stmt)).all()
+
 
 class MembershipUnitOfWork(SQLAlchemyUnitOfWork):
     def __init__(self, session=None):
@@ -6,7 +6,7 @@ from enum import Enum
 from typing import TYPE_CHECKING, Optional
 
 from pydantic import BaseModel, Field
-from sqlalchemy import DateTime, Enum as SQLAEnum, ForeignKey, Numeric, text
+from sqlalchemy import DateTime, Enum as SQLAEnum, ForeignKey, Index, Numeric, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.config import settings
@@ -57,6 +57,10 @@ class MembershipStatusEnum(Enum):
     UNPAID = "unpaid"  # не пытается больше взять оплату
 
 
+# доступ есть, пока подписка не отменена или не истекла
+ACCESS_STATUSES = {MembershipStatusEnum.ACTIVE, MembershipStatusEnum.TRIALING, MembershipStatusEnum.PAST_DUE}
+
+
 class ApprovalStatusEnum(Enum):
     APPROVED = "APPROVED"
     PENDING = "PENDING"
@@ -65,6 +69,10 @@ class ApprovalStatusEnum(Enum):
 
 class UserMembership(Base, UCIMixin):
     __tablename__ = "users_memberships"
+    __table_args__ = (
+        # sweeper ищет членства с доступом по current_period_end, остальные в индекс не попадают
+        Index("ix_users_memberships_access_period_end", "current_period_end", postgresql_where=text("has_access")),
+    )
 
     status: Mapped[MembershipStatusEnum] = mapped_column(
         SQLAEnum(MembershipStatusEnum, name="users_membership_enum"),
@@ -88,6 +96,8 @@ class UserMembership(Base, UCIMixin):
 
     checkout_session_expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
     checkout_url: Mapped[str] = mapped_column(nullable=True)
+    # последняя checkout session, по ней сводка на странице успешной оплаты берется из БД
+    stripe_checkout_session_id: Mapped[str] = mapped_column(nullable=True, unique=True)
 
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), unique=True)
     user: Mapped["User"] = relationship("User", back_populates="memberships")
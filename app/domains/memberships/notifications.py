@@ -0,0 +1,149 @@
+import asyncio
+from collections import defaultdict
+from typing import AsyncIterator, Awaitable, Callable
+
+import orjson
+from loguru import logger
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import settings
+from app.core.database.setup_db import async_engine
+from app.domains.memberships.infrastructure import MEMBERSHIP_UPDATES_CHANNEL
+
+
+class TooManyStreamsError(Exception):
+    pass
+
+
+class MembershipSubscription:
+    """Updates of one user's membership for one stream, the queue holds ``{"user_id", "user_membership_id"}``"""
+
+    # обновление и так перечитывается из БД целиком, лишние уведомления можно отбросить
+    QUEUE_SIZE = 16
+
+    def __init__(self, broker: "MembershipUpdatesBroker", user_id: int):
+        self.broker = broker
+        self.user_id = user_id
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class MembershipUpdatesBroker:
+    """Delivers membership updates made on any node to the streams of this node.
+
+    Updates send ``NOTIFY`` in their transaction (see ``UserMembershipRepository.notify_updated``),
+    Postgres delivers it on commit, rolled back updates aren't delivered. Every node keeps one connection
+    listening to the channel and passes the notifications to the subscriptions of the user.
+    ``max_streams`` and ``max_streams_per_user`` limit open subscriptions of the process.
+    """
+
+    def __init__(self, engine: AsyncEngine, max_streams: int, max_streams_per_user: int):
+        self.engine = engine
+        self.max_streams = max_streams
+        self.max_streams_per_user = max_streams_per_user
+        self.streams_count = 0
+        self._subscriptions: dict[int, set[MembershipSubscription]] = defaultdict(set)
+        self._connection: AsyncConnection | None = None
+        self._lock = asyncio.Lock()
+
+    def subscribe(self, user_id: int) -> MembershipSubscription:
+        if self.streams_count >= self.max_streams or len(self._subscriptions[user_id]) >= self.max_streams_per_user:
+            raise TooManyStreamsError(f"Too many streams for user <{user_id}>")
+
+        subscription = MembershipSubscription(self, user_id)
+        self._subscriptions[user_id].add(subscription)
+        self.streams_count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: MembershipSubscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.remove(subscription)
+        self.streams_count -= 1
+        if not subscriptions:
+            del self._subscriptions[subscription.user_id]
+
+    def publish(self, message: dict) -> None:
+        for subscription in self._subscriptions.get(message["user_id"], ()):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                pass
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            self.publish(orjson.loads(payload))
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            logger.warning(f"Invalid membership update notification: {payload!r}")
+
+    async def start(self) -> None:
+        """Starts listening, reconnects if the connection is lost; cheap when already listening"""
+        if self._is_listening():
+            return
+
+        async with self._lock:
+            if self._is_listening():
+                return
+            await self._close_connection()
+            connection = await self.engine.connect()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.add_listener(MEMBERSHIP_UPDATES_CHANNEL, self._on_notification)
+            self._connection = connection
+
+    async def stop(self) -> None:
+        async with self._lock:
+            await self._close_connection()
+
+    def _is_listening(self) -> bool:
+        if self._connection is None or self._connection.closed:
+            return False
+        # sync_connection.connection - DBAPI соединение SQLAlchemy, driver_connection - соединение asyncpg
+        return not self._connection.sync_connection.connection.driver_connection.is_closed()
+
+    async def _close_connection(self) -> None:
+        if self._connection is None:
+            return
+        try:
+            await self._connection.invalidate()  # LISTEN не должен вернуться в пул вместе с соединением
+        except Exception as e:  # noqa соединение уже могло быть потеряно
+            logger.warning(f"Membership updates listener isn't closed cleanly: {e!r}")
+        self._connection = None
+
+
+membership_updates_broker = MembershipUpdatesBroker(
+    engine=async_engine,
+    max_streams=settings.MEMBERSHIP_STREAMS_MAX,
+    max_streams_per_user=settings.MEMBERSHIP_STREAMS_PER_USER,
+)
+
+
+def format_sse(data: str, event: str | None = None) -> str:
+    return (f"event: {event}\n" if event else "") + f"data: {data}\n\n"
+
+
+async def stream_membership_updates(
+    subscription: MembershipSubscription,
+    load_membership: Callable[[], Awaitable[BaseModel | None]],
+    heartbeat: float,
+) -> AsyncIterator[str]:
+    """Server-Sent Events: the current membership, then the membership after every update.
+
+    A comment line is sent every ``heartbeat`` seconds without updates, it keeps proxies from closing the stream.
+    """
+    try:
+        while True:
+            membership = await load_membership()
+            yield format_sse(membership.model_dump_json() if membership else "null", event="membership")
+            while True:
+                try:
+                    await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                    break
+                except asyncio.TimeoutError:
+                    await subscription.broker.start()
+                    yield ": heartbeat\n\n"
+    finally:
+        subscription.close()
@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Sequence
+
+import stripe
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.core.database.setup_db import async_engine
+from app.domains.memberships.infrastructure import MembershipUnitOfWork
+from app.domains.memberships.models import ACCESS_STATUSES, MembershipStatusEnum, UserMembership
+from app.domains.payments.gateway import StripeGateway, stripe_gateway
+
+
+@dataclass
+class ReconciliationReport:
+    subscriptions: int = 0
+    matched: int = 0
+    unmatched: int = 0  # подписки без членства в БД
+    unsupported: int = 0  # статусы, которых нет в MembershipStatusEnum (например, paused)
+    linked: int = 0  # членства без stripe_subscription_id, найденные по metadata подписки
+    updated: int = 0
+    drift: Counter = field(default_factory=Counter)
+    duration: float = 0.0
+    dry_run: bool = False
+
+    def __str__(self) -> str:
+        drift = ", ".join(f"{name}: {count}" for name, count in sorted(self.drift.items())) or "none"
+        return (
+            f"Membership reconciliation{' (dry run)' if self.dry_run else ''}: "
+            f"subscriptions: {self.subscriptions}, matched: {self.matched}, unmatched: {self.unmatched}, "
+            f"unsupported: {self.unsupported}, linked: {self.linked}, updated: {self.updated}, "
+            f"drift: {drift}, time: {self.duration:.1f}s"
+        )
+
+
+def get_subscription_state(subscription: dict[str, Any]) -> dict[str, Any] | None:
+    """Values of the reconciled fields according to the subscription, None for unsupported statuses"""
+    try:
+        status = MembershipStatusEnum(subscription["status"])
+    except ValueError:
+        return None
+
+    state = {
+        "status": status,
+        "cancel_at_period_end": bool(subscription.get("cancel_at_period_end")),
+        "has_access": status in ACCESS_STATUSES,
+    }
+    # в новых версиях API период хранится в позициях подписки
+    items = (subscription.get("items") or {}).get("data") or []
+    current_period_end = (items[0].get("current_period_end") if items else None) or subscription.get(
+        "current_period_end"
+    )
+    if current_period_end is not None:
+        state["current_period_end"] = datetime.fromtimestamp(current_period_end, tz=timezone.utc)
+    return state
+
+
+def get_drift(user_membership: UserMembership, state: dict[str, Any]) -> dict[str, Any]:
+    return {name: value for name, value in state.items() if getattr(user_membership, name) != value}
+
+
+def _get_metadata_membership_id(subscription: dict[str, Any]) -> int | None:
+    user_membership_id = (subscription.get("metadata") or {}).get("user_membership_id")
+    return int(user_membership_id) if user_membership_id and str(user_membership_id).isdigit() else None
+
+
+class MembershipReconciler:
+    """Brings ``user_memberships`` in line with Stripe subscriptions after lost or failed webhooks.
+
+    Pages through all subscriptions, every page is diffed in memory against the memberships loaded with one query
+    and corrected with one batched UPDATE in its own transaction. A membership without ``stripe_subscription_id``
+    (``checkout.session.completed`` and ``invoice.paid`` were lost) is linked by the ``user_membership_id``
+    of the subscription metadata, Stripe lists newest subscriptions first, so the newest one is linked.
+    """
+
+    def __init__(
+        self,
+        gateway: StripeGateway = stripe_gateway,
+        page_size: int = 100,
+        dry_run: bool = False,
+        uow_factory: Callable[[], MembershipUnitOfWork] = MembershipUnitOfWork,
+    ):
+        self.gateway = gateway
+        self.page_size = page_size
+        self.dry_run = dry_run
+        self.uow_factory = uow_factory
+
+    async def run(self) -> ReconciliationReport:
+        report = ReconciliationReport(dry_run=self.dry_run)
+        started_at = time.perf_counter()
+        params = {"status": "all", "limit": self.page_size}
+
+        while True:
+            page = await self.gateway.list_subscriptions(params)
+            await self.reconcile_page(page.data, report)
+            if not page.has_more or not page.data:
+                break
+            params = {**params, "starting_after": page.data[-1].id}
+
+        report.duration = time.perf_counter() - started_at
+        logger.info(str(report))
+        return report
+
+    async def reconcile_page(self, subscriptions: Sequence[dict[str, Any]], report: ReconciliationReport) -> None:
+        report.subscriptions += len(subscriptions)
+        metadata_ids = {subscription["id"]: _get_metadata_membership_id(subscription) for subscription in subscriptions}
+
+        uow = self.uow_factory()
+        async with uow:
+            user_memberships = await uow.user_membership_repository.get_by_stripe_subscriptions(
+                [subscription["id"] for subscription in subscriptions],
+                [user_membership_id for user_membership_id in metadata_ids.values() if user_membership_id is not None],
+            )
+            by_subscription = {m.stripe_subscription_id: m for m in user_memberships if m.stripe_subscription_id}
+            unlinked = {m.id: m for m in user_memberships if not m.stripe_subscription_id}
+
+            update_data = {}
+            for subscription in subscriptions:
+                user_membership = by_subscription.get(subscription["id"])
+                linked = user_membership is None and metadata_ids[subscription["id"]] in unlinked
+                if linked:
+                    user_membership = unlinked.pop(metadata_ids[subscription["id"]])
+                if user_membership is None:
+                    report.unmatched += 1
+                    continue
+
+                report.matched += 1
+                state = get_subscription_state(subscription)
+                if state is None:
+                    report.unsupported += 1
+                    continue
+
+                drift = get_drift(user_membership, state)
+                if linked:
+                    report.linked += 1
+                    drift["stripe_subscription_id"] = subscription["id"]
+                    if isinstance(subscription.get("customer"), str):
+                        drift["stripe_customer_id"] = subscription["customer"]
+                if drift:
+                    report.drift.update(drift.keys())
+                    update_data[user_membership.id] = drift
+                    logger.info(f"Membership <{user_membership.id}> drifted from <{subscription['id']}>: {drift}")
+
+            if update_data and not self.dry_run:
+                await uow.user_membership_repository.bulk_update(update_data)
+                changed = [m for m in user_memberships if m.id in update_data]
+                await uow.user_membership_repository.notify_updated_many(changed)
+                report.updated += len(update_data)
+
+
+async def reconcile_memberships_periodically() -> None:
+    """Background task of every worker, a run takes an advisory lock, so only one worker reconciles at a time"""
+    while True:
+        await asyncio.sleep(settings.MEMBERSHIP_RECONCILIATION_INTERVAL_SECONDS)
+        try:
+            async with async_engine.connect() as connection:
+                lock_key = func.hashtext("membership_reconciliation")
+                locked = await connection.scalar(select(func.pg_try_advisory_lock(lock_key)))
+                await connection.commit()  # блокировка сессионная, транзакцию держать незачем
+                if not locked:
+                    continue
+                try:
+                    await MembershipReconciler(page_size=settings.MEMBERSHIP_RECONCILIATION_PAGE_SIZE).run()
+                finally:
+                    await connection.scalar(select(func.pg_advisory_unlock(lock_key)))
+                    await connection.commit()
+        except (OSError, SQLAlchemyError, stripe.StripeError) as e:
+            logger.warning(f"Membership reconciliation failed: {e!r}")
+
+
+async def main(dry_run: bool, page_size: int) -> None:
+    try:
+        await MembershipReconciler(page_size=page_size, dry_run=dry_run).run()
+    finally:
+        await stripe_gateway.close()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile user memberships with Stripe subscriptions")
+    parser.add_argument("--dry-run", action="store_true", help="report the drift without updating memberships")
+    parser.add_argument("--page-size", type=int, default=settings.MEMBERSHIP_RECONCILIATION_PAGE_SIZE)
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run, args.page_size))
@@ -1,14 +1,15 @@
 from typing import Annotated
 
 import stripe
-from fastapi import APIRouter, Depends, Path
+from fastapi import APIRouter, Depends, Path, Response
 from fastapi_exception_responses import Responses
-from pydantic import TypeAdapter
 
-from app.core.common.request_params import OrderingParamsDep, PaginationParamsDep
-from app.core.common.responses import InvalidRequestParamsResponses, PaginatedResponse
+from app.core.common.request_params import OrderingParamsDep, PaginationParamsDep, make_fields_params
+from app.core.common.responses import InvalidRequestParamsResponses, PaginatedResponse, build_paginated_response
 from app.core.config import settings
-from app.core.database.base_repository import InvalidOrderAttributeError
+from app.core.database.base_repository import InvalidCursorError, InvalidOrderAttributeError
+from app.core.utils.fields import FieldSet
+from app.core.utils.pagination import get_next_cursor
 from app.domains.memberships.filters import UserMembershipsFilter
 from app.domains.memberships.models import (
     ExtendedUserMembershipSchema,
@@ -43,32 +44,40 @@ class UserMembershipListResponses(InvalidRequestParamsResponses):
     "/user-memberships",
     responses=UserMembershipListResponses.responses,
     summary="Retrieve all paginated filtered and counted user memberships",
+    response_model=PaginatedResponse[ExtendedUserMembershipSchema],
 )
 async def get_all_user_memberships(
     service: MembershipServiceDep,
     params: PaginationParamsDep,
     admin: AdminUserDep,  # noqa
+    fields: Annotated[FieldSet, Depends(make_fields_params(ExtendedUserMembershipSchema))],
     ordering: OrderingParamsDep = None,
     filters: Annotated[UserMembershipsFilter, Depends()] = None,
-) -> PaginatedResponse[ExtendedUserMembershipSchema]:
+) -> Response:
     try:
         user_memberships, count = await service.get_joined_membership(
             order_by=ordering,
             filters=filters.model_dump(exclude_none=True),
             limit=params["limit"],
             offset=params["offset"],
+            cursor=params["cursor"],
+            count_strategy=params["count_strategy"],
+            fields_tree=fields.tree,
         )
-        # валидация списка объектов-моделей
-        ta = TypeAdapter(list[ExtendedUserMembershipSchema])
-        data = ta.validate_python(user_memberships)
-        return PaginatedResponse(
+        return build_paginated_response(
+            fields.schema,
+            user_memberships,
             count=count,
-            data=data,
             page=params["page"],
             page_size=params["page_size"],
+            cursor=params["cursor"],
+            next_cursor=get_next_cursor(user_memberships, ordering, params["limit"]),
+            count_strategy=params["count_strategy"],
         )
     except InvalidOrderAttributeError:
         raise UserMembershipListResponses.INVALID_SORTER_FIELD
+    except InvalidCursorError:
+        raise UserMembershipListResponses.INVALID_CURSOR
 
 
 class UpdateUserMembershipResponses(Responses):
@@ -1,14 +1,16 @@
-import time
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Annotated
 
 import stripe
-from fastapi import APIRouter, Path, Query
+from fastapi import APIRouter, Header, Path, Query, Response
+from fastapi.responses import StreamingResponse
 from fastapi_exception_responses import Responses
 from loguru import logger
 
+from app.core.common.responses import build_cached_json_response
 from app.core.config import settings
 from app.domains.memberships.dependencies import CurrentUserMembershipDep
+from app.domains.memberships.infrastructure import MembershipUnitOfWork
 from app.domains.memberships.models import (
     ExtendedUserMembershipSchema,
     MembershipStatusEnum,
@@ -16,15 +18,21 @@ from app.domains.memberships.models import (
     MembershipTypeSchema,
     UpdateMembershipTypeSchema,
 )
+from app.domains.memberships.notifications import (
+    TooManyStreamsError,
+    membership_updates_broker,
+    stream_membership_updates,
+)
 from app.domains.memberships.schemas import UpdateAction
-from app.domains.memberships.services import MembershipServiceDep
+from app.domains.memberships.services import MembershipService, MembershipServiceDep
 from app.domains.memberships.utils.checkout_session_utils import (
     check_membership_type_already_purchased,
     check_session_is_locked,
+    get_checkout_session_idempotency,
 )
+from app.domains.payments.gateway import StripeGatewayDep
 from app.domains.shared.deps import AdminUserDep, CurrentUserDep
 
-stripe.api_key = settings.STRIPE_API_KEY
 router = APIRouter(prefix="/memberships", tags=["Membership"])
 
 
@@ -42,6 +50,43 @@ async def get_current_user_membership(membership: CurrentUserMembershipDep) -> E
     return ExtendedUserMembershipSchema.from_orm(membership)
 
 
+class MembershipEventsResponses(Responses):
+    TOO_MANY_STREAMS = 429, "Too many open membership streams"
+
+
+@router.get(
+    "/user-memberships/current-user-membership/events",
+    responses=MembershipEventsResponses.responses,
+    response_class=StreamingResponse,
+    summary="Stream current user membership updates (Server-Sent Events)",
+)
+async def stream_current_user_membership(current_user: CurrentUserDep) -> StreamingResponse:
+    try:
+        subscription = membership_updates_broker.subscribe(current_user.id)
+    except TooManyStreamsError:
+        raise MembershipEventsResponses.TOO_MANY_STREAMS
+
+    user_id = current_user.id
+
+    # сессия зависимостей закрывается до начала стрима, каждое чтение идет в своей сессии
+    async def load_membership() -> ExtendedUserMembershipSchema | None:
+        membership = await MembershipService(MembershipUnitOfWork()).get_user_membership_by_kwargs(user_id=user_id)
+        return ExtendedUserMembershipSchema.from_orm(membership) if membership else None
+
+    try:
+        # подписка до первого чтения, иначе обновление между чтением и LISTEN потеряется
+        await membership_updates_broker.start()
+    except BaseException:
+        subscription.close()
+        raise
+
+    return StreamingResponse(
+        stream_membership_updates(subscription, load_membership, settings.MEMBERSHIP_STREAMS_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 class CancelMembershipResponses(Responses):
     NO_ACTIVE_MEMBERSHIP = 404, "Active memberships for current user not found"
 
@@ -68,14 +113,17 @@ async def update_membership(
 
 @router.get(
     "/membership-types",
+    response_model=list[MembershipTypeSchema],
     summary="Retrieve all memberships type",
 )
 async def get_all_membership_types(
     service: MembershipServiceDep,
-) -> list[MembershipTypeSchema]:
-    membership_list, _ = await service.get_all_membership_types()
-    data = [MembershipTypeSchema.from_orm(item) for item in membership_list]
-    return data
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    snapshot = await service.get_membership_types_snapshot()
+    return build_cached_json_response(
+        snapshot.body, snapshot.etag, if_none_match, settings.MEMBERSHIP_TYPES_CACHE_MAX_AGE_SECONDS
+    )
 
 
 class MembershipTypesDetailResponses(Responses):
@@ -84,17 +132,21 @@ class MembershipTypesDetailResponses(Responses):
 
 @router.get(
     "/membership-types/{membership_type_id}",
+    response_model=MembershipTypeSchema,
     responses=MembershipTypesDetailResponses.responses,
     summary="Get memberships type detail page by id",
 )
 async def get_membership_detail(
     membership_type_id: Annotated[int, Path(...)],
     service: MembershipServiceDep,
-) -> MembershipTypeSchema:
-    membership_type = await service.get_membership_type_by_kwargs(id=membership_type_id)
-    if membership_type is None:
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    entry = (await service.get_membership_types_snapshot()).entries.get(membership_type_id)
+    if entry is None:
         raise MembershipTypesDetailResponses.MEMBERSHIP_TYPE_NOT_FOUND
-    return MembershipTypeSchema.from_orm(membership_type)
+    return build_cached_json_response(
+        entry.body, entry.etag, if_none_match, settings.MEMBERSHIP_TYPES_CACHE_MAX_AGE_SECONDS
+    )
 
 
 class MembershipNotFoundResponses(Responses):
@@ -134,83 +186,93 @@ class CreateCheckoutSessionResponses(Responses):
 async def create_checkout_session(
     membership_type_id: Annotated[int, Path(...)],
     service: MembershipServiceDep,
+    gateway: StripeGatewayDep,
     current_user: CurrentUserDep,  # noqa Auth dependency
 ) -> str:
-    membership = await service.get_user_membership_by_kwargs(user_id=current_user.id)
-    target_membership_type = await service.get_membership_type_by_kwargs(id=membership_type_id)
-    checkout_session_expires_at = int(time.time()) + 30 * 60
+    target_membership_type = await service.get_cached_membership_type(membership_type_id)
+
+    if target_membership_type is None:
+        raise CreateCheckoutSessionResponses.MEMBERSHIP_TYPE_NOT_FOUND
 
     logger.info(
         f"Create checkout session called: user_id={current_user.id} membershipType={target_membership_type.type}"
     )
 
-    if target_membership_type is None:
-        raise CreateCheckoutSessionResponses.MEMBERSHIP_TYPE_NOT_FOUND
-
     if target_membership_type.type == MembershipTypeEnum.HONORARY:
         raise CreateCheckoutSessionResponses.FORBIDDEN_MEMBERSHIP_TYPE
 
-    if membership is not None and check_membership_type_already_purchased(membership, target_membership_type):
-        raise CreateCheckoutSessionResponses.MEMBERSHIP_ALREADY_PURCHASED
-
-    if membership is not None and (check_session_is_locked(membership)):
-        logger.warning(
-            f"Duplicate memberships attempt: user_id={current_user.id}, membership_type_id={membership_type_id}"
+    # параллельные запросы пользователя ждут здесь и получают сессию, созданную первым
+    async with service.lock_user_membership(current_user.id):
+        membership = await service.get_user_membership_by_kwargs(user_id=current_user.id)
+
+        if membership is not None and check_membership_type_already_purchased(membership, target_membership_type):
+            raise CreateCheckoutSessionResponses.MEMBERSHIP_ALREADY_PURCHASED
+
+        if membership is not None and (check_session_is_locked(membership)):
+            logger.warning(
+                f"Duplicate memberships attempt: user_id={current_user.id}, membership_type_id={membership_type_id}"
+            )
+            return membership.checkout_url
+
+        if membership is None:
+            membership = await service.create_membership(
+                status=MembershipStatusEnum.INCOMPLETE,
+                user_id=current_user.id,
+                membership_type_id=target_membership_type.id,
+            )
+            membership_creation_log_message = f"""
+                Membership created:
+                id={membership.id}
+                user_id={membership.user_id}
+                status={membership.status}
+                membershipType={target_membership_type.type}
+            """
+            logger.info(membership_creation_log_message)
+
+        metadata = {
+            "membership_type_id": str(target_membership_type.id),
+            "user_id": str(current_user.id),
+            "user_membership_id": str(membership.id),
+        }
+        idempotency_key, checkout_session_expires_at = get_checkout_session_idempotency(
+            membership.id, target_membership_type.stripe_price_id
         )
-        return membership.checkout_url
 
-    if membership is None:
-        membership = await service.create_membership(
-            status=MembershipStatusEnum.INCOMPLETE,
-            user_id=current_user.id,
-            membership_type_id=target_membership_type.id,
-        )
-        membership_creation_log_message = f"""
-            Membership created:
-            id={membership.id}
-            user_id={membership.user_id}
-            status={membership.status}
-            membershipType={target_membership_type.type}
-        """
-        logger.info(membership_creation_log_message)
-
-    metadata = {
-        "membership_type_id": str(target_membership_type.id),
-        "user_id": str(current_user.id),
-        "user_membership_id": str(membership.id),
-    }
-
-    try:
-        session = stripe.checkout.Session.create(
-            mode="subscription",
-            line_items=[
+        try:
+            session = await gateway.create_checkout_session(
                 {
-                    "price": target_membership_type.stripe_price_id,
-                    "quantity": 1,
-                }
-            ],
-            metadata=metadata,
-            subscription_data={"metadata": metadata},  # передается в invoice.paid
-            customer_email=current_user.email,
-            success_url=f"{settings.FRONTEND_DOMAIN}/payment/membership?success=true&session_id={{CHECKOUT_SESSION_ID}}",
-            cancel_url=f"{settings.FRONTEND_DOMAIN}/payment/membership?canceled=true",
-            expires_at=checkout_session_expires_at,
-        )
-    except stripe.error.StripeError as e:
-        logger.exception(f"Stripe API error: {str(e)}")
-        raise CreateCheckoutSessionResponses.PAYMENT_PROVIDER_ERROR
-    except Exception as e:
-        logger.exception(f"Unexpected error: {str(e)}")
-        raise e
-
-    membership_data = {
-        "status": MembershipStatusEnum.INCOMPLETE,
-        "membership_type_id": target_membership_type.id,
-        "checkout_url": session.url,
-        "checkout_session_expires_at": datetime.fromtimestamp(checkout_session_expires_at),
-    }
-
-    await service.update_user_membership(membership.id, membership_data)
+                    "mode": "subscription",
+                    "line_items": [
+                        {
+                            "price": target_membership_type.stripe_price_id,
+                            "quantity": 1,
+                        }
+                    ],
+                    "metadata": metadata,
+                    "subscription_data": {"metadata": metadata},  # передается в invoice.paid
+                    "customer_email": current_user.email,
+                    "success_url": f"{settings.FRONTEND_DOMAIN}/payment/membership?success=true&session_id={{CHECKOUT_SESSION_ID}}",
+                    "cancel_url": f"{settings.FRONTEND_DOMAIN}/payment/membership?canceled=true",
+                    "expires_at": checkout_session_expires_at,
+                },
+                idempotency_key=idempotency_key,
+            )
+        except stripe.error.StripeError as e:
+            logger.exception(f"Stripe API error: {str(e)}")
+            raise CreateCheckoutSessionResponses.PAYMENT_PROVIDER_ERROR
+        except Exception as e:
+            logger.exception(f"Unexpected error: {str(e)}")
+            raise e
+
+        membership_data = {
+            "status": MembershipStatusEnum.INCOMPLETE,
+            "membership_type_id": target_membership_type.id,
+            "checkout_url": session.url,
+            "checkout_session_expires_at": datetime.fromtimestamp(checkout_session_expires_at, tz=timezone.utc),
+            "stripe_checkout_session_id": session.id,
+        }
+
+        await service.update_user_membership(membership.id, membership_data)
 
     logger.info(
         f"""Membership - add checkout info:
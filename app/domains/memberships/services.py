@@ -1,43 +1,90 @@
-from datetime import datetime, timezone
-from typing import Annotated, Any, Sequence
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, Any, AsyncIterator, Sequence
 
-import stripe
 from fastapi.params import Depends
 from loguru import logger
 from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import selectinload
 from stripe import Invoice
 
 from app.core.config import settings
+from app.core.database.replicas import read_only
+from app.core.utils.fields import FieldsTree, get_load_options
+from app.core.utils.pagination import CountStrategy, parse_ordering
 from app.domains.emails.plugins.gmail_plugin import GmailPlugin
 from app.domains.emails.services import get_email_service
+from app.domains.memberships.catalog import MembershipTypesSnapshot, membership_type_catalog
 from app.domains.memberships.infrastructure import MembershipUnitOfWork, get_membership_unit_of_work
-from app.domains.memberships.models import MembershipStatusEnum, MembershipType, UserMembership
-from app.domains.payments.models import PaymentStatus, PaymentType
+from app.domains.memberships.models import (
+    ACCESS_STATUSES,
+    MembershipStatusEnum,
+    MembershipType,
+    MembershipTypeSchema,
+    UserMembership,
+)
+from app.domains.payments.gateway import StripeGateway, stripe_gateway
+from app.domains.payments.models import Payment, PaymentStatus, PaymentType
 from app.domains.users.models import User
 
-stripe.api_key = settings.STRIPE_API_KEY
-
-
 logger.add("logs/invoice_info.log", rotation="365 days", level="INFO")
 
 
 class MembershipService:
-    def __init__(self, uow):
+    def __init__(self, uow, gateway: StripeGateway = stripe_gateway):
         self.uow: MembershipUnitOfWork = uow
+        self.gateway = gateway
         self.email_provider = get_email_service(GmailPlugin)
 
     async def get_all_membership_types(self) -> Sequence[MembershipType]:
         async with self.uow:
             return await self.uow.membership_repository.list()
 
+    @asynccontextmanager
+    async def lock_user_membership(self, user_id: int) -> AsyncIterator[None]:
+        """Serializes changes of the user's membership across requests and nodes.
+
+        The block runs in one transaction, nested unit of works become savepoints,
+        a concurrent block of the same user waits until this one commits or rolls back.
+        """
+        async with self.uow:
+            await self.uow.user_membership_repository.lock_user(user_id)
+            yield
+
     async def get_membership_type_by_kwargs(self, **kwargs) -> MembershipType:
         async with self.uow:
             return await self.uow.membership_repository.get_first_by_kwargs(**kwargs)
 
     async def update_membership_type(self, membership_type_id: int, update_data: dict) -> MembershipType:
         async with self.uow:
-            return await self.uow.membership_repository.update(membership_type_id, update_data)
+            membership_type = await self.uow.membership_repository.update(membership_type_id, update_data)
+            await self.uow.membership_repository.bump_catalog_version()
+        membership_type_catalog.invalidate()
+        return membership_type
+
+    async def get_membership_types_snapshot(self) -> MembershipTypesSnapshot:
+        """Cached catalog, the database is queried only to compare the version every few seconds"""
+        if membership_type_catalog.is_fresh():
+            return membership_type_catalog.snapshot
+
+        async with self.uow:
+            # версия читается раньше данных: если данные изменятся между запросами, их перечитает следующая сверка
+            version = await self.uow.membership_repository.get_catalog_version()
+            snapshot = membership_type_catalog.snapshot
+            if snapshot is not None and snapshot.version == version:
+                membership_type_catalog.mark_checked()
+                return snapshot
+            membership_types, _ = await self.uow.membership_repository.list(count_strategy=CountStrategy.NONE)
+
+        snapshot = MembershipTypesSnapshot.build(version, membership_types)
+        membership_type_catalog.load(snapshot)
+        return snapshot
+
+    async def get_cached_membership_type(self, membership_type_id: int) -> MembershipTypeSchema | None:
+        entry = (await self.get_membership_types_snapshot()).entries.get(membership_type_id)
+        return entry.schema if entry is not None else None
 
     async def get_all_paginated_counted_user_memberships(
         self, limit: int = None, offset: int = None, order_by: str = None, filters: dict[str, Any] = None
@@ -47,7 +94,9 @@ class MembershipService:
 
     async def create_membership(self, **kwargs) -> UserMembership:
         async with self.uow:
-            return await self.uow.user_membership_repository.create(**kwargs)
+            user_membership = await self.uow.user_membership_repository.create(**kwargs)
+            await self.uow.user_membership_repository.notify_updated(user_membership)
+            return user_membership
 
     async def get_user_membership_by_kwargs(self, **kwargs) -> UserMembership:
         stmt = select(UserMembership).options(
@@ -58,24 +107,50 @@ class MembershipService:
 
     async def update_user_membership(self, user_membership_id: int, update_data: dict) -> UserMembership:
         async with self.uow:
-            return await self.uow.user_membership_repository.update(user_membership_id, update_data)
+            user_membership = await self.uow.user_membership_repository.update(user_membership_id, update_data)
+            await self.uow.user_membership_repository.notify_updated(user_membership)
+            return user_membership
+
+    async def expire_memberships(self, grace: timedelta, limit: int) -> int:
+        """Revokes access of memberships whose period ended more than ``grace`` ago, returns their number.
+
+        Renewals move ``current_period_end`` forward, the grace covers delayed webhooks and the reconciliation.
+        Open membership streams are notified with one statement.
+        """
+        async with self.uow:
+            expired = await self.uow.user_membership_repository.expire_access(datetime.now(timezone.utc) - grace, limit)
+            await self.uow.user_membership_repository.notify_updated_many(expired)
+        return len(expired)
 
     async def get_user_by_user_membership(self, user_membership_id: int) -> User:
         async with self.uow:
             user_membership = await self.uow.user_membership_repository.get_first_by_kwargs(id=user_membership_id)
             return await self.uow.user_repository.get_first_by_kwargs(id=user_membership.user_id)
 
+    @read_only
     async def get_joined_membership(
-        self, limit: int = None, offset: int = None, order_by: str = None, filters: dict[str, Any] = None
+        self,
+        limit: int = None,
+        offset: int = None,
+        order_by: str = None,
+        filters: dict[str, Any] = None,
+        cursor: str = None,
+        count_strategy: CountStrategy = CountStrategy.EXACT,
+        fields_tree: FieldsTree = None,
     ):
-        stmt = (
-            select(UserMembership)
-            .join(UserMembership.user)
-            .join(UserMembership.membership_type)
-            .options(selectinload(UserMembership.user), selectinload(UserMembership.membership_type))
-        )
+        """``fields_tree`` limits loaded columns of the memberships and of the related users and types"""
+        if fields_tree is None:
+            options = [selectinload(UserMembership.user), selectinload(UserMembership.membership_type)]
+        else:
+            # колонки сортировки нужны для next_cursor
+            ordering_columns = [field_name for field_name, _ in parse_ordering(order_by)]
+            options = get_load_options(UserMembership, fields_tree, extra_columns=ordering_columns)
+
+        stmt = select(UserMembership).join(UserMembership.user).join(UserMembership.membership_type).options(*options)
         async with self.uow:
-            result = await self.uow.user_membership_repository.list(limit, offset, order_by, filters, stmt)
+            result = await self.uow.user_membership_repository.list(
+                limit, offset, order_by, filters, stmt, cursor=cursor, count_strategy=count_strategy
+            )
             return result
 
     async def cancel_membership(self, user_id: int):
@@ -84,7 +159,7 @@ class MembershipService:
         if membership is None:
             raise ValueError("Active memberships with provided ID not found")
 
-        stripe.Subscription.modify(membership.stripe_subscription_id, cancel_at_period_end=True)
+        await self.gateway.update_subscription(membership.stripe_subscription_id, {"cancel_at_period_end": True})
 
     async def resume_membership(self, user_id):
         membership = await self.get_user_membership_by_kwargs(user_id=user_id, status=MembershipStatusEnum.ACTIVE)
@@ -92,9 +167,21 @@ class MembershipService:
         if membership is None:
             raise ValueError("Active memberships with provided ID not found")
 
-        stripe.Subscription.modify(membership.stripe_subscription_id, cancel_at_period_end=False)
+        await self.gateway.update_subscription(membership.stripe_subscription_id, {"cancel_at_period_end": False})
+
+    async def get_checkout_payment(self, user_membership: UserMembership, session_id: str) -> Payment | None:
+        """Payment of the checkout session saved by the webhooks.
 
-    async def create_subscription_initial_payment(self, invoice: Invoice, payment_type: PaymentType):
+        ``None`` while the webhooks of the session aren't processed yet, then the summary has to come from Stripe.
+        """
+        if user_membership.stripe_subscription_id is None or user_membership.status == MembershipStatusEnum.INCOMPLETE:
+            return None
+        async with self.uow:
+            return await self.uow.payment_repository.get_first_by_kwargs(checkout_session_id=session_id)
+
+    async def create_subscription_initial_payment(
+        self, invoice: Invoice, payment_type: PaymentType, checkout_session_id: str | None = None
+    ):
         """Creates payment in case of invoice.paid"""
         subscription_details = invoice.parent.subscription_details
         line = invoice.lines.data[0]
@@ -112,6 +199,7 @@ class MembershipService:
                 billing_reason=invoice.billing_reason,
                 # stripe ids
                 invoice_id=invoice.id,
+                checkout_session_id=checkout_session_id,
                 subscription_id=subscription_details.subscription,
                 stripe_customer_id=invoice.customer.id,
                 charge_id=invoice.get("charge"),
@@ -127,7 +215,7 @@ class MembershipService:
 
     async def handle_invoice_paid(self, data, parent) -> None:
         invoice_id = data["id"]
-        invoice = stripe.Invoice.retrieve(
+        invoice = await self.gateway.retrieve_invoice(
             invoice_id, expand=["subscription", "customer", "payment_intent.latest_charge"]
         )
         billing_reason = invoice.billing_reason
@@ -146,7 +234,7 @@ class MembershipService:
             subscription_id = invoice.get("subscription")
             payment_type = PaymentType.SUBSCRIPTION_RENEWAL
 
-        subscription = stripe.Subscription.retrieve(subscription_id)
+        subscription = await self.gateway.retrieve_subscription(subscription_id)
         items = subscription.get("items", {}).get("data", [])
 
         if not items:
@@ -170,7 +258,14 @@ class MembershipService:
         payment_exists = await self.uow.payment_repository.get_first_by_kwargs(invoice_id=invoice_id)
 
         if not payment_exists:
-            await self.create_subscription_initial_payment(invoice, payment_type)
+            checkout_session_id = None
+            if payment_type == PaymentType.SUBSCRIPTION_INITIAL:
+                # если checkout.session.completed пришел раньше invoice.paid
+                user_membership = await self.uow.user_membership_repository.get_first_by_kwargs(
+                    id=int(user_membership_id)
+                )
+                checkout_session_id = user_membership.stripe_checkout_session_id if user_membership else None
+            await self.create_subscription_initial_payment(invoice, payment_type, checkout_session_id)
 
         await self.update_user_membership(int(user_membership_id), update_data)
 
@@ -183,12 +278,45 @@ class MembershipService:
             metadata: {metadata}\n"""
         )
 
+    async def handle_checkout_session_completed(self, data) -> None:
+        if data.get("mode") != "subscription":
+            return  # пожертвования не связаны с членством
+
+        user_membership_id = (data.get("metadata") or {}).get("user_membership_id")
+        if user_membership_id is None:
+            raise ValueError("Checkout session without user_membership_id in metadata")
+
+        update_data = {"stripe_checkout_session_id": data["id"]}
+        if data.get("subscription"):
+            update_data["stripe_subscription_id"] = data["subscription"]
+        if data.get("customer"):
+            update_data["stripe_customer_id"] = data["customer"]
+
+        async with self.uow:
+            user_membership = await self.uow.user_membership_repository.update(int(user_membership_id), update_data)
+            await self.uow.user_membership_repository.notify_updated(user_membership)
+            # если invoice.paid пришел раньше, платеж уже создан без checkout session
+            payment = None
+            if data.get("invoice"):
+                payment = await self.uow.payment_repository.get_first_by_kwargs(invoice_id=data["invoice"])
+            if payment is not None and payment.checkout_session_id is None:
+                await self.uow.payment_repository.update(payment.id, {"checkout_session_id": data["id"]})
+
+        logger.info(
+            f"""Event type: checkout.session.completed
+            user memberships ID: {user_membership_id}
+            checkout session ID: {data["id"]}
+            stripe subscription id: {data.get("subscription")}
+            invoice ID: {data.get("invoice")}\n"""
+        )
+
     async def handle_customer_subscription_updated(self, data) -> None:
         user_membership = await self.get_user_membership_by_kwargs(stripe_subscription_id=data["id"])
         if not user_membership:
             raise ValueError("Membership with provided STRIPE_SUBSCRIPTION_ID not found")
 
-        update_data = {"status": MembershipStatusEnum(data["status"])}
+        status = MembershipStatusEnum(data["status"])
+        update_data = {"status": status, "has_access": status in ACCESS_STATUSES}
         current_period_end = data.get("current_period_end")
         cancel_at_period_end = data.get("cancel_at_period_end")
 
@@ -231,7 +359,9 @@ class MembershipService:
         stripe_sub_id = data["id"]
         user_membership = await self.get_user_membership_by_kwargs(stripe_subscription_id=stripe_sub_id)
         if user_membership:
-            await self.update_user_membership(user_membership.id, {"status": MembershipStatusEnum.CANCELED})
+            await self.update_user_membership(
+                user_membership.id, {"status": MembershipStatusEnum.CANCELED, "has_access": False}
+            )
         else:
             raise ValueError("Membership with provided STRIPE_SUBSCRIPTION_ID not found")
         logger.info(
@@ -250,6 +380,9 @@ class MembershipService:
         if event.type == "invoice.paid":
             await self.handle_invoice_paid(data, parent)
 
+        elif event.type == "checkout.session.completed":
+            await self.handle_checkout_session_completed(data)
+
         elif event.type == "customer.subscription.updated":
             await self.handle_customer_subscription_updated(data)
 
@@ -265,6 +398,23 @@ class MembershipService:
         return
 
 
+async def sweep_expired_memberships() -> None:
+    """Background task of every worker: revokes access of expired memberships in batches"""
+    grace = timedelta(seconds=settings.MEMBERSHIP_EXPIRY_GRACE_SECONDS)
+    batch_size = settings.MEMBERSHIP_EXPIRY_BATCH_SIZE
+    while True:
+        await asyncio.sleep(settings.MEMBERSHIP_EXPIRY_SWEEP_SECONDS)
+        service = MembershipService(MembershipUnitOfWork())
+        try:
+            # полная пачка - возможно, истекли не все
+            while (expired := await service.expire_memberships(grace, batch_size)) > 0:
+                logger.info(f"Access of {expired} expired memberships is revoked")
+                if expired < batch_size:
+                    break
+        except (OSError, SQLAlchemyError) as e:
+            logger.warning(f"Membership expiry sweep failed: {e!r}")
+
+
 def get_membership_service(
     uow: Annotated[MembershipUnitOfWork, Depends(get_membership_unit_of_work)],
 ) -> MembershipService:
@@ -1,7 +1,27 @@
+import time
 from datetime import datetime, timezone
 
 from app.domains.memberships.models import MembershipStatusEnum, MembershipType, UserMembership
 
+# Stripe требует expires_at не раньше чем через 30 минут после создания сессии
+CHECKOUT_SESSION_WINDOW_SECONDS = 30 * 60
+# запас сверх этих 30 минут на сеть, повторы SDK и расхождение часов со Stripe
+CHECKOUT_SESSION_EXPIRY_MARGIN_SECONDS = 30 * 60
+
+
+def get_checkout_session_idempotency(
+    user_membership_id: int, stripe_price_id: str, now: float | None = None
+) -> tuple[str, int]:
+    """Idempotency key and ``expires_at`` of a checkout session.
+
+    Both stay the same during a 30 minutes window, so repeated creation for the same membership and price
+    (a retry after a failed commit, a double-click on another node) returns the session created first.
+    ``expires_at`` is at least 30 minutes plus a margin of 30 minutes away from any moment of the window.
+    """
+    window = int(now if now is not None else time.time()) // CHECKOUT_SESSION_WINDOW_SECONDS
+    expires_at = (window + 2) * CHECKOUT_SESSION_WINDOW_SECONDS + CHECKOUT_SESSION_EXPIRY_MARGIN_SECONDS
+    return f"checkout-session-{user_membership_id}-{stripe_price_id}-{window}", expires_at
+
 
 def check_membership_type_already_purchased(
     existing_user_membership: UserMembership,
@@ -20,18 +40,10 @@ def check_membership_type_already_purchased(
         MembershipStatusEnum.PAST_DUE,
     }
 
+    # Доступ по истечении current_period_end снимает sweeper (см. sweep_expired_memberships).
     # Если дата окончания неизвестна — трактуем как не истёкшее (defensive),
-    # чтобы не допустить второй покупки. Это поможет пройти твои тесты,
-    # где current_period_end не задаётся.
-    current_period_end = existing_user_membership.current_period_end
-    if current_period_end is None:
-        not_expired = True
-    else:
-        # Приводим к aware-UTC, если вдруг хранится без tzinfo
-        if current_period_end.tzinfo is None:
-            current_period_end = current_period_end.replace(tzinfo=timezone.utc)
-        now = datetime.now(timezone.utc)
-        not_expired = current_period_end > now  # или >= now, если нужна включительная логика
+    # чтобы не допустить второй покупки.
+    not_expired = existing_user_membership.has_access or existing_user_membership.current_period_end is None
 
     return is_same and is_active and not_expired
 
@@ -1,4 +1,5 @@
 from app.domains.memberships.models import MembershipStatusEnum, MembershipType, UserMembership
+from app.domains.payments.models import Payment
 
 
 def get_checkout_session_summary_dictionary(user_membership: UserMembership, membership_type: MembershipType, session):
@@ -19,3 +20,26 @@ def get_checkout_session_summary_dictionary(user_membership: UserMembership, mem
             "invoice_id": session["invoice"]["id"],
         },
     }
+
+
+def get_local_checkout_session_summary_dictionary(
+    user_membership: UserMembership, membership_type: MembershipType, payment: Payment
+):
+    """Same summary built from the data saved by the webhooks"""
+    return {
+        "memberships": {
+            "id": user_membership.id,
+            "type": membership_type.type,
+            "status_db": user_membership.status,
+            "current_period_end": user_membership.current_period_end,
+        },
+        "subscription": {
+            "id": user_membership.stripe_subscription_id,
+            "status": user_membership.status,
+        },
+        "payment": {
+            "amount_total": payment.amount_total,
+            "currency": payment.currency,
+            "invoice_id": payment.invoice_id,
+        },
+    }
@@ -1,15 +1,22 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, File, Path, UploadFile
+from fastapi import APIRouter, Depends, File, Path, Query, Response, UploadFile
 from fastapi_exception_responses import Responses
 
-from app.core.common.request_params import OrderingParamsDep, PaginationParamsDep
-from app.core.common.responses import InvalidRequestParamsResponses, PaginatedResponse
+from app.core.common.request_params import OrderingParamsDep, WindowCountPaginationParamsDep, make_fields_params
+from app.core.common.responses import (
+    InvalidRequestParamsResponses,
+    PaginatedResponse,
+    build_json_response,
+    build_paginated_response,
+)
 from app.core.config import settings
-from app.core.database.base_repository import InvalidOrderAttributeError
+from app.core.database.base_repository import InvalidCursorError, InvalidOrderAttributeError
+from app.core.utils.fields import FieldSet
+from app.core.utils.pagination import get_next_cursor
 from app.core.utils.save_file import save_file
 from app.domains.news.filters import NewsFilter
-from app.domains.news.models import CreateNewsSchema, NewsSchema, UpdateNewsSchema
+from app.domains.news.models import CreateNewsSchema, NewsSchema, NewsSearchResultSchema, UpdateNewsSchema
 from app.domains.news.services import NewsServiceDep
 from app.domains.shared.deps import AdminUserDep
 
@@ -68,41 +75,100 @@ async def update_news(
     "/",
     summary="Paginated, ordered, filtered list of news",
     responses=InvalidRequestParamsResponses.responses,
+    response_model=PaginatedResponse[NewsSchema],
 )
 async def get_all_news(
     news_service: NewsServiceDep,
-    params: PaginationParamsDep,
+    params: WindowCountPaginationParamsDep,
+    fields: Annotated[FieldSet, Depends(make_fields_params(NewsSchema))],
     ordering: OrderingParamsDep = None,
     filters: Annotated[NewsFilter, Depends()] = None,
-) -> PaginatedResponse[NewsSchema]:
+) -> Response:
     try:
         news, news_count = await news_service.get_all_paginated_counted(
             order_by=ordering,
             filters=filters.model_dump(exclude_none=True),
             limit=params["limit"],
             offset=params["offset"],
+            cursor=params["cursor"],
+            count_strategy=params["count_strategy"],
+            columns=fields.columns,
         )
-        data = [NewsSchema.from_orm(single_news) for single_news in news]
-        return PaginatedResponse(
+        return build_paginated_response(
+            fields.schema,
+            news,
             count=news_count,
-            data=data,
             page=params["page"],
             page_size=params["page_size"],
+            cursor=params["cursor"],
+            next_cursor=get_next_cursor(news, ordering, params["limit"]),
+            count_strategy=params["count_strategy"],
         )
     except InvalidOrderAttributeError:
         raise InvalidRequestParamsResponses.INVALID_SORTER_FIELD
+    except InvalidCursorError:
+        raise InvalidRequestParamsResponses.INVALID_CURSOR
 
 
-@router.get("/{news_id}", summary="Returns single news by id", responses=NewsNotFoundResponses.responses)
+@router.get(
+    "/search",
+    summary="Full-text search over news, ranked by relevance",
+    responses=InvalidRequestParamsResponses.responses,
+    response_model=PaginatedResponse[NewsSearchResultSchema],
+)
+async def search_news(
+    q: Annotated[
+        str,
+        Query(min_length=1, max_length=256, description='Search query: words, "quoted phrase", OR, -excluded word'),
+    ],
+    news_service: NewsServiceDep,
+    params: WindowCountPaginationParamsDep,
+    fields: Annotated[FieldSet, Depends(make_fields_params(NewsSearchResultSchema))],
+    filters: Annotated[NewsFilter, Depends()] = None,
+) -> Response:
+    # результаты упорядочены по рангу, курсор по колонкам модели к ним неприменим
+    if params["cursor"] is not None:
+        raise InvalidRequestParamsResponses.INVALID_CURSOR
+
+    news, news_count = await news_service.search_news(
+        q,
+        limit=params["limit"],
+        offset=params["offset"],
+        filters=filters.model_dump(exclude_none=True),
+        count_strategy=params["count_strategy"],
+        # rank и headline вычисляются при поиске всегда, лишние ключи отбрасывает схема ответа
+        columns=[column for column in fields.columns if column in NewsSchema.model_fields],
+    )
+    return build_paginated_response(
+        fields.schema,
+        news,
+        count=news_count,
+        page=params["page"],
+        page_size=params["page_size"],
+        count_strategy=params["count_strategy"],
+    )
+
+
+class NewsDetailResponses(NewsNotFoundResponses):
+    INVALID_FIELDS = 400, "Invalid fields"
+
+
+@router.get(
+    "/{news_id}",
+    summary="Returns single news by id",
+    responses=NewsDetailResponses.responses,
+    response_model=NewsSchema,
+)
 async def get_news_detail(
     news_id: Annotated[int, Path(...)],
     news_service: NewsServiceDep,
-) -> NewsSchema:
+    fields: Annotated[FieldSet, Depends(make_fields_params(NewsSchema))],
+) -> Response:
     try:
-        news = await news_service.get_news_by_id(news_id)
+        news = await news_service.get_news_by_id(news_id, columns=fields.columns)
         if news.is_deleted:
             raise NewsNotFoundResponses.NEWS_NOT_FOUND
-        return NewsSchema.from_orm(news)
+        return build_json_response(fields.schema.model_validate(news))
     except ValueError:
         raise NewsNotFoundResponses.NEWS_NOT_FOUND
 
@@ -1,17 +1,77 @@
-from typing import Annotated
+from typing import Annotated, Any, Sequence
 
 from fastapi import Depends
+from sqlalchemy import cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import JSONB, REGCONFIG
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database.base_repository import SQLAlchemyRepository
+from app.core.database.base_repository import TOTAL_COUNT_LABEL, SQLAlchemyRepository
 from app.core.database.setup_db import session_getter
 from app.core.database.unit_of_work import SQLAlchemyUnitOfWork
-from app.domains.news.models import News
+from app.core.utils.pagination import CountStrategy
+from app.domains.news.models import SEARCH_CONFIG, News
+
+HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=30, MinWords=10, FragmentDelimiter=' ... '"
+
+
+def _get_body_text():
+    """Space separated string values of the news body, the same text that is indexed in ``search_vector``"""
+    # все значения документа на любой глубине, #>> '{}' - строковое значение без кавычек json
+    value = func.jsonb_path_query(cast(News.body, JSONB), literal_column("'strict $.**'::jsonpath")).column_valued()
+    return (
+        select(func.string_agg(value.op("#>>")(literal_column("'{}'")), " "))
+        .where(func.jsonb_typeof(value) == "string")
+        .scalar_subquery()
+    )
 
 
 class NewsRepository(SQLAlchemyRepository):
     model = News
 
+    async def search(
+        self,
+        query: str,
+        limit: int,
+        offset: int,
+        filters: dict[str, Any] = None,
+        count_strategy: CountStrategy = CountStrategy.WINDOW,
+        columns: Sequence[str] = None,
+    ) -> [Sequence[dict[str, Any]], int | None]:
+        """Full-text search, returns a page of news ordered by rank with ``rank`` and ``headline``, and the count.
+
+        ``query`` uses the web search syntax ("quoted phrase", OR, -excluded).
+        The page is selected by the GIN index first, headlines are built only for the rows of the page.
+        """
+        ts_query = func.websearch_to_tsquery(cast(SEARCH_CONFIG, REGCONFIG), query)
+        rank = func.ts_rank(News.search_vector, ts_query).label("rank")
+        conditions = [*self._get_conditions(filters), News.search_vector.bool_op("@@")(ts_query)]
+
+        page = select(News.id, rank).filter(*conditions)
+        if count_strategy is CountStrategy.WINDOW:
+            page = page.add_columns(func.count().over().label(TOTAL_COUNT_LABEL))
+        page = page.order_by(rank.desc(), News.id.desc()).limit(limit).offset(offset).subquery()
+
+        selected = [self._get_column(column_name) for column_name in columns or ["id"]]
+        if count_strategy is CountStrategy.WINDOW:
+            selected.append(page.c[TOTAL_COUNT_LABEL])
+        headline = func.ts_headline(cast(SEARCH_CONFIG, REGCONFIG), _get_body_text(), ts_query, HEADLINE_OPTIONS)
+        stmt = (
+            select(*selected, page.c.rank, headline.label("headline"))
+            .join(page, page.c.id == News.id)
+            .order_by(page.c.rank.desc(), News.id.desc())
+        )
+
+        data = [dict(row) for row in (await self.session.execute(stmt)).mappings()]
+
+        if count_strategy is CountStrategy.WINDOW:
+            counts = [row.pop(TOTAL_COUNT_LABEL) for row in data]
+            # страница за пределами выборки - окно пустое, итог неизвестен
+            if counts or not offset:
+                return data, counts[0] if counts else 0
+            count_strategy = CountStrategy.EXACT
+
+        return data, await self._count(conditions, count_strategy)
+
 
 class NewsUnitOfWork(SQLAlchemyUnitOfWork):
     def __init__(self, session=None):
@@ -2,16 +2,20 @@ from datetime import datetime
 from typing import TYPE_CHECKING
 
 from pydantic import BaseModel
-from sqlalchemy import ForeignKey, text
-from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy import Computed, ForeignKey, text
+from sqlalchemy.dialects.postgresql import JSON, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.database.indexes import fulltext_search_index
 from app.core.database.mixins import UCIMixin
 from app.core.database.setup_db import Base
 
 if TYPE_CHECKING:
     from app.domains.users.models import User
 
+# конфигурация текстового поиска, одна и та же для search_vector и запросов к нему
+SEARCH_CONFIG = "english"
+
 
 class News(Base, UCIMixin):
     __tablename__ = "news"
@@ -25,6 +29,16 @@ class News(Base, UCIMixin):
 
     is_deleted: Mapped[bool] = mapped_column(default=False, server_default=text("false"))
 
+    # слова всех строковых значений body, поддерживается самим postgres при insert/update
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR(),
+        Computed(f"json_to_tsvector('{SEARCH_CONFIG}', body, '[\"string\"]')", persisted=True),
+        deferred=True,
+    )
+
+
+fulltext_search_index(News.search_vector)
+
 
 class CreateNewsSchema(BaseModel):
     body: dict
@@ -44,3 +58,9 @@ class NewsSchema(UpdateNewsSchema):
     updated_at: datetime
 
     model_config = {"from_attributes": True, "protected_namespaces": ()}
+
+
+class NewsSearchResultSchema(NewsSchema):
+    rank: float
+    # фрагмент текста с найденными словами в <b></b>
+    headline: str
@@ -1,7 +1,11 @@
-from typing import Annotated, Any
+from typing import Annotated, Any, Sequence
 
 from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
 
+from app.core.database.replicas import read_only
+from app.core.utils.pagination import CountStrategy
 from app.domains.news.infrastructure import NewsUnitOfWork, get_news_unit_of_work
 from app.domains.news.models import News
 
@@ -10,11 +14,36 @@ class NewsService:
     def __init__(self, uow):
         self.uow: NewsUnitOfWork = uow
 
+    @read_only
     async def get_all_paginated_counted(
-        self, limit: int = None, offset: int = None, order_by: str = None, filters: dict[str, Any] = None
+        self,
+        limit: int = None,
+        offset: int = None,
+        order_by: str = None,
+        filters: dict[str, Any] = None,
+        cursor: str = None,
+        count_strategy: CountStrategy = CountStrategy.EXACT,
+        columns: Sequence[str] = None,
     ):
         async with self.uow:
-            return await self.uow.news_repository.list(limit, offset, order_by, filters)
+            return await self.uow.news_repository.list(
+                limit, offset, order_by, filters, cursor=cursor, count_strategy=count_strategy, columns=columns
+            )
+
+    @read_only
+    async def search_news(
+        self,
+        query: str,
+        limit: int,
+        offset: int,
+        filters: dict[str, Any] = None,
+        count_strategy: CountStrategy = CountStrategy.WINDOW,
+        columns: Sequence[str] = None,
+    ):
+        async with self.uow:
+            return await self.uow.news_repository.search(
+                query, limit, offset, filters, count_strategy=count_strategy, columns=columns
+            )
 
     async def create_news(self, **kwargs) -> News:
         async with self.uow:
@@ -27,9 +56,14 @@ class NewsService:
                 raise ValueError("There is no such user with provided id")
             await self.uow.news_repository.update(news_id, update_data)
 
-    async def get_news_by_id(self, news_id: int) -> News:
+    @read_only
+    async def get_news_by_id(self, news_id: int, columns: Sequence[str] = None) -> News:
+        """Returns news with only ``columns`` (and ``is_deleted``) loaded if they are passed"""
+        stmt = None
+        if columns:
+            stmt = select(News).options(load_only(*[getattr(News, column) for column in columns], News.is_deleted))
         async with self.uow:
-            news = await self.uow.news_repository.get_first_by_kwargs(id=news_id)
+            news = await self.uow.news_repository.get_first_by_kwargs(stmt, id=news_id)
             if news is None:
                 raise ValueError("There is no such user with provided id")
             return news
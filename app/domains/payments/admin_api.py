@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+
+from app.domains.payments.inbox import stripe_event_inbox
+from app.domains.payments.schemas import StripeEventHandlerStatsSchema, StripeEventsStatsSchema
+from app.domains.payments.services import PaymentServiceDep
+from app.domains.shared.deps import AdminUserDep
+
+router = APIRouter(prefix="/payments", tags=["Admin Payments"])
+
+
+@router.get(
+    "/stripe-events/stats",
+    summary="Retrieve Stripe events inbox state and handler metrics",
+)
+async def get_stripe_events_stats(
+    service: PaymentServiceDep,
+    admin: AdminUserDep,  # noqa
+) -> StripeEventsStatsSchema:
+    handlers = {
+        event_type: StripeEventHandlerStatsSchema(
+            processed=stats.processed,
+            failed=stats.failed,
+            dead=stats.dead,
+            avg_run_time_ms=stats.avg_run_time * 1000,
+            max_run_time_ms=stats.max_run_time * 1000,
+        )
+        for event_type, stats in stripe_event_inbox.stats.items()
+    }
+    return StripeEventsStatsSchema(statuses=await service.get_stripe_event_counts(), handlers=handlers)
@@ -1,5 +1,6 @@
 from typing import Annotated
 
+import orjson
 import stripe
 from fastapi import APIRouter, Header, Path
 from fastapi_exception_responses import Responses
@@ -10,8 +11,14 @@ from starlette.requests import Request
 
 from app.core.config import settings
 from app.domains.memberships.services import MembershipServiceDep
-from app.domains.memberships.utils.common import get_checkout_session_summary_dictionary
+from app.domains.memberships.utils.common import (
+    get_checkout_session_summary_dictionary,
+    get_local_checkout_session_summary_dictionary,
+)
+from app.domains.payments.gateway import StripeGatewayDep
+from app.domains.payments.inbox import stripe_event_inbox
 from app.domains.payments.schemas import DonationRequestSchema
+from app.domains.payments.services import PaymentServiceDep
 from app.domains.shared.deps import CurrentUserDep
 
 stripe.api_key = settings.STRIPE_API_KEY
@@ -29,7 +36,7 @@ class FulfillCheckoutResponses(Responses):
 )
 async def fulfill_checkout(
     request: Request,
-    service: MembershipServiceDep,
+    payment_service: PaymentServiceDep,
     stripe_signature: str = Header(alias="Stripe-Signature"),
 ) -> None:
     payload = await request.body()
@@ -48,7 +55,9 @@ async def fulfill_checkout(
         logger.exception(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    await service.process_stripe_webhook_event(event)
+    # событие обрабатывается воркерами (см. StripeEventInbox), Stripe получает ответ сразу после записи
+    if await payment_service.store_stripe_event(event.id, event.type, orjson.loads(payload)):
+        stripe_event_inbox.wake_up()
 
     return None
 
@@ -59,22 +68,24 @@ class GetCheckoutSessionResponses(Responses):
 
 
 @router.post("/donations/checkout-sessions", summary="Creates a checkout session")
-async def create_donation_checkout_session(data: DonationRequestSchema):
+async def create_donation_checkout_session(data: DonationRequestSchema, gateway: StripeGatewayDep):
     try:
-        session = stripe.checkout.Session.create(
-            mode="payment",
-            line_items=[
-                {
-                    "price_data": {
-                        "currency": "usd",
-                        "product_data": {"name": "Donation"},
-                        "unit_amount": data.amount,
-                    },
-                    "quantity": 1,
-                }
-            ],
-            success_url="http://localhost:3000/payment/donations?success=true&session_id={CHECKOUT_SESSION_ID}",
-            cancel_url="http://localhost:3000/payment/donations?canceled=true",
+        session = await gateway.create_checkout_session(
+            {
+                "mode": "payment",
+                "line_items": [
+                    {
+                        "price_data": {
+                            "currency": "usd",
+                            "product_data": {"name": "Donation"},
+                            "unit_amount": data.amount,
+                        },
+                        "quantity": 1,
+                    }
+                ],
+                "success_url": "http://localhost:3000/payment/donations?success=true&session_id={CHECKOUT_SESSION_ID}",
+                "cancel_url": "http://localhost:3000/payment/donations?canceled=true",
+            }
         )
         return {"url": session.url}
     except Exception as e:
@@ -89,9 +100,23 @@ async def create_donation_checkout_session(data: DonationRequestSchema):
 async def get_session_summary_by_id(
     session_id: Annotated[str, Path(...)],
     service: MembershipServiceDep,
+    gateway: StripeGatewayDep,
     current_user: CurrentUserDep,
 ) -> dict:
-    session = stripe.checkout.Session.retrieve(session_id, expand=["subscription", "invoice", "line_items", "customer"])
+    # сводка из данных вебхуков; из Stripe - пока вебхуки сессии не обработаны или для сессий без записи в БД
+    user_membership = await service.get_user_membership_by_kwargs(stripe_checkout_session_id=session_id)
+    if user_membership is not None:
+        if user_membership.user_id != current_user.id:
+            raise GetCheckoutSessionResponses.FORBIDDEN
+        payment = await service.get_checkout_payment(user_membership, session_id)
+        if payment is not None:
+            return get_local_checkout_session_summary_dictionary(
+                user_membership, user_membership.membership_type, payment
+            )
+
+    session = await gateway.retrieve_checkout_session(
+        session_id, expand=["subscription", "invoice", "line_items", "customer"]
+    )
 
     if session["mode"] != "subscription":
         raise GetCheckoutSessionResponses.NOT_A_SUBSCRIPTION_SESSION
@@ -102,7 +127,7 @@ async def get_session_summary_by_id(
 
     if user_membership.user_id != current_user.id:
         raise GetCheckoutSessionResponses.FORBIDDEN
-    membership_type = await service.get_membership_type_by_kwargs(id=user_membership.membership_type_id)
+    membership_type = await service.get_cached_membership_type(user_membership.membership_type_id)
 
     return get_checkout_session_summary_dictionary(
         user_membership,
@@ -0,0 +1,145 @@
+import asyncio
+from functools import partial
+from types import SimpleNamespace
+from typing import Annotated, Any, Awaitable, Callable, Sequence, TypeVar
+
+import httpx
+import stripe
+from fastapi import Depends
+
+from app.core.config import settings
+
+R = TypeVar("R")
+
+
+class PooledHTTPXClient(stripe.HTTPXClient):
+    """HTTP client of the Stripe SDK over one ``httpx.AsyncClient`` with a bounded keep-alive pool"""
+
+    def __init__(
+        self,
+        timeout: httpx.Timeout,
+        max_connections: int,
+        transport: httpx.AsyncBaseTransport | None = None,
+        **kwargs,
+    ):
+        # SDK не дает задать лимиты пула. Клиенты он создает через модуль из приватного параметра _lib,
+        # вместо httpx передается обертка: SDK сам вычисляет verify (verify_ssl_certs), лишний клиент не создается
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        pooled_httpx = SimpleNamespace(
+            AsyncClient=partial(httpx.AsyncClient, limits=limits, transport=transport),
+            Client=httpx.Client,
+        )
+        super().__init__(timeout=timeout, _lib=pooled_httpx, **kwargs)
+
+
+class StripeGateway:
+    """Async access to the Stripe API for the services and routes.
+
+    Calls share one pooled HTTP client, ``max_concurrent`` caps in-flight calls of the process, the others wait.
+    Network errors, 409 and 5xx responses are retried by the SDK with exponential backoff and jitter
+    (POST retries reuse the idempotency key). ``call_timeout`` limits a whole call including the wait
+    for a slot and the retries, exceeding it raises ``stripe.APIConnectionError`` like other network failures.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        api_base: str = "",
+        max_connections: int = 20,
+        max_concurrent: int = 20,
+        connect_timeout: float = 3,
+        request_timeout: float = 10,
+        call_timeout: float = 30,
+        max_retries: int = 2,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.api_key = api_key
+        self.api_base = api_base
+        self.max_connections = max_connections
+        self.timeout = httpx.Timeout(request_timeout, connect=connect_timeout)
+        self.call_timeout = call_timeout
+        self.max_retries = max_retries
+        self.transport = transport
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._client: stripe.StripeClient | None = None
+        self._http_client: PooledHTTPXClient | None = None
+
+    @property
+    def client(self) -> stripe.StripeClient:
+        # создается при первом вызове, внутри event loop приложения
+        if self._client is None:
+            self._http_client = PooledHTTPXClient(self.timeout, self.max_connections, self.transport)
+            self._client = stripe.StripeClient(
+                self.api_key,
+                base_addresses={"api": self.api_base} if self.api_base else {},
+                max_network_retries=self.max_retries,
+                http_client=self._http_client,
+            )
+        return self._client
+
+    async def _call(self, request: Callable[[], Awaitable[R]], timeout: float | None = None) -> R:
+        async def call() -> R:
+            async with self._semaphore:
+                return await request()
+
+        timeout = timeout or self.call_timeout
+        try:
+            return await asyncio.wait_for(call(), timeout)
+        except asyncio.TimeoutError:
+            raise stripe.APIConnectionError(f"Stripe call timed out after {timeout}s", should_retry=True)
+
+    async def create_checkout_session(
+        self, params: dict[str, Any], idempotency_key: str | None = None, timeout: float | None = None
+    ) -> stripe.checkout.Session:
+        options = {"idempotency_key": idempotency_key} if idempotency_key else {}
+        return await self._call(lambda: self.client.v1.checkout.sessions.create_async(params, options), timeout)
+
+    async def retrieve_checkout_session(
+        self, session_id: str, expand: Sequence[str] = (), timeout: float | None = None
+    ) -> stripe.checkout.Session:
+        params = {"expand": list(expand)}
+        return await self._call(lambda: self.client.v1.checkout.sessions.retrieve_async(session_id, params), timeout)
+
+    async def retrieve_invoice(
+        self, invoice_id: str, expand: Sequence[str] = (), timeout: float | None = None
+    ) -> stripe.Invoice:
+        params = {"expand": list(expand)}
+        return await self._call(lambda: self.client.v1.invoices.retrieve_async(invoice_id, params), timeout)
+
+    async def retrieve_subscription(self, subscription_id: str, timeout: float | None = None) -> stripe.Subscription:
+        return await self._call(lambda: self.client.v1.subscriptions.retrieve_async(subscription_id), timeout)
+
+    async def list_subscriptions(
+        self, params: dict[str, Any], timeout: float | None = None
+    ) -> stripe.ListObject[stripe.Subscription]:
+        """One page of subscriptions, the next one is requested with ``starting_after`` = id of the last item"""
+        return await self._call(lambda: self.client.v1.subscriptions.list_async(params), timeout)
+
+    async def update_subscription(
+        self, subscription_id: str, params: dict[str, Any], timeout: float | None = None
+    ) -> stripe.Subscription:
+        return await self._call(lambda: self.client.v1.subscriptions.update_async(subscription_id, params), timeout)
+
+    async def close(self) -> None:
+        if self._http_client is not None:
+            await self._http_client.close_async()
+        self._client = self._http_client = None
+
+
+stripe_gateway = StripeGateway(
+    api_key=settings.STRIPE_API_KEY,
+    api_base=settings.STRIPE_API_BASE,
+    max_connections=settings.STRIPE_MAX_CONNECTIONS,
+    max_concurrent=settings.STRIPE_MAX_CONCURRENT_REQUESTS,
+    connect_timeout=settings.STRIPE_CONNECT_TIMEOUT_SECONDS,
+    request_timeout=settings.STRIPE_REQUEST_TIMEOUT_SECONDS,
+    call_timeout=settings.STRIPE_CALL_TIMEOUT_SECONDS,
+    max_retries=settings.STRIPE_MAX_NETWORK_RETRIES,
+)
+
+
+def get_stripe_gateway() -> StripeGateway:
+    return stripe_gateway
+
+
+StripeGatewayDep = Annotated[StripeGateway, Depends(get_stripe_gateway)]
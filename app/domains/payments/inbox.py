@@ -0,0 +1,154 @@
+import asyncio
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+import stripe
+from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.domains.memberships.infrastructure import MembershipUnitOfWork
+from app.domains.memberships.services import MembershipService
+from app.domains.payments.infrastructure import PaymentUnitOfWork
+from app.domains.payments.models import StripeEvent, StripeEventStatus
+
+StripeEventHandler = Callable[[AsyncSession, stripe.Event], Awaitable[None]]
+
+
+@dataclass
+class HandlerStats:
+    """Counters of one event type since the process start"""
+
+    processed: int = 0
+    failed: int = 0  # неудачные попытки, включая ушедшие в DEAD
+    dead: int = 0
+    run_time: float = 0.0
+    max_run_time: float = 0.0
+
+    @property
+    def avg_run_time(self) -> float:
+        attempts = self.processed + self.failed
+        return self.run_time / attempts if attempts else 0.0
+
+
+async def handle_stripe_event(session: AsyncSession, event: stripe.Event) -> None:
+    await MembershipService(MembershipUnitOfWork(session)).process_stripe_webhook_event(event)
+
+
+class StripeEventInbox:
+    """Pool of workers processing stored Stripe events.
+
+    A worker locks one due event with ``FOR UPDATE SKIP LOCKED`` and runs the handler in the same transaction:
+    the handler's changes and the new status of the event are committed together, workers of all processes
+    never take the same event, and the event of a crashed worker is unlocked and taken again.
+    A failed event is retried with exponential backoff, after ``max_attempts`` it's marked DEAD.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        poll_interval: float,
+        max_attempts: int,
+        retry_base: float,
+        retry_max: float,
+        handler: StripeEventHandler = handle_stripe_event,
+    ):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.handler = handler
+        self.stats: dict[str, HandlerStats] = defaultdict(HandlerStats)
+        self._wake_up = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def wake_up(self) -> None:
+        """Called after an event is stored, so it's processed without waiting for the poll"""
+        self._wake_up.set()
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                processed = await self.process_next()
+            except (OSError, SQLAlchemyError) as e:
+                logger.warning(f"Stripe events inbox failed: {e!r}")
+                processed = False
+
+            if not processed:
+                # события других процессов и повторы после backoff находятся опросом
+                try:
+                    await asyncio.wait_for(self._wake_up.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake_up.clear()
+
+    async def process_next(self, session: AsyncSession | None = None) -> bool:
+        """Processes one due event, returns ``False`` if there are none"""
+        uow = PaymentUnitOfWork(session)
+        async with uow:
+            event = await uow.stripe_event_repository.claim_next()
+            if event is None:
+                return False
+
+            stats = self.stats[event.type]
+            event.attempts += 1
+            started_at = time.perf_counter()
+            try:
+                # savepoint: при ошибке откатываются только изменения обработчика
+                async with uow:
+                    await self.handler(uow._session, stripe.Event.construct_from(event.payload, stripe.api_key))  # noqa
+            except Exception as e:
+                self._mark_failed(event, e, stats)
+            else:
+                event.status = StripeEventStatus.PROCESSED
+                event.processed_at = datetime.now(tz=timezone.utc)
+                event.last_error = None
+                stats.processed += 1
+            finally:
+                run_time = time.perf_counter() - started_at
+                stats.run_time += run_time
+                stats.max_run_time = max(stats.max_run_time, run_time)
+        return True
+
+    def get_retry_delay(self, attempts: int) -> float:
+        # jitter, чтобы повторы упавших вместе событий не приходили пачкой
+        return min(self.retry_base * 2 ** (attempts - 1), self.retry_max) * random.uniform(0.5, 1)
+
+    def _mark_failed(self, event: StripeEvent, error: Exception, stats: HandlerStats) -> None:
+        stats.failed += 1
+        event.last_error = repr(error)[:1024]
+        if event.attempts >= self.max_attempts:
+            stats.dead += 1
+            event.status = StripeEventStatus.DEAD
+            logger.error(f"Stripe event {event.id} ({event.type}) is dead after {event.attempts} attempts: {error!r}")
+            return
+
+        delay = self.get_retry_delay(event.attempts)
+        event.next_attempt_at = datetime.now(tz=timezone.utc) + timedelta(seconds=delay)
+        logger.opt(exception=error).warning(
+            f"Stripe event {event.id} ({event.type}) failed, attempt {event.attempts}, retry in {delay:.0f}s"
+        )
+
+
+stripe_event_inbox = StripeEventInbox(
+    workers=settings.STRIPE_EVENT_WORKERS,
+    poll_interval=settings.STRIPE_EVENT_POLL_SECONDS,
+    max_attempts=settings.STRIPE_EVENT_MAX_ATTEMPTS,
+    retry_base=settings.STRIPE_EVENT_RETRY_BASE_SECONDS,
+    retry_max=settings.STRIPE_EVENT_RETRY_MAX_SECONDS,
+)
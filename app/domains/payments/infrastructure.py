@@ -1,22 +1,50 @@
-from typing import Annotated
+from typing import Annotated, Any
 
 from fastapi import Depends
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database.base_repository import SQLAlchemyRepository
 from app.core.database.setup_db import session_getter
 from app.core.database.unit_of_work import SQLAlchemyUnitOfWork
-from app.domains.payments.models import Payment
+from app.domains.payments.models import Payment, StripeEvent, StripeEventStatus
 
 
 class PaymentRepository(SQLAlchemyRepository[Payment]):
     model = Payment
 
 
+class StripeEventRepository(SQLAlchemyRepository[StripeEvent]):
+    model = StripeEvent
+
+    async def add_if_new(self, event_id: str, event_type: str, payload: dict[str, Any]) -> bool:
+        """Stores the event, returns ``False`` if it's a redelivery of a stored one"""
+        rows = await self.upsert(
+            [{"id": event_id, "type": event_type, "payload": payload}], index_elements=("id",), update_fields=()
+        )
+        return bool(rows)
+
+    async def claim_next(self) -> StripeEvent | None:
+        """Locks the oldest due event, events locked by other workers are skipped"""
+        stmt = (
+            select(StripeEvent)
+            .where(StripeEvent.status == StripeEventStatus.PENDING, StripeEvent.next_attempt_at <= func.now())
+            .order_by(StripeEvent.next_attempt_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        return await self.session.scalar(stmt)
+
+    async def count_by_status(self) -> dict[StripeEventStatus, int]:
+        stmt = select(StripeEvent.status, func.count()).group_by(StripeEvent.status)
+        return dict((await self.session.execute(stmt)).tuples().all())
+
+
 class PaymentUnitOfWork(SQLAlchemyUnitOfWork):
     def __init__(self, session=None):
         super().__init__(session)
         self.payment_repository = PaymentRepository(self._session)
+        self.stripe_event_repository = StripeEventRepository(self._session)
 
 
 def get_payment_unit_of_work(session: Annotated[AsyncSession, Depends(session_getter)]) -> PaymentUnitOfWork:
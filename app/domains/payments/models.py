@@ -2,7 +2,8 @@ from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING
 
-from sqlalchemy import JSON, DateTime, Enum as SQLAEnum, ForeignKey, String, func
+from sqlalchemy import JSON, DateTime, Enum as SQLAEnum, ForeignKey, Index, String, func, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database.setup_db import Base
@@ -85,3 +86,40 @@ class Payment(Base):
 
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=True)
     user: Mapped["User"] = relationship("User", back_populates="payments")
+
+
+class StripeEventStatus(str, Enum):
+    PENDING = "PENDING"
+    PROCESSED = "PROCESSED"
+    DEAD = "DEAD"  # попытки исчерпаны, нужен ручной разбор
+
+
+class StripeEvent(Base):
+    """Verified Stripe webhook event, stored before processing (see ``app.domains.payments.inbox``)"""
+
+    __tablename__ = "stripe_events"
+    __table_args__ = (
+        # воркеры выбирают только ожидающие события, обработанные в индекс не попадают
+        Index("ix_stripe_events_pending", "next_attempt_at", postgresql_where=text("status = 'PENDING'")),
+    )
+
+    id: Mapped[str] = mapped_column(String(255), primary_key=True)  # id события в Stripe
+    type: Mapped[str] = mapped_column(String(128), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+
+    status: Mapped[StripeEventStatus] = mapped_column(
+        SQLAEnum(StripeEventStatus, name="stripe_event_status_enum"),
+        default=StripeEventStatus.PENDING,
+        server_default=StripeEventStatus.PENDING.value,
+        nullable=False,
+    )
+    attempts: Mapped[int] = mapped_column(default=0, server_default=text("0"), nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=func.now(), server_default=func.now(), nullable=False
+    )
+    last_error: Mapped[str] = mapped_column(String(1024), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=func.now(), server_default=func.now(), nullable=False
+    )
+    processed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -1,5 +1,22 @@
 from pydantic import BaseModel, Field
 
+from app.domains.payments.models import StripeEventStatus
+
 
 class DonationRequestSchema(BaseModel):
     amount: int = Field(description="Cents")
+
+
+class StripeEventHandlerStatsSchema(BaseModel):
+    processed: int
+    failed: int
+    dead: int
+    avg_run_time_ms: float
+    max_run_time_ms: float
+
+
+class StripeEventsStatsSchema(BaseModel):
+    statuses: dict[StripeEventStatus, int] = Field(description="Events in the inbox by status")
+    handlers: dict[str, StripeEventHandlerStatsSchema] = Field(
+        description="Handler metrics by event type, counted by the worker process since its start"
+    )
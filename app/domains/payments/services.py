@@ -1,14 +1,26 @@
-from typing import Annotated
+from typing import Annotated, Any
 
 from fastapi import Depends
 
+from app.core.database.replicas import read_only
 from app.domains.payments.infrastructure import PaymentUnitOfWork, get_payment_unit_of_work
+from app.domains.payments.models import StripeEventStatus
 
 
 class PaymentService:
     def __init__(self, uow):
         self.uow: PaymentUnitOfWork = uow
 
+    async def store_stripe_event(self, event_id: str, event_type: str, payload: dict[str, Any]) -> bool:
+        """Puts a verified event into the inbox, returns ``False`` if Stripe delivered it again"""
+        async with self.uow:
+            return await self.uow.stripe_event_repository.add_if_new(event_id, event_type, payload)
+
+    @read_only
+    async def get_stripe_event_counts(self) -> dict[StripeEventStatus, int]:
+        async with self.uow:
+            return await self.uow.stripe_event_repository.count_by_status()
+
 
 def get_payment_service(
     uow: Annotated[PaymentUnitOfWork, Depends(get_payment_unit_of_work)],
@@ -0,0 +1,58 @@
+from typing import Iterable
+
+from app.domains.permissions.models import Permission
+
+
+class PermissionCatalog:
+    """Permission ids by action, loaded once per process.
+
+    Permissions of a user are stored as an integer bitset where bit ``permission.id`` is set
+    for every granted permission. Ids don't change, so a bitset stays valid across restarts and workers
+    (new permissions are added by migrations, the catalog is reloaded on startup).
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._ids: dict[str, int] = {}
+
+    def load(self, permissions: Iterable[Permission]) -> None:
+        self._ids = {permission.action: permission.id for permission in permissions}
+        self.loaded = True
+
+    def get_id(self, action: str) -> int | None:
+        return self._ids.get(action)
+
+    def get_actions(self, mask: int) -> list[str]:
+        return sorted(action for action, permission_id in self._ids.items() if mask >> permission_id & 1)
+
+
+permission_catalog = PermissionCatalog()
+
+
+class PermissionSet:
+    """Bitset of the user's permissions, ``action in permissions`` is a dict lookup and a bit test"""
+
+    __slots__ = ("mask", "catalog")
+
+    def __init__(self, mask: int = 0, catalog: PermissionCatalog = permission_catalog):
+        self.mask = mask
+        self.catalog = catalog
+
+    @classmethod
+    def from_ids(
+        cls, permission_ids: Iterable[int], catalog: PermissionCatalog = permission_catalog
+    ) -> "PermissionSet":
+        mask = 0
+        for permission_id in permission_ids:
+            mask |= 1 << permission_id
+        return cls(mask, catalog)
+
+    def __contains__(self, action: str) -> bool:
+        permission_id = self.catalog.get_id(action)
+        return permission_id is not None and bool(self.mask >> permission_id & 1)
+
+    def __iter__(self):
+        return iter(self.catalog.get_actions(self.mask))
+
+    def __repr__(self) -> str:
+        return f"PermissionSet({list(self)})"
@@ -2,7 +2,7 @@ from fastapi import APIRouter
 
 from app.domains.permissions.models import PermissionSchema
 from app.domains.permissions.services import PermissionServiceDep
-from app.domains.shared.deps import UserPermissionsDep
+from app.domains.shared.deps import CurrentUserDep
 
 router = APIRouter(prefix="/permissions", tags=["Permissions"])
 
@@ -14,5 +14,10 @@ async def get_all_permissions(permission_service: PermissionServiceDep) -> list[
 
 
 @router.get("/current-user-permissions/")
-async def get_current_user_permissions(permissions: UserPermissionsDep) -> list[PermissionSchema]:
+async def get_current_user_permissions(
+    current_user: CurrentUserDep,
+    permission_service: PermissionServiceDep,
+) -> list[PermissionSchema]:
+    # токен содержит только actions, полные записи прав берутся из БД
+    permissions = await permission_service.get_user_permissions(current_user.id)
     return [PermissionSchema.from_orm(permission) for permission in permissions]
@@ -5,9 +5,12 @@ from fastapi_exception_responses import Responses
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
+from app.core.utils.pagination import CountStrategy
+from app.domains.permissions.catalog import PermissionSet, permission_catalog
 from app.domains.permissions.infrastructure import PermissionsUnitOfWork, get_permissions_unit_of_work
 from app.domains.permissions.models import Permission, UserPermission
 from app.domains.users.models import User
+from app.domains.users.services import invalidate_cached_user
 
 
 class RegisterResponses(Responses):
@@ -23,6 +26,16 @@ class PermissionsService:
         async with self.uow:
             return await self.uow.permission_repository.list()
 
+    async def load_permission_catalog(self) -> None:
+        async with self.uow:
+            permissions, _ = await self.uow.permission_repository.list(count_strategy=CountStrategy.NONE)
+        permission_catalog.load(permissions)
+
+    async def get_user_permission_set(self, user_id: int) -> PermissionSet:
+        async with self.uow:
+            stmt = select(UserPermission.permission_id).where(UserPermission.user_id == user_id)
+            return PermissionSet.from_ids((await self.uow._session.execute(stmt)).scalars())
+
     async def get_permissions_by_ids(self, permissions_ids: list[int]):
         stmt = select(Permission).where(Permission.id.in_(permissions_ids))
         async with self.uow:
@@ -42,24 +55,22 @@ class PermissionsService:
 
     async def assign_permissions_to_user(self, user_id: int, permissions_ids: list[int]):
         async with self.uow:
-            select_user_stmt = (
-                select(User)
-                .options(selectinload(User.permissions))  # сразу подгружаем
-                .where(User.id == user_id)
-            )
-            user: User = (await self.uow._session.execute(select_user_stmt)).scalar_one_or_none()
+            user = await self.uow.user_repository.get_first_by_kwargs(id=user_id)
 
             if user is None:
                 raise ValueError("User with provided ID not found")
 
-            select_permissions_stmt = select(Permission).where(Permission.id.in_(permissions_ids))
-            permissions = (await self.uow._session.execute(select_permissions_stmt)).scalars().all()
-
-            existing_ids = {p.id for p in user.permissions}
-            new_permissions = [p for p in permissions if p.id not in existing_ids]
+            select_permissions_stmt = select(Permission.id).where(Permission.id.in_(permissions_ids))
+            existing_permissions_ids = (await self.uow._session.execute(select_permissions_stmt)).scalars().all()
 
-            user.permissions.extend(new_permissions)
-            await self.uow._session.commit()
+            # уже выданные права пропускаются через ON CONFLICT DO NOTHING
+            await self.uow.user_permission_repository.upsert(
+                [{"user_id": user_id, "permission_id": permission_id} for permission_id in existing_permissions_ids],
+                index_elements=("user_id", "permission_id"),
+                update_fields=(),
+            )
+            await self._bump_permissions_version(user_id)
+        invalidate_cached_user(user_id)
 
     async def remove_permissions_from_user(self, user_id: int, permissions_ids: list[int]):
         async with self.uow:
@@ -82,6 +93,8 @@ class PermissionsService:
             for p in permissions_to_delete:
                 if p in user.permissions:
                     user.permissions.remove(p)
+            await self._bump_permissions_version(user_id)
+        invalidate_cached_user(user_id)
 
     async def set_users_permissions(self, user_id: int, permissions_ids):
         async with self.uow:
@@ -94,9 +107,15 @@ class PermissionsService:
             permissions_stmt = select(Permission).where(Permission.id.in_(permissions_ids))
             permissions = (await self.uow._session.execute(permissions_stmt)).scalars().all()
             user.permissions = permissions
+            await self._bump_permissions_version(user_id)
 
             await self.uow._session.commit()
-            return user.permissions
+        invalidate_cached_user(user_id)
+        return user.permissions
+
+    async def _bump_permissions_version(self, user_id: int) -> None:
+        """Makes access tokens issued with the previous permissions outdated"""
+        await self.uow.user_repository.update(user_id, {"permissions_version": User.permissions_version + 1})
 
 
 def get_permissions_service(
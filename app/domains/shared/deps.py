@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
+from uuid import uuid4
 
 from fastapi import Depends
 from fastapi.security import APIKeyCookie, HTTPAuthorizationCredentials, HTTPBearer
@@ -9,8 +10,11 @@ from starlette import status
 from starlette.exceptions import HTTPException
 
 from app.core.config import settings
-from app.domains.permissions.models import Permission
+from app.core.database.replicas import current_user_id
+from app.domains.auth.services import RevokedTokenServiceDep
+from app.domains.permissions.catalog import PermissionSet, permission_catalog
 from app.domains.permissions.services import PermissionServiceDep
+from app.domains.shared.schemas import AccessTokenPayload
 from app.domains.users.models import User
 from app.domains.users.services import UserServiceDep
 
@@ -26,8 +30,26 @@ def create_access_token(data: dict) -> str:
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-def get_email_by_access_token(access_token: HTTPAuthorizationCredentials):
-    """Parses access token and returns decoded email from it"""
+def create_user_access_token(user: User, permissions: PermissionSet) -> str:
+    """Access token with the claims needed to authorize requests without loading the user's permissions.
+
+    ``user.permissions_version`` must be read before ``permissions``,
+    then a concurrent change of permissions can only make the token outdated, not wrongly authorized.
+    """
+    payload = AccessTokenPayload(
+        email=user.email,
+        user_id=user.id,
+        stuff=user.stuff,
+        permissions=permissions.mask,
+        permissions_version=user.permissions_version,
+    )
+    return create_access_token(payload.model_dump())
+
+
+def get_access_token_payload(
+    access_token: Annotated[HTTPAuthorizationCredentials, Depends(access_token_header)],
+) -> AccessTokenPayload:
+    """Parses access token and returns its claims"""
     if access_token is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authorized")
     try:
@@ -35,75 +57,129 @@ def get_email_by_access_token(access_token: HTTPAuthorizationCredentials):
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    email = payload.get("email")
-
-    if not email:
+    if not payload.get("email"):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    return email
+    return AccessTokenPayload.model_validate(payload)
 
 
 def create_refresh_token(data: dict, remember_me: bool = False) -> str:
+    """Refresh token with ``jti`` to revoke it and ``iat`` to revoke all tokens issued before a password change"""
     data_to_encode = data.copy()
     if remember_me:
         lifetime = timedelta(days=settings.REFRESH_TOKEN_REMEMBER_ME_LIFETIME_DAYS)
     else:
         lifetime = timedelta(days=settings.REFRESH_TOKEN_LIFETIME_DAYS)
-    expire = datetime.now(tz=timezone.utc) + lifetime
-    data_to_encode.update({"exp": expire})
+    now = datetime.now(tz=timezone.utc)
+    # iat дробный: токен, выданный сразу после смены пароля, не должен попасть под отзыв
+    data_to_encode.update({"exp": now + lifetime, "iat": now.timestamp(), "jti": uuid4().hex})
     refresh_token = jwt.encode(data_to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return refresh_token
 
 
-async def verify_refresh_token(
-    user_service: UserServiceDep, refresh_token: Annotated[str, Depends(refresh_token_cookie)]
-) -> dict | None:
+def get_refresh_token_payload(refresh_token: str | None) -> dict | None:
+    """Claims of a valid not expired refresh token, revocation isn't checked"""
     if refresh_token is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authorized")
+        return None
     try:
         payload = jwt.decode(refresh_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user = await user_service.get_user_by_kwargs(email=payload["email"])
-        if user is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token is invalid")
-        return payload
     except JWTError:
+        return None
+    return payload if payload.get("email") else None
+
+
+async def verify_refresh_token(
+    user_service: UserServiceDep,
+    revoked_token_service: RevokedTokenServiceDep,
+    refresh_token: Annotated[str, Depends(refresh_token_cookie)],
+) -> dict | None:
+    """Refresh token claims, rejects revoked tokens and tokens issued before the last password change.
+
+    The revocation check queries the database only for ids found in the in-process filter.
+    """
+    if refresh_token is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authorized")
+
+    payload = get_refresh_token_payload(refresh_token)
+    if payload is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token is invalid")
+
+    # у токенов, выданных до появления jti, его нет - они действуют до exp
+    if payload.get("jti") and await revoked_token_service.is_revoked(payload["jti"]):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token is revoked")
+
+    user = await user_service.get_user_by_email_cached(payload["email"])
+    if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token is invalid")
 
+    if user.last_password_change is not None and payload.get("iat", 0) < user.last_password_change.timestamp():
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token is revoked")
+
+    return payload
+
 
 async def get_current_user(
     user_service: UserServiceDep,
-    access_token: Annotated[HTTPAuthorizationCredentials, Depends(access_token_header)],
+    payload: Annotated[AccessTokenPayload, Depends(get_access_token_payload)],
 ) -> User | None:
-    email = get_email_by_access_token(access_token)
-    user = await user_service.get_user_by_kwargs(email=email)
+    user = await user_service.get_user_by_email_cached(payload.email)
 
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
+    current_user_id.set(user.id)
     return user
 
 
+async def get_authorization_claims(
+    payload: Annotated[AccessTokenPayload, Depends(get_access_token_payload)],
+    user: Annotated[User, Depends(get_current_user)],
+) -> AccessTokenPayload:
+    """Claims used for authorization, the token is rejected if the user's permissions changed after it was issued.
+
+    The version is compared with the cached user record, so the check doesn't need a query.
+    """
+    if payload.permissions_version is None or payload.permissions_version != user.permissions_version:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token is outdated")
+    return payload
+
+
 async def get_admin_user(
-    user_service: UserServiceDep,
-    access_token: Annotated[HTTPAuthorizationCredentials, Depends(access_token_header)],
+    claims: Annotated[AccessTokenPayload, Depends(get_authorization_claims)],
+    user: Annotated[User, Depends(get_current_user)],
 ) -> User | None:
-    user = await get_current_user(user_service, access_token)
-    if not user.stuff:
+    if not claims.stuff:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
     return user
 
 
 async def get_users_permissions(
+    claims: Annotated[AccessTokenPayload, Depends(get_authorization_claims)],
     permission_service: PermissionServiceDep,
-    user_service: UserServiceDep,
-    access_token: Annotated[HTTPAuthorizationCredentials, Depends(access_token_header)],
-):
-    user = await get_current_user(user_service, access_token)
-    user_permissions = await permission_service.get_user_permissions(user.id)
-    return list(map(lambda permissions: permissions.action, user_permissions))
+) -> PermissionSet:
+    """Permissions of the current user, taken from the access token"""
+    # каталог загружается при старте приложения, здесь - если тогда БД была недоступна
+    if not permission_catalog.loaded:
+        await permission_service.load_permission_catalog()
+    return PermissionSet(claims.permissions)
+
+
+class RequirePermission:
+    """Dependency that checks one permission of the current user without queries.
+
+    ``dependencies=[Depends(RequirePermission("permissions.create", Responses.CANT_MANAGE_PERMISSIONS))]``
+    """
+
+    def __init__(self, action: str, error: HTTPException | None = None):
+        self.action = action
+        self.error = error or HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+
+    async def __call__(self, permissions: Annotated[PermissionSet, Depends(get_users_permissions)]) -> None:
+        if self.action not in permissions:
+            raise self.error
 
 
 RefreshTokenDep = Annotated[str, Depends(verify_refresh_token)]
 CurrentUserDep = Annotated[User, Depends(get_current_user)]
 AdminUserDep = Annotated[User, Depends(get_admin_user)]
-UserPermissionsDep = Annotated[list[Permission], Depends(get_users_permissions)]
+UserPermissionsDep = Annotated[PermissionSet, Depends(get_users_permissions)]
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+
+class AccessTokenPayload(BaseModel):
+    """Claims of the access token.
+
+    Tokens issued before the claims were added contain only ``email``,
+    they authenticate the user but can't be used for authorization (``permissions_version`` is ``None``).
+    """
+
+    email: str
+    user_id: int | None = None
+    stuff: bool = False
+    # битовая маска прав, см. app/domains/permissions/catalog.py
+    permissions: int = 0
+    permissions_version: int | None = None
@@ -10,3 +10,5 @@ class UsersFilter(BaseModel):
     email__startswith: Annotated[str | None, Query(description="Email filter")] = None
     firstname__startswith: Annotated[str | None, Query(description="Firstname startswith")] = None
     lastname__startswith: Annotated[str | None, Query(description="Lastname startswith")] = None
+    email__icontains: Annotated[str | None, Query(description="Email contains")] = None
+    lastname__icontains: Annotated[str | None, Query(description="Lastname contains")] = None
@@ -8,6 +8,8 @@ from pydantic_core import PydanticCustomError
 from sqlalchemy import Boolean, DateTime, String, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.common.password_hasher import password_hasher
+from app.core.database.indexes import prefix_search_index, trigram_search_index
 from app.core.database.setup_db import Base
 from app.domains.shared.types import Password
 
@@ -38,6 +40,8 @@ class User(Base):
 
     last_password_change: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
     email_confirmed: Mapped[bool] = mapped_column(default=False, server_default=text("false"))
+    # увеличивается при изменении прав или флага stuff, access токены с другой версией считаются устаревшими
+    permissions_version: Mapped[int] = mapped_column(default=0, server_default=text("0"), nullable=False)
 
     news: Mapped[list["News"]] = relationship("News", back_populates="author")
     memberships: Mapped[list["UserMembership"]] = relationship("UserMembership", back_populates="user")
@@ -55,10 +59,22 @@ class User(Base):
 
     @password.setter
     def password(self, value: str) -> None:
+        # хэширует синхронно и блокирует event loop, в обработчиках запросов используется set_password
         self._password = bcrypt.hash(value)
 
-    def verify_password(self, plain_password: str) -> bool:
-        return bcrypt.verify(plain_password, self._password)
+    async def set_password(self, value: str) -> None:
+        self._password = await password_hasher.hash(value)
+
+    async def check_password(self, plain_password: str) -> bool:
+        return await password_hasher.verify(plain_password, self._password)
+
+
+# индексы под фильтры startswith/icontains (см. app/core/utils/filters.py)
+prefix_search_index(User.email)
+prefix_search_index(User.firstname)
+prefix_search_index(User.lastname)
+trigram_search_index(User.email)
+trigram_search_index(User.lastname)
 
 
 class UserSchema(BaseModel):
@@ -1,17 +1,19 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from fastapi.params import Path
 from fastapi_exception_responses import Responses
 
-from app.core.common.request_params import OrderingParamsDep, PaginationParamsDep
-from app.core.common.responses import InvalidRequestParamsResponses, PaginatedResponse
-from app.core.database.base_repository import InvalidOrderAttributeError
+from app.core.common.request_params import OrderingParamsDep, PaginationParamsDep, make_fields_params
+from app.core.common.responses import InvalidRequestParamsResponses, PaginatedResponse, build_paginated_response
+from app.core.database.base_repository import InvalidCursorError, InvalidOrderAttributeError
+from app.core.utils.fields import FieldSet
+from app.core.utils.pagination import get_next_cursor
 from app.domains.memberships.models import ExtendedUserMembershipSchema
 from app.domains.memberships.services import MembershipServiceDep
 from app.domains.permissions.models import PermissionSchema
 from app.domains.permissions.services import PermissionServiceDep
-from app.domains.shared.deps import AdminUserDep, UserPermissionsDep
+from app.domains.shared.deps import AdminUserDep, RequirePermission, UserPermissionsDep
 from app.domains.users.filters import UsersFilter
 from app.domains.users.models import UpdateUserByAdminSchema, UserSchema
 from app.domains.users.services import UserServiceDep
@@ -23,30 +25,39 @@ class UserListResponses(InvalidRequestParamsResponses):
     pass
 
 
-@router.get("", responses=UserListResponses.responses)
+@router.get("", responses=UserListResponses.responses, response_model=PaginatedResponse[UserSchema])
 async def get_users(
     user_service: UserServiceDep,
     params: PaginationParamsDep,
     admin: AdminUserDep,  # noqa Admin auth argument
+    fields: Annotated[FieldSet, Depends(make_fields_params(UserSchema))],
     ordering: OrderingParamsDep = None,
     filters: Annotated[UsersFilter, Depends()] = None,
-) -> PaginatedResponse[UserSchema]:
+) -> Response:
     try:
         users, users_count = await user_service.get_all_paginated_counted(
             order_by=ordering,
             filters=filters.model_dump(exclude_none=True),
             limit=params["limit"],
             offset=params["offset"],
+            cursor=params["cursor"],
+            count_strategy=params["count_strategy"],
+            columns=fields.columns,
         )
-        data = [UserSchema.from_orm(user) for user in users]
-        return PaginatedResponse(
+        return build_paginated_response(
+            fields.schema,
+            users,
             count=users_count,
-            data=data,
             page=params["page"],
             page_size=params["page_size"],
+            cursor=params["cursor"],
+            next_cursor=get_next_cursor(users, ordering, params["limit"]),
+            count_strategy=params["count_strategy"],
         )
     except InvalidOrderAttributeError:
         raise UserListResponses.INVALID_SORTER_FIELD
+    except InvalidCursorError:
+        raise UserListResponses.INVALID_CURSOR
 
 
 class UpdateUserByAdminResponses(Responses):
@@ -98,50 +109,49 @@ class ManagePermissionsResponses(Responses):
 
 
 @router.post(
-    "/{user_id}/permissions", responses=ManagePermissionsResponses.responses, summary="Assign permissions to user"
+    "/{user_id}/permissions",
+    responses=ManagePermissionsResponses.responses,
+    summary="Assign permissions to user",
+    dependencies=[Depends(RequirePermission("permissions.create", ManagePermissionsResponses.CANT_MANAGE_PERMISSIONS))],
 )
 async def assign_permissions(
     user_id: Annotated[int, Path()],
     permissions_service: PermissionServiceDep,
-    current_user_permissions: UserPermissionsDep,
     admin: AdminUserDep,
     permissions_ids: list[int],
 ):
-    if "permissions.create" not in current_user_permissions:
-        raise ManagePermissionsResponses.CANT_MANAGE_PERMISSIONS
-
     try:
         await permissions_service.assign_permissions_to_user(user_id, permissions_ids)
     except ValueError:
         raise ManagePermissionsResponses.USER_NOT_FOUND
 
 
-@router.delete("/{user_id}/permissions")
+@router.delete(
+    "/{user_id}/permissions",
+    dependencies=[Depends(RequirePermission("permissions.delete", ManagePermissionsResponses.CANT_MANAGE_PERMISSIONS))],
+)
 async def remove_user_permissions(
     user_id: Annotated[int, Path()],
     permissions_service: PermissionServiceDep,
-    current_user_permissions: UserPermissionsDep,
     admin: AdminUserDep,
     permissions_ids: list[int],
 ):
-    if "permissions.delete" not in current_user_permissions:
-        raise ManagePermissionsResponses.CANT_MANAGE_PERMISSIONS
     try:
         await permissions_service.remove_permissions_from_user(user_id, permissions_ids)
     except ValueError:
         raise ManagePermissionsResponses.USER_NOT_FOUND
 
 
-@router.put("/{user_id}/permissions")
+@router.put(
+    "/{user_id}/permissions",
+    dependencies=[Depends(RequirePermission("permissions.update", ManagePermissionsResponses.CANT_MANAGE_PERMISSIONS))],
+)
 async def set_user_permissions(
     user_id: Annotated[int, Path()],
     permissions_service: PermissionServiceDep,
-    current_user_permissions: UserPermissionsDep,
     admin: AdminUserDep,
     permissions_ids: list[int],
 ):
-    if "permissions.update" not in current_user_permissions:
-        raise ManagePermissionsResponses.CANT_MANAGE_PERMISSIONS
     try:
         return await permissions_service.set_users_permissions(user_id, permissions_ids)
     except ValueError:
@@ -153,15 +163,16 @@ class ManageUserMembershipResponses(Responses):
     MEMBERSHIP_NOT_FOUND = 404, "User membership with with provided user ID not found"
 
 
-@router.get("/{user_id}/user-membership")
+@router.get(
+    "/{user_id}/user-membership",
+    dependencies=[
+        Depends(RequirePermission("user_memberships.read", ManageUserMembershipResponses.CANT_MANAGE_USER_MEMBERSHIPS))
+    ],
+)
 async def get_user_membership(
     user_id: Annotated[int, Path()],
-    current_user_permissions: UserPermissionsDep,
     membership_service: MembershipServiceDep,
 ) -> ExtendedUserMembershipSchema:
-    if "user_memberships.read" not in current_user_permissions:
-        raise ManageUserMembershipResponses.CANT_MANAGE_USER_MEMBERSHIPS
-
     user_membership = await membership_service.get_user_membership_by_kwargs(user_id=user_id)
 
     if user_membership is None:
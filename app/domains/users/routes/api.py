@@ -1,13 +1,20 @@
 import os
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, File, Path, UploadFile
+from fastapi import APIRouter, Depends, File, Path, Response, UploadFile
 from fastapi_exception_responses import Responses
 
-from app.core.common.request_params import OrderingParamsDep, PaginationParamsDep
-from app.core.common.responses import InvalidRequestParamsResponses, PaginatedResponse
+from app.core.common.request_params import OrderingParamsDep, PaginationParamsDep, make_fields_params
+from app.core.common.responses import (
+    InvalidRequestParamsResponses,
+    PaginatedResponse,
+    build_json_response,
+    build_paginated_response,
+)
 from app.core.config import BASE_DIR, settings
-from app.core.database.base_repository import InvalidOrderAttributeError
+from app.core.database.base_repository import InvalidCursorError, InvalidOrderAttributeError
+from app.core.utils.fields import FieldSet
+from app.core.utils.pagination import get_next_cursor
 from app.core.utils.save_file import save_file
 from app.domains.shared.deps import CurrentUserDep
 from app.domains.users.exceptions import InvalidPasswordError
@@ -22,29 +29,38 @@ class UserListResponses(InvalidRequestParamsResponses):
     pass
 
 
-@router.get("/")
+@router.get("/", response_model=PaginatedResponse[UserSchema])
 async def get_users(
     user_service: UserServiceDep,
     params: PaginationParamsDep,
+    fields: Annotated[FieldSet, Depends(make_fields_params(UserSchema))],
     ordering: OrderingParamsDep = None,
     filters: Annotated[UsersFilter, Depends()] = None,
-) -> PaginatedResponse[UserSchema]:
+) -> Response:
     try:
         users, users_count = await user_service.get_all_paginated_counted(
             order_by=ordering,
             filters=filters.model_dump(exclude_none=True),
             limit=params["limit"],
             offset=params["offset"],
+            cursor=params["cursor"],
+            count_strategy=params["count_strategy"],
+            columns=fields.columns,
         )
-        data = [UserSchema.from_orm(user) for user in users]
-        return PaginatedResponse(
+        return build_paginated_response(
+            fields.schema,
+            users,
             count=users_count,
-            data=data,
             page=params["page"],
             page_size=params["page_size"],
+            cursor=params["cursor"],
+            next_cursor=get_next_cursor(users, ordering, params["limit"]),
+            count_strategy=params["count_strategy"],
         )
     except InvalidOrderAttributeError:
         raise UserListResponses.INVALID_SORTER_FIELD
+    except InvalidCursorError:
+        raise UserListResponses.INVALID_CURSOR
 
 
 @router.get("/current-user")
@@ -54,17 +70,24 @@ async def get_current_user(current_user: CurrentUserDep) -> UserSchema:
 
 class GetUserResponses(Responses):
     USER_NOT_FOUND = 404, "User with the provided email was not found"
+    INVALID_FIELDS = 400, "Invalid fields"
 
 
-@router.get("/{user_id}", summary="Get user by id", responses=GetUserResponses.responses)
+@router.get(
+    "/{user_id}",
+    summary="Get user by id",
+    responses=GetUserResponses.responses,
+    response_model=UserSchema,
+)
 async def get_user(
     user_id: Annotated[int, Path(...)],
     user_service: UserServiceDep,
-) -> UserSchema:
-    user = await user_service.get_user_by_kwargs(id=user_id)
+    fields: Annotated[FieldSet, Depends(make_fields_params(UserSchema))],
+) -> Response:
+    user = await user_service.get_user_by_id(user_id, columns=fields.columns)
     if user is None:
         raise GetUserResponses.USER_NOT_FOUND
-    return UserSchema.from_orm(user)
+    return build_json_response(fields.schema.model_validate(user))
 
 
 class UpdateUserDataResponses(Responses):
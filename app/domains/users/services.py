@@ -1,11 +1,16 @@
 import os
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Annotated, Any
+from typing import Annotated, Any, Sequence
 
 from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
 
-from app.core.config import BASE_DIR
+from app.core.config import BASE_DIR, settings
+from app.core.database.replicas import read_only
+from app.core.utils.cache import TTLCache
+from app.core.utils.pagination import CountStrategy
 from app.domains.users.exceptions import InvalidPasswordError
 from app.domains.users.infrastructure import UserUnitOfWork, get_user_unit_of_work
 from app.domains.users.models import User
@@ -15,16 +20,33 @@ from app.domains.users.models import User
 это сделало бы сервисы зависимыми от фреймворка
 """
 
+# отсоединенные от сессии пользователи по email, для get_current_user и verify_refresh_token
+user_cache: TTLCache[str, User] = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    user_cache.pop_where(lambda user: user.id == user_id)
+
 
 class UserService:
     def __init__(self, uow):
         self.uow = uow
 
+    @read_only
     async def get_all_paginated_counted(
-        self, limit: int = None, offset: int = None, order_by: str = None, filters: dict[str, Any] = None
+        self,
+        limit: int = None,
+        offset: int = None,
+        order_by: str = None,
+        filters: dict[str, Any] = None,
+        cursor: str = None,
+        count_strategy: CountStrategy = CountStrategy.EXACT,
+        columns: Sequence[str] = None,
     ) -> [list[User], int]:
         async with self.uow:
-            return await self.uow.user_repository.list(limit, offset, order_by, filters)
+            return await self.uow.user_repository.list(
+                limit, offset, order_by, filters, cursor=cursor, count_strategy=count_strategy, columns=columns
+            )
 
     async def get_all_users_count(self) -> int:
         async with self.uow:
@@ -38,6 +60,29 @@ class UserService:
         async with self.uow:
             return await self.uow.user_repository.get_first_by_kwargs(**kwargs)
 
+    async def get_user_by_email_cached(self, email: str) -> User | None:
+        """Returns the user for authentication, the record is cached for ``USER_CACHE_TTL_SECONDS``.
+
+        Every call returns its own detached copy of the cached record, it's made without a query.
+        """
+        user = user_cache.get(email)
+        if user is None:
+            generation = user_cache.generation
+            user = await self.get_user_by_kwargs(email=email)
+            if user is None:
+                return None
+            user_cache.set(email, user, generation)
+
+        async with self.uow:
+            # закрытие сессии в конце блока отсоединяет копию, следующие запросы получат пользователя из БД
+            return await self.uow._session.merge(user, load=False)  # noqa
+
+    async def get_user_by_id(self, user_id: int, columns: Sequence[str] = None) -> User | None:
+        """Returns user with only ``columns`` loaded if they are passed"""
+        stmt = select(User).options(load_only(*[getattr(User, column) for column in columns])) if columns else None
+        async with self.uow:
+            return await self.uow.user_repository.get_first_by_kwargs(stmt, id=user_id)
+
     async def set_user_avatar(self, user_id: int, avatar_path: Path):
         async with self.uow:
             user = await self.uow.user_repository.get_first_by_kwargs(id=user_id)
@@ -46,13 +91,18 @@ class UserService:
             if user.avatar_path is not None:
                 os.remove(BASE_DIR / user.avatar_path)
             await self.uow.user_repository.update(user_id, {"avatar_path": avatar_path})
+        invalidate_cached_user(user_id)
 
     async def update_user(self, user_id: int, update_data: dict) -> User:
         async with self.uow:
             user = await self.uow.user_repository.get_first_by_kwargs(id=user_id)
             if user is None:
                 raise ValueError("There is no such user with provided id")
+            if "stuff" in update_data and update_data["stuff"] != user.stuff:
+                # флаг stuff хранится в access токене
+                update_data = {**update_data, "permissions_version": User.permissions_version + 1}
             await self.uow.user_repository.update(user_id, update_data)
+        invalidate_cached_user(user_id)
         return user
 
     async def delete_avatar(self, user_id: int) -> None:
@@ -62,6 +112,7 @@ class UserService:
                 raise ValueError("There is no such user with provided id")
             os.remove(BASE_DIR / user.avatar_path)
             await self.uow.user_repository.update(user_id, {"avatar_path": None})
+        invalidate_cached_user(user_id)
 
     async def change_password(self, user_id, old_password, new_password):
         async with self.uow:
@@ -70,12 +121,13 @@ class UserService:
             if user is None:
                 raise ValueError("user with provided email not found")
 
-            if not user.verify_password(old_password):
+            if not await user.check_password(old_password):
                 raise InvalidPasswordError("Invalid password")
 
-            user.password = new_password
+            await user.set_password(new_password)
             await self.uow._session.flush()  # noqa property's setter manual calling
             await self.uow.user_repository.update(user.id, {"last_password_change": datetime.now(tz=timezone.utc)})
+        invalidate_cached_user(user_id)
 
 
 def get_user_service(uow: Annotated[UserUnitOfWork, Depends(get_user_unit_of_work)]) -> UserService:
@@ -1,23 +1,39 @@
+import asyncio
+import time
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import ORJSONResponse
 from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
 from starlette.middleware.cors import CORSMiddleware
 from starlette.requests import Request
 from starlette.staticfiles import StaticFiles
 
+from app.core.common.password_hasher import password_hasher
 from app.core.config import DEV_MODE, settings
+from app.core.database.instrumentation import start_query_stats
 from app.core.utils.open_api import get_custom_open_api
+from app.domains.auth.infrastructure import AuthUnitOfWork
 from app.domains.auth.routes.auth_router import router as auth_router
+from app.domains.auth.services import RevokedTokenService, maintain_revoked_tokens
 from app.domains.feedback.routes.contact_messages_api import router as contact_messages_router
 from app.domains.feedback.routes.sponsorship_requests_api import router as sponsorship_router
+from app.domains.memberships.infrastructure import MembershipUnitOfWork
+from app.domains.memberships.notifications import membership_updates_broker
+from app.domains.memberships.reconciliation import reconcile_memberships_periodically
 from app.domains.memberships.routes.admin_api import router as membership_admin_router
 from app.domains.memberships.routes.api import router as membership_router
+from app.domains.memberships.services import MembershipService, sweep_expired_memberships
 from app.domains.news.api import router as news_router
+from app.domains.payments.admin_api import router as payments_admin_router
 from app.domains.payments.api import router as payments_router
+from app.domains.payments.gateway import stripe_gateway
+from app.domains.payments.inbox import stripe_event_inbox
+from app.domains.permissions.infrastructure import PermissionsUnitOfWork
 from app.domains.permissions.routes.permissions_router import router as permission_router
+from app.domains.permissions.services import PermissionsService
 from app.domains.users.routes.admin_api import router as users_admin_router
 from app.domains.users.routes.api import router as users_router
 
@@ -25,8 +41,34 @@ from app.domains.users.routes.api import router as users_router
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # startup
+    try:
+        await PermissionsService(PermissionsUnitOfWork()).load_permission_catalog()
+    except (OSError, SQLAlchemyError) as e:
+        logger.warning(f"Permission catalog isn't loaded on startup, it will be loaded on first use: {e!r}")
+    try:
+        await RevokedTokenService(AuthUnitOfWork()).load_filter()
+    except (OSError, SQLAlchemyError) as e:
+        logger.warning(f"Revoked tokens filter isn't loaded on startup, it will be loaded on first use: {e!r}")
+    try:
+        await MembershipService(MembershipUnitOfWork()).get_membership_types_snapshot()
+    except (OSError, SQLAlchemyError) as e:
+        logger.warning(f"Membership types catalog isn't loaded on startup, it will be loaded on first use: {e!r}")
+    revoked_tokens_task = asyncio.create_task(maintain_revoked_tokens())
+    stripe_event_inbox.start()
+    expiry_sweeper_task = asyncio.create_task(sweep_expired_memberships())
+    reconciliation_task = None
+    if settings.MEMBERSHIP_RECONCILIATION_INTERVAL_SECONDS > 0:
+        reconciliation_task = asyncio.create_task(reconcile_memberships_periodically())
     yield
     # shutdown
+    await stripe_event_inbox.stop()
+    await stripe_gateway.close()
+    await membership_updates_broker.stop()
+    revoked_tokens_task.cancel()
+    expiry_sweeper_task.cancel()
+    if reconciliation_task is not None:
+        reconciliation_task.cancel()
+    password_hasher.shutdown()
 
 
 app = FastAPI(
@@ -41,9 +83,25 @@ app.mount(settings.MEDIA_API_PATH, StaticFiles(directory=settings.MEDIA_DIR_NAME
 
 @app.middleware("http")
 async def log_request(request: Request, call_next):
-    message = f"URL: {request.url.path} Method: {request.method}"
-    logger.info(message)
+    stats = start_query_stats()
+    start_time = time.perf_counter()
     response = await call_next(request)
+    duration_ms = (time.perf_counter() - start_time) * 1000
+    db_duration_ms = stats.duration * 1000
+
+    response.headers["Server-Timing"] = (
+        f'db;dur={db_duration_ms:.1f};desc="{stats.count} queries", app;dur={duration_ms:.1f}'
+    )
+    response.headers["X-DB-Queries"] = str(stats.count)
+
+    message = (
+        f"URL: {request.url.path} Method: {request.method} Status: {response.status_code} "
+        f"Time: {duration_ms:.1f}ms DB queries: {stats.count} DB time: {db_duration_ms:.1f}ms"
+    )
+    logger.info(message)
+    for statement, count in stats.get_repeated_statements(settings.N_PLUS_ONE_THRESHOLD):
+        logger.warning(f"Possible N+1 in {request.method} {request.url.path}: {count} x {statement}")
+
     return response
 
 
@@ -74,6 +132,7 @@ app.include_router(payments_router, prefix="/api")
 
 app.include_router(users_admin_router, prefix="/api/stuff")
 app.include_router(membership_admin_router, prefix="/api/stuff")
+app.include_router(payments_admin_router, prefix="/api/stuff")
 
 if DEV_MODE:
     origins = [
@@ -0,0 +1,501 @@
+"""Local stand-in for the Stripe API endpoints used by the app, for load tests and manual end-to-end runs.
+
+Point the app at it with ``STRIPE_API_BASE=http://localhost:12111`` and run::
+
+    python -m loadtest.fake_stripe --webhook-url http://localhost:8000/api/payments/stripe/webhook \
+        --webhook-secret "$STRIPE_WEBHOOK_SECRET_KEY"
+
+``POST /_fake/checkout/sessions/{id}/complete`` plays the customer paying on the checkout page:
+it creates the customer, the subscription and the paid invoice and delivers the signed webhooks.
+"""
+
+import argparse
+import asyncio
+import copy
+import hashlib
+import hmac
+import random
+import secrets
+import time
+from contextlib import asynccontextmanager
+from typing import Annotated, Any
+from urllib.parse import parse_qsl
+
+import httpx
+import orjson
+from fastapi import APIRouter, Depends, FastAPI, Request, Response
+from loguru import logger
+
+from loadtest.stats import LatencyStats
+
+YEAR_SECONDS = 365 * 24 * 3600
+
+
+def parse_form(pairs: list[tuple[str, str]]) -> dict[str, Any]:
+    """Stripe form encoding to nested values: ``line_items[0][price]=p`` -> ``{"line_items": [{"price": "p"}]}``"""
+    result: dict[str, Any] = {}
+    for key, value in pairs:
+        path = key.replace("]", "").split("[")
+        node = result
+        for name in path[:-1]:
+            node = node.setdefault(name, {})
+        node[path[-1]] = value
+    return _lists_from_indexes(result)
+
+
+def _lists_from_indexes(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    value = {key: _lists_from_indexes(item) for key, item in value.items()}
+    if value and all(key.isdigit() for key in value):
+        return [value[key] for key in sorted(value, key=int)]
+    return value
+
+
+def sign_payload(payload: bytes, secret: str, timestamp: int | None = None) -> str:
+    """``Stripe-Signature`` header, as checked by ``stripe.Webhook.construct_event``"""
+    timestamp = timestamp or int(time.time())
+    signature = hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_fake{secrets.token_hex(12)}"
+
+
+class FakeStripeError(Exception):
+    def __init__(self, status_code: int, message: str, error_type: str = "invalid_request_error"):
+        self.status_code = status_code
+        self.message = message
+        self.error_type = error_type
+
+
+class FakeStripe:
+    """In-memory Stripe account.
+
+    ``latency`` and ``error_rate`` emulate the network and Stripe failures (500 responses are retried by the SDK).
+    Webhooks are delivered in the background with up to ``webhook_attempts`` attempts per event,
+    at most ``webhook_concurrency`` at a time.
+    """
+
+    def __init__(
+        self,
+        public_url: str,
+        webhook_url: str | None = None,
+        webhook_secret: str = "whsec_fake",
+        price_amount: int = 2000,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        webhook_attempts: int = 3,
+        webhook_backoff: float = 0.5,
+        webhook_concurrency: int = 20,
+        webhook_transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.public_url = public_url.rstrip("/")
+        self.webhook_url = webhook_url
+        self.webhook_secret = webhook_secret
+        self.price_amount = price_amount
+        self.latency = latency
+        self.error_rate = error_rate
+        self.webhook_attempts = webhook_attempts
+        self.webhook_backoff = webhook_backoff
+        self.objects: dict[str, dict[str, dict]] = {
+            "checkout.session": {},
+            "customer": {},
+            "subscription": {},
+            "invoice": {},
+        }
+        self.idempotent_responses: dict[str, dict] = {}
+        self.api_stats = LatencyStats()
+        self.webhook_stats = LatencyStats()
+        self._webhook_semaphore = asyncio.Semaphore(webhook_concurrency)
+        self._webhook_transport = webhook_transport
+        self._webhook_client: httpx.AsyncClient | None = None
+        self._deliveries: set[asyncio.Task] = set()
+
+    # --- API ---
+
+    def get(self, kind: str, object_id: str, expand: list[str] = ()) -> dict:
+        """Copy of the object as the API returns it"""
+        return self._expand(self._get_stored(kind, object_id), expand)
+
+    def create_checkout_session(self, params: dict, idempotency_key: str | None = None) -> dict:
+        if idempotency_key is not None and idempotency_key in self.idempotent_responses:
+            return self.idempotent_responses[idempotency_key]
+
+        session_id = _new_id("cs_test")
+        line_items = params.get("line_items") or []
+        amount_total = sum(self._get_amount(item) * int(item.get("quantity", 1)) for item in line_items)
+        session = {
+            "id": session_id,
+            "object": "checkout.session",
+            "mode": params.get("mode", "payment"),
+            "status": "open",
+            "payment_status": "unpaid",
+            "url": f"{self.public_url}/c/pay/{session_id}",
+            "success_url": params.get("success_url"),
+            "cancel_url": params.get("cancel_url"),
+            "customer_email": params.get("customer_email"),
+            "metadata": params.get("metadata") or {},
+            "subscription_data": params.get("subscription_data") or {},
+            "amount_total": amount_total,
+            "currency": "usd",
+            "expires_at": int(params.get("expires_at") or time.time() + 24 * 3600),
+            "created": int(time.time()),
+            "livemode": False,
+            "customer": None,
+            "subscription": None,
+            "invoice": None,
+            "line_items": {
+                "object": "list",
+                "url": f"/v1/checkout/sessions/{session_id}/line_items",
+                "has_more": False,
+                "data": [
+                    {
+                        "id": _new_id("li"),
+                        "object": "item",
+                        "quantity": int(item.get("quantity", 1)),
+                        "amount_total": self._get_amount(item) * int(item.get("quantity", 1)),
+                        "price": {"id": item.get("price"), "object": "price", "product": f"prod_{item.get('price')}"},
+                    }
+                    for item in line_items
+                ],
+            },
+        }
+        self.objects["checkout.session"][session_id] = session
+        if idempotency_key is not None:
+            self.idempotent_responses[idempotency_key] = session
+        return session
+
+    def list_subscriptions(self, limit: int = 10, starting_after: str | None = None) -> dict:
+        # как Stripe: новые первыми
+        subscriptions = list(reversed(self.objects["subscription"].values()))
+        start = 0
+        if starting_after is not None:
+            start = next((i + 1 for i, sub in enumerate(subscriptions) if sub["id"] == starting_after), 0)
+        data = subscriptions[start : start + limit]
+        return {
+            "object": "list",
+            "url": "/v1/subscriptions",
+            "data": data,
+            "has_more": start + limit < len(subscriptions),
+        }
+
+    def update_subscription(self, subscription_id: str, params: dict) -> dict:
+        subscription = self._get_stored("subscription", subscription_id)
+        if "cancel_at_period_end" in params:
+            subscription["cancel_at_period_end"] = params["cancel_at_period_end"] in ("true", True)
+        self.deliver([self._event("customer.subscription.updated", subscription)])
+        return subscription
+
+    # --- checkout page ---
+
+    def complete_checkout_session(self, session_id: str, duplicates: int = 1, shuffle: bool = False) -> list[dict]:
+        """Pays the session and delivers its webhooks, ``duplicates`` copies of each (Stripe retries and replays)"""
+        session = self._get_stored("checkout.session", session_id)
+        if session["status"] != "open":
+            raise FakeStripeError(400, f"Checkout session '{session_id}' is {session['status']}")
+
+        now = int(time.time())
+        customer = {"id": _new_id("cus"), "object": "customer", "email": session["customer_email"], "created": now}
+        self.objects["customer"][customer["id"]] = customer
+        session.update(status="complete", payment_status="paid", customer=customer["id"])
+        events = []
+
+        if session["mode"] == "subscription":
+            subscription, invoice = self._create_subscription(session, customer, now)
+            session.update(subscription=subscription["id"], invoice=invoice["id"])
+            events.append(self._event("customer.subscription.created", subscription))
+            events.append(self._event("invoice.paid", invoice))
+            events.append(self._event("customer.subscription.updated", subscription))
+        events.append(self._event("checkout.session.completed", session))
+
+        deliveries = [event for event in events for _ in range(duplicates)]
+        if shuffle:
+            random.shuffle(deliveries)
+        self.deliver(deliveries)
+        return events
+
+    def _create_subscription(self, session: dict, customer: dict, now: int) -> tuple[dict, dict]:
+        metadata = (session["subscription_data"] or {}).get("metadata") or {}
+        price = session["line_items"]["data"][0]["price"] if session["line_items"]["data"] else {}
+        subscription = {
+            "id": _new_id("sub"),
+            "object": "subscription",
+            "status": "active",
+            "customer": customer["id"],
+            "cancel_at_period_end": False,
+            "metadata": metadata,
+            "created": now,
+            # старые версии API отдают период в подписке, новые - в позициях
+            "current_period_start": now,
+            "current_period_end": now + YEAR_SECONDS,
+            "items": {
+                "object": "list",
+                "has_more": False,
+                "data": [
+                    {
+                        "id": _new_id("si"),
+                        "object": "subscription_item",
+                        "price": price,
+                        "quantity": 1,
+                        "current_period_start": now,
+                        "current_period_end": now + YEAR_SECONDS,
+                    }
+                ],
+            },
+        }
+        invoice = {
+            "id": _new_id("in"),
+            "object": "invoice",
+            "status": "paid",
+            "billing_reason": "subscription_create",
+            "customer": customer["id"],
+            "subscription": subscription["id"],
+            "total": session["amount_total"],
+            "currency": session["currency"],
+            "description": None,
+            "livemode": False,
+            "created": now,
+            "charge": None,
+            "payment_intent": None,
+            "parent": {
+                "type": "subscription_details",
+                "subscription_details": {"subscription": subscription["id"], "metadata": metadata},
+            },
+            "lines": {
+                "object": "list",
+                "has_more": False,
+                "data": [
+                    {
+                        "id": _new_id("il"),
+                        "object": "line_item",
+                        "amount": session["amount_total"],
+                        "pricing": {"price_details": {"price": price.get("id"), "product": price.get("product")}},
+                    }
+                ],
+            },
+        }
+        subscription["latest_invoice"] = invoice["id"]
+        self.objects["subscription"][subscription["id"]] = subscription
+        self.objects["invoice"][invoice["id"]] = invoice
+        return subscription, invoice
+
+    # --- webhooks ---
+
+    def deliver(self, events: list[dict]) -> None:
+        if self.webhook_url is None:
+            return
+        for event in events:
+            task = asyncio.create_task(self._deliver(event))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+
+    async def drain(self) -> None:
+        """Waits for the scheduled webhook deliveries"""
+        while self._deliveries:
+            await asyncio.gather(*self._deliveries, return_exceptions=True)
+
+    async def close(self) -> None:
+        await self.drain()
+        if self._webhook_client is not None:
+            await self._webhook_client.aclose()
+
+    async def _deliver(self, event: dict) -> None:
+        if self._webhook_client is None:
+            self._webhook_client = httpx.AsyncClient(transport=self._webhook_transport, timeout=30)
+        payload = orjson.dumps(event)
+
+        for attempt in range(1, self.webhook_attempts + 1):
+            async with self._webhook_semaphore:
+                started_at = time.perf_counter()
+                error = None
+                try:
+                    headers = {"Stripe-Signature": sign_payload(payload, self.webhook_secret)}
+                    headers["Content-Type"] = "application/json"
+                    response = await self._webhook_client.post(self.webhook_url, content=payload, headers=headers)
+                    if response.status_code >= 300:
+                        error = f"HTTP {response.status_code}"
+                except httpx.HTTPError as e:
+                    error = type(e).__name__
+                self.webhook_stats.record(time.perf_counter() - started_at, error)
+            if error is None:
+                return
+            await asyncio.sleep(min(self.webhook_backoff * 2 ** (attempt - 1), 10))
+        logger.warning(f"Webhook {event['type']} {event['id']} isn't delivered after {self.webhook_attempts} attempts")
+
+    def _event(self, event_type: str, obj: dict) -> dict:
+        return {
+            "id": _new_id("evt"),
+            "object": "event",
+            "type": event_type,
+            "api_version": "2025-07-30.basil",
+            "created": int(time.time()),
+            "livemode": False,
+            "pending_webhooks": 1,
+            "data": {"object": copy.deepcopy(obj)},
+        }
+
+    # --- helpers ---
+
+    def _get_stored(self, kind: str, object_id: str) -> dict:
+        obj = self.objects[kind].get(object_id)
+        if obj is None:
+            raise FakeStripeError(404, f"No such {kind}: '{object_id}'")
+        return obj
+
+    def _get_amount(self, line_item: dict) -> int:
+        price_data = line_item.get("price_data") or {}
+        return int(price_data.get("unit_amount") or self.price_amount)
+
+    def _expand(self, obj: dict, expand: list[str]) -> dict:
+        """Replaces ids by objects for top-level ``expand`` paths, nested paths expand their first part"""
+        obj = copy.deepcopy(obj)
+        for path in expand:
+            name = path.split(".")[0]
+            object_id = obj.get(name)
+            if not isinstance(object_id, str):
+                continue
+            for kind in ("customer", "subscription", "invoice"):
+                if object_id in self.objects[kind]:
+                    obj[name] = copy.deepcopy(self.objects[kind][object_id])
+        return obj
+
+    async def emulate_network(self) -> None:
+        if self.latency:
+            await asyncio.sleep(random.expovariate(1 / self.latency))
+        if self.error_rate and random.random() < self.error_rate:
+            raise FakeStripeError(500, "Fake Stripe failure", error_type="api_error")
+
+
+def get_fake_stripe(request: Request) -> FakeStripe:
+    return request.app.state.fake_stripe
+
+
+FakeStripeDep = Annotated[FakeStripe, Depends(get_fake_stripe)]
+router = APIRouter()
+
+
+async def read_params(request: Request) -> dict:
+    pairs = parse_qsl(request.url.query, keep_blank_values=True)
+    if request.method == "POST":
+        pairs += parse_qsl((await request.body()).decode(), keep_blank_values=True)
+    return parse_form(pairs)
+
+
+def json_response(obj: Any, status_code: int = 200) -> Response:
+    return Response(orjson.dumps(obj), status_code=status_code, media_type="application/json")
+
+
+@router.post("/v1/checkout/sessions")
+async def create_checkout_session(request: Request, fake: FakeStripeDep) -> Response:
+    params = await read_params(request)
+    return json_response(fake.create_checkout_session(params, request.headers.get("Idempotency-Key")))
+
+
+@router.get("/v1/checkout/sessions/{session_id}")
+async def retrieve_checkout_session(session_id: str, request: Request, fake: FakeStripeDep) -> Response:
+    params = await read_params(request)
+    return json_response(fake.get("checkout.session", session_id, params.get("expand", [])))
+
+
+@router.get("/v1/invoices/{invoice_id}")
+async def retrieve_invoice(invoice_id: str, request: Request, fake: FakeStripeDep) -> Response:
+    params = await read_params(request)
+    return json_response(fake.get("invoice", invoice_id, params.get("expand", [])))
+
+
+@router.get("/v1/subscriptions")
+async def list_subscriptions(request: Request, fake: FakeStripeDep) -> Response:
+    params = await read_params(request)
+    return json_response(fake.list_subscriptions(int(params.get("limit", 10)), params.get("starting_after")))
+
+
+@router.get("/v1/subscriptions/{subscription_id}")
+async def retrieve_subscription(subscription_id: str, request: Request, fake: FakeStripeDep) -> Response:
+    params = await read_params(request)
+    return json_response(fake.get("subscription", subscription_id, params.get("expand", [])))
+
+
+@router.post("/v1/subscriptions/{subscription_id}")
+async def update_subscription(subscription_id: str, request: Request, fake: FakeStripeDep) -> Response:
+    return json_response(fake.update_subscription(subscription_id, await read_params(request)))
+
+
+@router.post("/_fake/checkout/sessions/{session_id}/complete")
+async def complete_checkout_session(
+    session_id: str, fake: FakeStripeDep, duplicates: int = 1, shuffle: bool = False
+) -> Response:
+    events = fake.complete_checkout_session(session_id, duplicates, shuffle)
+    return json_response({"events": [{"id": event["id"], "type": event["type"]} for event in events]})
+
+
+@router.get("/_fake/stats")
+async def get_stats(fake: FakeStripeDep) -> Response:
+    return json_response({"api": fake.api_stats.summary(), "webhooks": fake.webhook_stats.summary()})
+
+
+def stripe_error_response(e: FakeStripeError) -> Response:
+    return json_response({"error": {"type": e.error_type, "message": e.message}}, e.status_code)
+
+
+def create_app(fake: FakeStripe) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        await fake.close()
+
+    app = FastAPI(title="Fake Stripe", lifespan=lifespan)
+    app.state.fake_stripe = fake
+    app.include_router(router)
+
+    @app.exception_handler(FakeStripeError)
+    async def stripe_error(request: Request, e: FakeStripeError) -> Response:
+        return stripe_error_response(e)
+
+    @app.middleware("http")
+    async def stripe_api(request: Request, call_next):
+        if not request.url.path.startswith("/v1/"):
+            return await call_next(request)
+        started_at = time.perf_counter()
+        try:
+            await fake.emulate_network()
+            response = await call_next(request)
+        except FakeStripeError as e:
+            response = stripe_error_response(e)
+        error = f"HTTP {response.status_code}" if response.status_code >= 400 else None
+        fake.api_stats.record(time.perf_counter() - started_at, error)
+        return response
+
+    return app
+
+
+def main() -> None:
+    import uvicorn  # нужен только для запуска сервера
+
+    parser = argparse.ArgumentParser(description="Fake Stripe API for local load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=12111)
+    parser.add_argument("--public-url", help="URL of this server in checkout URLs, defaults to http://host:port")
+    parser.add_argument("--webhook-url", help="app webhook endpoint, webhooks aren't sent without it")
+    parser.add_argument("--webhook-secret", default="whsec_fake", help="STRIPE_WEBHOOK_SECRET_KEY of the app")
+    parser.add_argument("--price-amount", type=int, default=2000, help="amount of every price, cents")
+    parser.add_argument("--latency-ms", type=float, default=0, help="mean latency added to API responses")
+    parser.add_argument("--error-rate", type=float, default=0, help="share of API requests failing with 500")
+    parser.add_argument("--webhook-concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    fake_stripe = FakeStripe(
+        public_url=args.public_url or f"http://{args.host}:{args.port}",
+        webhook_url=args.webhook_url,
+        webhook_secret=args.webhook_secret,
+        price_amount=args.price_amount,
+        latency=args.latency_ms / 1000,
+        error_rate=args.error_rate,
+        webhook_concurrency=args.webhook_concurrency,
+    )
+    uvicorn.run(create_app(fake_stripe), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
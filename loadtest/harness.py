@@ -0,0 +1,215 @@
+"""End-to-end payment load test: signup -> checkout -> webhook storm -> fulfilled membership.
+
+Needs the app configured against the fake Stripe (see README) and running, for example::
+
+    python -m loadtest.fake_stripe --webhook-url http://localhost:8000/api/payments/stripe/webhook
+    python -m loadtest.harness --users 200 --concurrency 50 --clicks 3 --webhook-duplicates 2 --shuffle
+
+Every virtual user registers, logs in, clicks "buy" ``--clicks`` times at once, pays through the fake
+and polls its membership until it is active. Reports p50/p95/p99 latencies and error rates per step.
+"""
+
+import argparse
+import asyncio
+import secrets
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+import httpx
+import orjson
+from loguru import logger
+
+from loadtest.stats import LatencyStats
+
+STEPS = ("register", "login", "checkout", "complete", "fulfillment", "summary")
+
+
+class StepError(Exception):
+    def __init__(self, step: str, reason: str):
+        super().__init__(f"{step}: {reason}")
+        self.step = step
+        self.reason = reason
+
+
+@dataclass
+class LoadTestReport:
+    steps: dict[str, LatencyStats] = field(default_factory=lambda: {step: LatencyStats() for step in STEPS})
+    failed_users: Counter = field(default_factory=Counter)
+    # разные URL на одновременные клики одного пользователя - идемпотентность не сработала
+    duplicate_sessions: int = 0
+    users: int = 0
+    duration: float = 0.0
+    fake_stripe: dict = field(default_factory=dict)
+
+    def format(self) -> str:
+        lines = [
+            f"users: {self.users}, failed: {sum(self.failed_users.values())}, "
+            f"duplicate checkout sessions: {self.duplicate_sessions}, time: {self.duration:.1f}s, "
+            f"throughput: {self.users / self.duration if self.duration else 0:.1f} users/s",
+            f"{'step':<12} {'count':>7} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}",
+        ]
+        for step, stats in [*self.steps.items(), *self._fake_stripe_rows()]:
+            summary = stats if isinstance(stats, dict) else stats.summary()
+            lines.append(
+                f"{step:<12} {summary['count']:>7} {summary['error_rate']:>7.1%} {summary['p50_ms']:>9.1f} "
+                f"{summary['p95_ms']:>9.1f} {summary['p99_ms']:>9.1f} {summary['max_ms']:>9.1f}"
+            )
+        lines.extend(f"failed at {reason}: {count}" for reason, count in self.failed_users.most_common())
+        return "\n".join(lines)
+
+    def _fake_stripe_rows(self) -> list[tuple[str, dict]]:
+        return [(f"stripe {name}", summary) for name, summary in self.fake_stripe.items()]
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, fake_stripe: httpx.AsyncClient, args: argparse.Namespace):
+        self.client = client
+        self.fake_stripe = fake_stripe
+        self.args = args
+        self.email = f"load-{secrets.token_hex(8)}@example.com"
+        self.password = secrets.token_urlsafe(12)
+        self.headers: dict[str, str] = {}
+
+    async def run(self, report: LoadTestReport) -> None:
+        await self.step(report, "register", self.register)
+        await self.step(report, "login", self.login)
+        session_id = await self.step(report, "checkout", self.checkout, report)
+        await self.step(report, "complete", self.complete, session_id)
+        await self.step(report, "fulfillment", self.wait_for_membership)
+        await self.step(report, "summary", self.get_summary, session_id)
+
+    async def step(self, report: LoadTestReport, name: str, action, *args):
+        started_at = time.perf_counter()
+        try:
+            result = await action(*args)
+        except (StepError, httpx.HTTPError) as e:
+            reason = e.reason if isinstance(e, StepError) else type(e).__name__
+            report.steps[name].record(time.perf_counter() - started_at, reason)
+            raise StepError(name, reason) from e
+        report.steps[name].record(time.perf_counter() - started_at)
+        return result
+
+    async def register(self) -> None:
+        data = {
+            "email": self.email,
+            "password": self.password,
+            "repeat_password": self.password,
+            "firstname": "Load",
+            "lastname": "Test",
+            "institution": "Load testing",
+            "role": "tester",
+        }
+        self.check(await self.client.post("/api/auth/register", json=data), 201)
+
+    async def login(self) -> None:
+        response = await self.client.post("/api/auth/login", json={"email": self.email, "password": self.password})
+        self.check(response, 200)
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def checkout(self, report: LoadTestReport) -> str:
+        url = f"/api/memberships/membership-types/{self.args.membership_type_id}/checkout-sessions"
+        responses = await asyncio.gather(
+            *(self.client.post(url, headers=self.headers) for _ in range(self.args.clicks)),
+        )
+        for response in responses:
+            self.check(response, 201)
+        session_urls = {response.json() for response in responses}
+        report.duplicate_sessions += len(session_urls) - 1
+        return min(session_urls).rstrip("/").rsplit("/", 1)[-1]
+
+    async def complete(self, session_id: str) -> None:
+        params = {"duplicates": self.args.webhook_duplicates, "shuffle": str(self.args.shuffle).lower()}
+        self.check(await self.fake_stripe.post(f"/_fake/checkout/sessions/{session_id}/complete", params=params), 200)
+
+    async def wait_for_membership(self) -> None:
+        """Time from the payment to the active membership, i.e. webhook processing"""
+        deadline = time.monotonic() + self.args.timeout
+        while time.monotonic() < deadline:
+            response = await self.client.get(
+                "/api/memberships/user-memberships/current-user-membership", headers=self.headers
+            )
+            self.check(response, 200)
+            membership = response.json()
+            if membership and membership.get("status") == "active" and membership.get("has_access"):
+                return
+            await asyncio.sleep(self.args.poll_interval)
+        raise StepError("fulfillment", "timeout")
+
+    async def get_summary(self, session_id: str) -> None:
+        self.check(await self.client.get(f"/api/payments/checkout-sessions/{session_id}", headers=self.headers), 200)
+
+    @staticmethod
+    def check(response: httpx.Response, status_code: int) -> None:
+        if response.status_code != status_code:
+            raise StepError("", f"HTTP {response.status_code}")
+
+
+async def run_load_test(
+    args: argparse.Namespace,
+    app_transport: httpx.AsyncBaseTransport | None = None,
+    fake_stripe_transport: httpx.AsyncBaseTransport | None = None,
+) -> LoadTestReport:
+    """Transports allow to run the app and the fake Stripe in process"""
+    report = LoadTestReport(users=args.users)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency * max(args.clicks, 1))
+    timeout = httpx.Timeout(args.request_timeout)
+
+    async with (
+        httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout, transport=app_transport) as client,
+        httpx.AsyncClient(
+            base_url=args.fake_stripe_url, timeout=timeout, transport=fake_stripe_transport
+        ) as fake_stripe,
+    ):
+
+        async def run_user() -> None:
+            async with semaphore:
+                try:
+                    await VirtualUser(client, fake_stripe, args).run(report)
+                except StepError as e:
+                    report.failed_users[f"{e.step} ({e.reason})"] += 1
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(run_user() for _ in range(args.users)))
+        report.duration = time.perf_counter() - started_at
+
+        response = await fake_stripe.get("/_fake/stats")
+        if response.status_code == 200:
+            report.fake_stripe = response.json()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Payment flow load test against the fake Stripe")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--fake-stripe-url", default="http://localhost:12111")
+    parser.add_argument("--users", type=int, default=100, help="virtual users, each makes one purchase")
+    parser.add_argument("--concurrency", type=int, default=20, help="users in flight at a time")
+    parser.add_argument("--membership-type-id", type=int, default=1)
+    parser.add_argument("--clicks", type=int, default=1, help="simultaneous checkout requests of a user")
+    parser.add_argument("--webhook-duplicates", type=int, default=1, help="deliveries of every webhook event")
+    parser.add_argument("--shuffle", action="store_true", help="deliver webhooks out of order")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for the active membership")
+    parser.add_argument("--poll-interval", type=float, default=0.2)
+    parser.add_argument("--request-timeout", type=float, default=30)
+    parser.add_argument("--json", action="store_true", help="log the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load_test(args))
+    if args.json:
+        result = {
+            "users": report.users,
+            "failed_users": dict(report.failed_users),
+            "duplicate_sessions": report.duplicate_sessions,
+            "duration": report.duration,
+            "steps": {step: stats.summary() for step, stats in report.steps.items()},
+            "fake_stripe": report.fake_stripe,
+        }
+        logger.info(orjson.dumps(result).decode())
+    else:
+        logger.info("\n" + report.format())
+
+
+if __name__ == "__main__":
+    main()
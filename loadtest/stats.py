@@ -0,0 +1,43 @@
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile, ``q`` in [0, 100]"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q / 100 * len(ordered)) - 1, 0)]
+
+
+@dataclass
+class LatencyStats:
+    """Latencies (seconds) and outcomes of one kind of request"""
+
+    latencies: list[float] = field(default_factory=list)
+    errors: Counter = field(default_factory=Counter)
+
+    @property
+    def count(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+    def record(self, latency: float, error: str | None = None) -> None:
+        self.latencies.append(latency)
+        if error is not None:
+            self.errors[error] += 1
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": dict(self.errors),
+            "error_rate": self.error_count / self.count if self.count else 0.0,
+            "p50_ms": percentile(self.latencies, 50) * 1000,
+            "p95_ms": percentile(self.latencies, 95) * 1000,
+            "p99_ms": percentile(self.latencies, 99) * 1000,
+            "max_ms": max(self.latencies, default=0.0) * 1000,
+        }
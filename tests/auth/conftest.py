@@ -2,7 +2,11 @@ from typing import Any
 
 import pytest
 from faker import Faker
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.domains.permissions.infrastructure import PermissionsUnitOfWork
+from app.domains.permissions.models import Permission
+from app.domains.permissions.services import PermissionsService
 from app.domains.users.infrastructure import UserUnitOfWork
 from app.domains.users.models import User
 
@@ -24,3 +28,30 @@ async def test_user_with_data(
     user = await user_uow.user_repository.create(**user_creation_data)
 
     return user, user_data
+
+
+@pytest.fixture(scope="function")
+def staff_user_factory(user_uow: UserUnitOfWork, faker: Faker):
+    async def _factory() -> User:
+        async with user_uow:
+            return await user_uow.user_repository.create(
+                email=faker.unique.email(),
+                password=faker.password(),
+                firstname=faker.first_name(),
+                lastname=faker.last_name(),
+                institution=faker.company(),
+                role=faker.job(),
+                stuff=True,
+            )
+
+    return _factory
+
+
+@pytest.fixture(scope="function")
+async def manage_permission(test_session: AsyncSession) -> Permission:
+    """``permissions.create`` permission, the catalog is reloaded with it"""
+    permission = Permission(action="permissions.create", name="Create permissions")
+    test_session.add(permission)
+    await test_session.commit()
+    await PermissionsService(PermissionsUnitOfWork(test_session)).load_permission_catalog()
+    return permission
@@ -0,0 +1,99 @@
+import pytest
+from httpx import AsyncClient
+
+from app.domains.permissions.catalog import PermissionSet
+from app.domains.permissions.models import Permission
+from app.domains.shared.deps import create_access_token, create_refresh_token, create_user_access_token
+from app.domains.users.models import User
+from tests.auth.utils import decode_jwt
+
+pytestmark = pytest.mark.anyio
+
+
+def auth_header(token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def test_login_token_contains_claims(client: AsyncClient, test_user_with_data: [User, dict]) -> None:
+    user, user_data = test_user_with_data
+
+    response = await client.post(
+        "api/auth/login", json={"email": user_data["email"], "password": user_data["password"]}
+    )
+
+    payload = decode_jwt(response.json()["access_token"])
+    assert payload["user_id"] == user.id
+    assert payload["stuff"] is False
+    assert payload["permissions"] == 0
+    assert payload["permissions_version"] == 0
+
+
+async def test_admin_is_authorized_by_claims(client: AsyncClient, staff_user_factory) -> None:
+    admin = await staff_user_factory()
+
+    response = await client.get(
+        "api/stuff/users", headers=auth_header(create_user_access_token(admin, PermissionSet()))
+    )
+
+    assert response.status_code == 200
+
+
+async def test_staff_claim_is_required(client: AsyncClient, staff_user_factory) -> None:
+    admin = await staff_user_factory()
+    admin.stuff = False
+
+    response = await client.get(
+        "api/stuff/users", headers=auth_header(create_user_access_token(admin, PermissionSet()))
+    )
+
+    assert response.status_code == 403
+
+
+async def test_token_without_claims_is_not_used_for_authorization(client: AsyncClient, staff_user_factory) -> None:
+    admin = await staff_user_factory()
+    headers = auth_header(create_access_token({"email": admin.email}))
+
+    assert (await client.get("api/users/current-user", headers=headers)).status_code == 200
+    assert (await client.get("api/stuff/users", headers=headers)).status_code == 401
+
+
+async def test_token_is_outdated_after_permissions_change(
+    client: AsyncClient,
+    manage_permission: Permission,
+    staff_user_factory,
+) -> None:
+    permission = manage_permission
+    admin, target = await staff_user_factory(), await staff_user_factory()
+    admin_headers = auth_header(create_user_access_token(admin, PermissionSet.from_ids([permission.id])))
+    target_headers = auth_header(create_user_access_token(target, PermissionSet()))
+
+    assert (await client.get("api/stuff/users", headers=target_headers)).status_code == 200
+
+    response = await client.post(
+        f"api/stuff/users/{target.id}/permissions", headers=admin_headers, json=[permission.id]
+    )
+    assert response.status_code == 200
+
+    response = await client.get("api/stuff/users", headers=target_headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token is outdated"
+
+    response = await client.post(
+        "api/auth/refresh", cookies={"refresh_token": create_refresh_token({"email": target.email})}
+    )
+    access_token = response.json()["access_token"]
+    assert permission.action in PermissionSet(decode_jwt(access_token)["permissions"])
+    assert (await client.get("api/stuff/users", headers=auth_header(access_token))).status_code == 200
+
+
+async def test_required_permission_is_checked(
+    client: AsyncClient,
+    manage_permission: Permission,
+    staff_user_factory,
+) -> None:
+    admin, target = await staff_user_factory(), await staff_user_factory()
+    headers = auth_header(create_user_access_token(admin, PermissionSet()))
+
+    response = await client.post(f"api/stuff/users/{target.id}/permissions", headers=headers, json=[1])
+
+    assert response.status_code == 403
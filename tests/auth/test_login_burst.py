@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.database.setup_db import session_getter
+from app.domains.users.models import User
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_login_burst_doesnt_stall_other_requests(
+    client: AsyncClient,
+    test_user_with_data: [User, dict],
+    test_session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    from app.main import app
+
+    _, user_data = test_user_with_data
+    credentials = {"email": user_data["email"], "password": user_data["password"]}
+    await client.post("api/auth/login", json=credentials)
+
+    # параллельным запросам нужны отдельные сессии, общая тестовая сессия это не поддерживает
+    async def request_session_getter():
+        async with test_session_factory() as session:
+            yield session
+
+    app.dependency_overrides[session_getter] = request_session_getter
+    latencies = []
+
+    async def healthchecks() -> None:
+        for _ in range(10):
+            started_at = time.perf_counter()
+            await client.get("/healthcheck")
+            latencies.append(time.perf_counter() - started_at)
+            await asyncio.sleep(0.05)
+
+    started_at = time.perf_counter()
+    responses, _ = await asyncio.gather(
+        asyncio.gather(*(client.post("api/auth/login", json=credentials) for _ in range(4))),
+        healthchecks(),
+    )
+    burst_duration = time.perf_counter() - started_at
+
+    assert all(response.status_code == 200 for response in responses)
+    # без пула каждый вход блокировал бы цикл на все время bcrypt
+    assert max(latencies) < burst_duration / 4
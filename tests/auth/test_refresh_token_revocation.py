@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+import pytest
+from faker import Faker
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domains.auth.infrastructure import AuthUnitOfWork
+from app.domains.auth.models import RevokedToken
+from app.domains.auth.revocation import revoked_token_filter
+from app.domains.auth.services import AuthService, RevokedTokenService
+from app.domains.shared.deps import create_refresh_token, get_refresh_token_payload
+from tests.auth.utils import decode_jwt
+
+pytestmark = pytest.mark.anyio
+
+AuthenticationDataFactory = Callable[[], Awaitable[tuple[dict[str, str], dict[str, str], str]]]
+
+
+async def test_refresh_token_has_jti_and_iat():
+    payload = decode_jwt(create_refresh_token({"email": "user@example.com"}))
+
+    assert len(payload["jti"]) == 32
+    assert payload["iat"] <= datetime.now(tz=timezone.utc).timestamp()
+
+
+async def test_logout_revokes_refresh_token(
+    client: AsyncClient,
+    authentication_data_factory: AuthenticationDataFactory,
+):
+    authorization_header, refresh_token_cookie, email = await authentication_data_factory()
+    other_session_cookie = {"refresh_token": create_refresh_token({"email": email})}
+
+    response = await client.post("api/auth/logout", headers=authorization_header, cookies=refresh_token_cookie)
+    assert response.status_code == 200
+
+    response = await client.post("api/auth/refresh", cookies=refresh_token_cookie)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Refresh token is revoked"
+
+    # другие сессии пользователя не затронуты
+    response = await client.post("api/auth/refresh", cookies=other_session_cookie)
+    assert response.status_code == 200
+
+
+async def test_password_change_revokes_issued_refresh_tokens(
+    client: AsyncClient,
+    test_session: AsyncSession,
+    authentication_data_factory: AuthenticationDataFactory,
+):
+    _, refresh_token_cookie, email = await authentication_data_factory()
+
+    await AuthService(AuthUnitOfWork(test_session)).change_password(email, "new-password")
+
+    response = await client.post("api/auth/refresh", cookies=refresh_token_cookie)
+    assert response.status_code == 401
+
+    response = await client.post("api/auth/refresh", cookies={"refresh_token": create_refresh_token({"email": email})})
+    assert response.status_code == 200
+
+
+async def test_token_revoked_by_other_worker_is_rejected_after_sync(
+    client: AsyncClient,
+    test_session: AsyncSession,
+    authentication_data_factory: AuthenticationDataFactory,
+):
+    _, refresh_token_cookie, _ = await authentication_data_factory()
+    service = RevokedTokenService(AuthUnitOfWork(test_session))
+    await service.load_filter()
+    payload = get_refresh_token_payload(refresh_token_cookie["refresh_token"])
+
+    # строка, добавленная другим воркером, в фильтр этого воркера не попала
+    test_session.add(RevokedToken(jti=payload["jti"], expires_at=datetime.fromtimestamp(payload["exp"], timezone.utc)))
+    await test_session.commit()
+    assert not revoked_token_filter.might_be_revoked(payload["jti"])
+
+    await service.sync_filter()
+
+    assert revoked_token_filter.might_be_revoked(payload["jti"])
+    response = await client.post("api/auth/refresh", cookies=refresh_token_cookie)
+    assert response.status_code == 401
+
+
+@pytest.mark.usefixtures("setup_database")
+async def test_compaction_deletes_expired_tokens(test_session: AsyncSession, faker: Faker):
+    expired_jti, active_jti = faker.uuid4(cast_to=None).hex, faker.uuid4(cast_to=None).hex
+    now = datetime.now(tz=timezone.utc)
+    test_session.add_all(
+        [
+            RevokedToken(jti=expired_jti, expires_at=now - timedelta(minutes=1)),
+            RevokedToken(jti=active_jti, expires_at=now + timedelta(days=1)),
+        ]
+    )
+    await test_session.commit()
+
+    await RevokedTokenService(AuthUnitOfWork(test_session)).compact()
+
+    jtis = (await test_session.scalars(select(RevokedToken.jti))).all()
+    assert expired_jti not in jtis
+    assert active_jti in jtis
+    assert revoked_token_filter.might_be_revoked(active_jti)
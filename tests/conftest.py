@@ -3,6 +3,7 @@ from tests.fixtures.faker import *  # noqa
 from tests.fixtures.database import *  # noqa
 from tests.fixtures.uow import *  # noqa
 from tests.fixtures.auth import *  # noqa
+from tests.fixtures.memberships import *  # noqa
 
 pytest_plugins = ("anyio",)
 
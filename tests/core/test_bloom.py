@@ -0,0 +1,29 @@
+from app.core.utils.bloom import BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"item-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    assert len(bloom) == 1000
+    assert bloom.is_full
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"item-{i}")
+
+    false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+
+    assert false_positives < 300
+
+
+def test_empty_bloom_filter():
+    bloom = BloomFilter(capacity=10)
+
+    assert "item" not in bloom
+    assert not bloom.is_full
@@ -0,0 +1,69 @@
+import pytest
+from faker import Faker
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domains.permissions.infrastructure import PermissionsUnitOfWork
+
+pytestmark = [pytest.mark.anyio, pytest.mark.usefixtures("setup_database")]
+
+
+@pytest.fixture()
+def permissions_uow(test_session: AsyncSession) -> PermissionsUnitOfWork:
+    return PermissionsUnitOfWork(test_session)
+
+
+def make_permissions_data(faker: Faker, count: int) -> list[dict]:
+    return [{"action": faker.unique.pystr(max_chars=30), "name": faker.word()} for _ in range(count)]
+
+
+async def test_bulk_create_in_chunks(permissions_uow: PermissionsUnitOfWork, faker: Faker) -> None:
+    rows = make_permissions_data(faker, 5)
+
+    async with permissions_uow:
+        permissions = await permissions_uow.permission_repository.bulk_create(rows, chunk_size=2)
+
+    assert [permission.action for permission in permissions] == [row["action"] for row in rows]
+    assert all(permission.id is not None for permission in permissions)
+
+
+async def test_bulk_update(permissions_uow: PermissionsUnitOfWork, faker: Faker) -> None:
+    async with permissions_uow:
+        permissions = await permissions_uow.permission_repository.bulk_create(make_permissions_data(faker, 3))
+        update_data = {permission.id: {"name": faker.unique.word()} for permission in permissions[:2]}
+        await permissions_uow.permission_repository.bulk_update(update_data)
+
+    async with permissions_uow:
+        for permission in permissions:
+            updated = await permissions_uow.permission_repository.get_first_by_kwargs(id=permission.id)
+            expected_name = update_data[permission.id]["name"] if permission.id in update_data else permission.name
+            assert updated.name == expected_name
+
+
+async def test_upsert_updates_conflicting_rows(permissions_uow: PermissionsUnitOfWork, faker: Faker) -> None:
+    async with permissions_uow:
+        existing = (await permissions_uow.permission_repository.bulk_create(make_permissions_data(faker, 1)))[0]
+        new_name = faker.unique.word()
+        rows = [{"id": existing.id, "action": existing.action, "name": new_name}, *make_permissions_data(faker, 1)]
+        permissions = await permissions_uow.permission_repository.upsert(rows, update_fields=("name",))
+
+    assert len(permissions) == 2
+    assert permissions[0].id == existing.id
+    assert permissions[0].name == new_name
+
+
+async def test_upsert_skips_conflicting_rows(permissions_uow: PermissionsUnitOfWork, faker: Faker) -> None:
+    async with permissions_uow:
+        existing = (await permissions_uow.permission_repository.bulk_create(make_permissions_data(faker, 1)))[0]
+        rows = [{"id": existing.id, "action": faker.pystr(), "name": faker.word()}]
+        permissions = await permissions_uow.permission_repository.upsert(rows, update_fields=())
+
+    assert permissions == []
+
+
+async def test_bulk_remove(permissions_uow: PermissionsUnitOfWork, faker: Faker) -> None:
+    async with permissions_uow:
+        permissions = await permissions_uow.permission_repository.bulk_create(make_permissions_data(faker, 3))
+        ids = [permission.id for permission in permissions]
+        removed_ids = await permissions_uow.permission_repository.bulk_remove([*ids, max(ids) + 1000], chunk_size=2)
+
+    assert sorted(removed_ids) == sorted(ids)
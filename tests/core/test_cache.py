@@ -0,0 +1,35 @@
+import time
+
+from app.core.utils.cache import TTLCache
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_entry_expires(monkeypatch) -> None:
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_value_loaded_before_invalidation_is_not_stored() -> None:
+    cache = TTLCache(maxsize=2, ttl=60)
+    generation = cache.generation
+
+    cache.pop_where(lambda value: value == 1)
+    cache.set("a", 1, generation)
+
+    assert cache.get("a") is None
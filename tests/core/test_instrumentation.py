@@ -0,0 +1,27 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core.database.instrumentation import QueryStats
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_response_contains_query_stats(client: AsyncClient) -> None:
+    response = await client.get("api/users/")
+
+    assert response.status_code == 200
+    assert int(response.headers["X-DB-Queries"]) >= 2
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+
+
+async def test_request_without_queries(client: AsyncClient) -> None:
+    response = await client.get("/healthcheck")
+
+    assert response.headers["X-DB-Queries"] == "0"
+
+
+def test_repeated_statements_are_reported() -> None:
+    stats = QueryStats()
+    stats.statements.update(["SELECT users WHERE id = $1"] * 5 + ["SELECT news"])
+
+    assert stats.get_repeated_statements(threshold=5) == [("SELECT users WHERE id = $1", 5)]
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.common.password_hasher import PasswordHasher
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_hash_and_verify() -> None:
+    hasher = PasswordHasher(max_workers=1, queue_warning_seconds=10)
+
+    password_hash = await hasher.hash("secret")
+
+    assert await hasher.verify("secret", password_hash)
+    assert not await hasher.verify("wrong", password_hash)
+
+
+async def test_calls_over_the_cap_wait_in_queue() -> None:
+    hasher = PasswordHasher(max_workers=1, queue_warning_seconds=10)
+
+    started, release = threading.Event(), threading.Event()
+
+    def blocking_job() -> None:
+        started.set()
+        release.wait(timeout=10)
+
+    first = asyncio.create_task(hasher._run(blocking_job))
+    second = asyncio.create_task(hasher.hash("second"))
+    assert await asyncio.to_thread(started.wait, 10)
+
+    # первая задача занимает единственный поток, второй хэш ждет в очереди
+    assert hasher.stats.pending == 2
+    assert hasher.stats.calls == 0
+    release.set()
+    await asyncio.gather(first, second)
+
+    assert hasher.stats.calls == 2
+    assert hasher.stats.pending == 0
+    assert hasher.stats.max_queue_time > 0
+
+
+async def test_event_loop_is_not_blocked() -> None:
+    hasher = PasswordHasher(max_workers=2, queue_warning_seconds=10)
+    max_lag = 0.0
+
+    async def ticker(stop: asyncio.Event) -> None:
+        nonlocal max_lag
+        while not stop.is_set():
+            started_at = time.perf_counter()
+            await asyncio.sleep(0.01)
+            max_lag = max(max_lag, time.perf_counter() - started_at - 0.01)
+
+    stop = asyncio.Event()
+    ticker_task = asyncio.create_task(ticker(stop))
+    await asyncio.gather(*(hasher.hash("secret") for _ in range(3)))
+    stop.set()
+    await ticker_task
+
+    assert max_lag < 0.1
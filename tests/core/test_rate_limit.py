@@ -0,0 +1,89 @@
+import pytest
+from faker import Faker
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.common.password_hasher import password_hasher
+from app.core.common.rate_limit import MemoryRateLimitBackend, PostgresRateLimitBackend, Rate
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_memory_bucket_allows_burst_then_waits() -> None:
+    backend = MemoryRateLimitBackend()
+    rate = Rate.parse("3/60")
+
+    assert [await backend.hit("key", rate) for _ in range(3)] == [0, 0, 0]
+    assert 19 < await backend.hit("key", rate) <= 20
+    assert await backend.hit("other", rate) == 0
+
+
+@pytest.mark.usefixtures("setup_database")
+async def test_postgres_buckets_are_shared(test_engine: AsyncEngine, faker: Faker) -> None:
+    first_node, second_node = PostgresRateLimitBackend(test_engine), PostgresRateLimitBackend(test_engine)
+    key, rate = faker.pystr(), Rate.parse("2/60")
+
+    assert await first_node.hit(key, rate) == 0
+    assert await second_node.hit(key, rate) == 0
+    assert 29 < await first_node.hit(key, rate) <= 30
+
+
+async def test_login_is_limited_per_account(client: AsyncClient, faker: Faker) -> None:
+    credentials = {"email": faker.unique.email(), "password": faker.password()}
+    allowed = Rate.parse(settings.RATE_LIMIT_LOGIN_ACCOUNT).count
+
+    for _ in range(allowed):
+        assert (await client.post("api/auth/login", json=credentials)).status_code == 401
+    response = await client.post("api/auth/login", json={**credentials, "email": credentials["email"].upper()})
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+async def test_login_is_limited_per_ip(client: AsyncClient, faker: Faker, monkeypatch) -> None:
+    # ASGITransport передает адрес клиента 127.0.0.1, здесь он играет роль nginx
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_X_REAL_IP", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", "127.0.0.0/8")
+    allowed = Rate.parse(settings.RATE_LIMIT_LOGIN_IP).count
+
+    for _ in range(allowed):
+        await client.post("api/auth/login", json={"email": faker.unique.email(), "password": "x"})
+    limited = await client.post("api/auth/login", json={"email": faker.unique.email(), "password": "x"})
+    other_ip = await client.post(
+        "api/auth/login", json={"email": faker.unique.email(), "password": "x"}, headers={"X-Real-IP": "10.0.0.2"}
+    )
+
+    assert limited.status_code == 429
+    assert other_ip.status_code == 401
+
+
+@pytest.mark.parametrize(("trust_x_real_ip", "trusted_proxies"), [(False, "127.0.0.1"), (True, ""), (True, "10.0.0.1")])
+async def test_x_real_ip_of_untrusted_client_is_ignored(
+    client: AsyncClient, faker: Faker, monkeypatch, trust_x_real_ip: bool, trusted_proxies: str
+) -> None:
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_X_REAL_IP", trust_x_real_ip)
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", trusted_proxies)
+    allowed = Rate.parse(settings.RATE_LIMIT_LOGIN_IP).count
+
+    statuses = [
+        (
+            await client.post(
+                "api/auth/login",
+                json={"email": faker.unique.email(), "password": "x"},
+                headers={"X-Real-IP": f"10.0.1.{index}"},
+            )
+        ).status_code
+        for index in range(allowed + 1)
+    ]
+
+    assert statuses[-1] == 429
+
+
+async def test_login_is_shed_when_hashing_queue_is_full(client: AsyncClient, faker: Faker, monkeypatch) -> None:
+    monkeypatch.setattr(password_hasher.stats, "pending", settings.PASSWORD_HASHING_MAX_PENDING)
+
+    response = await client.post("api/auth/login", json={"email": faker.unique.email(), "password": "x"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
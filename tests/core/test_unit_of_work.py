@@ -0,0 +1,68 @@
+import pytest
+from faker import Faker
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database.setup_db import async_engine, session_getter
+from app.domains.users.infrastructure import UserUnitOfWork
+
+pytestmark = [pytest.mark.anyio, pytest.mark.usefixtures("setup_database")]
+
+
+def make_user_data(faker: Faker) -> dict:
+    return {
+        "email": faker.unique.email(),
+        "password": faker.password(),
+        "firstname": faker.first_name(),
+        "lastname": faker.last_name(),
+        "institution": faker.company(),
+        "role": faker.job(),
+    }
+
+
+async def test_inner_block_is_rolled_back_to_savepoint(test_session: AsyncSession, faker: Faker) -> None:
+    outer_uow, inner_uow = UserUnitOfWork(test_session), UserUnitOfWork(test_session)
+    outer_data, inner_data = make_user_data(faker), make_user_data(faker)
+
+    async with outer_uow:
+        await outer_uow.user_repository.create(**outer_data)
+        with pytest.raises(ValueError):
+            async with inner_uow:
+                await inner_uow.user_repository.create(**inner_data)
+                await test_session.flush()
+                raise ValueError
+
+    async with outer_uow:
+        assert await outer_uow.user_repository.get_first_by_kwargs(email=outer_data["email"]) is not None
+        assert await outer_uow.user_repository.get_first_by_kwargs(email=inner_data["email"]) is None
+
+
+async def test_only_outermost_block_commits(test_session: AsyncSession, faker: Faker) -> None:
+    outer_uow, inner_uow = UserUnitOfWork(test_session), UserUnitOfWork(test_session)
+    user_data = make_user_data(faker)
+
+    with pytest.raises(ValueError):
+        async with outer_uow:
+            async with inner_uow:
+                await inner_uow.user_repository.create(**user_data)
+            assert test_session.in_transaction()
+            raise ValueError
+
+    async with outer_uow:
+        assert await outer_uow.user_repository.get_first_by_kwargs(email=user_data["email"]) is None
+
+
+async def test_request_session_holds_connection_only_inside_outermost_block(faker: Faker) -> None:
+    getter = session_getter()
+    session = await getter.__anext__()
+    uow = UserUnitOfWork(session)
+    checked_out = async_engine.pool.checkedout()
+
+    try:
+        assert async_engine.pool.checkedout() == checked_out
+        async with uow:
+            async with uow:
+                await uow.user_repository.create(**make_user_data(faker))
+            assert async_engine.pool.checkedout() == checked_out + 1
+        assert async_engine.pool.checkedout() == checked_out
+    finally:
+        await getter.aclose()
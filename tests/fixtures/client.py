@@ -12,8 +12,15 @@ async def client(
     insert_test_data: None,
     test_session: AsyncSession,
 ) -> AsyncClient:
+    from app.core.common.rate_limit import rate_limit_backend
+    from app.domains.memberships.catalog import membership_type_catalog
     from app.main import app
 
+    # лимиты считаются заново в каждом тесте, иначе тесты исчерпывают их друг за друга
+    rate_limit_backend.reset()
+    # фикстуры добавляют типы членства в обход update_membership_type, версия каталога не меняется
+    membership_type_catalog.invalidate()
+
     async def test_session_getter() -> AsyncIterator[AsyncSession]:
         yield test_session
 
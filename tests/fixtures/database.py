@@ -35,6 +35,10 @@ async def setup_database(test_engine: AsyncEngine) -> AsyncIterator[None]:
     """Setups database"""
     from app.domains.news.models import News  # noqa raises Mapper initialization errors withot this import
     from app.domains.memberships.models import UserMembership, MembershipType  # noqa
+    from app.core.common.rate_limit import rate_limits_table  # noqa
+    from app.core.database.versions import catalog_versions_table  # noqa
+    from app.domains.auth.models import RevokedToken  # noqa
+    from app.domains.payments.models import StripeEvent  # noqa
 
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
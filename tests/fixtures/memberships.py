@@ -0,0 +1,47 @@
+from typing import Awaitable, Callable
+
+import pytest
+from faker import Faker
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domains.memberships.infrastructure import MembershipUnitOfWork
+from app.domains.memberships.models import MembershipType, UserMembership
+from app.domains.users.models import User
+
+pytestmark = pytest.mark.anyio
+
+MembershipFactory = Callable[..., Awaitable[UserMembership]]
+
+
+@pytest.fixture()
+def create_membership(
+    membership_uow: MembershipUnitOfWork,
+    test_session: AsyncSession,
+    insert_test_data: None,
+    faker: Faker,
+) -> MembershipFactory:
+    """Creates a membership of the first membership type with ``fields``.
+
+    The membership belongs to the user with ``email``, or to a new user if no email is passed.
+    """
+
+    async def _create(email: str | None = None, **fields) -> UserMembership:
+        async with membership_uow:
+            if email is None:
+                user = await membership_uow.user_repository.create(
+                    email=faker.unique.email(),
+                    password=faker.password(),
+                    firstname=faker.first_name(),
+                    lastname=faker.last_name(),
+                    institution=faker.company(),
+                    role=faker.job(),
+                )
+            else:
+                user = await test_session.scalar(select(User).where(User.email == email))
+            membership_type = await test_session.scalar(select(MembershipType).limit(1))
+            return await membership_uow.user_membership_repository.create(
+                user_id=user.id, membership_type_id=membership_type.id, **fields
+            )
+
+    return _create
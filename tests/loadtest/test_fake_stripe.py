@@ -0,0 +1,165 @@
+import httpx
+import orjson
+import pytest
+import stripe
+
+from app.domains.payments.gateway import StripeGateway
+from loadtest.fake_stripe import FakeStripe, create_app, parse_form
+from loadtest.stats import LatencyStats, percentile
+
+pytestmark = pytest.mark.anyio
+
+FAKE_STRIPE_URL = "http://fake-stripe:12111"
+WEBHOOK_SECRET = "whsec_load_test"
+
+
+def _gateway(fake: FakeStripe) -> StripeGateway:
+    transport = httpx.ASGITransport(app=create_app(fake))
+    return StripeGateway(api_key="sk_test_fake", api_base=FAKE_STRIPE_URL, transport=transport)
+
+
+def _checkout_params(user_membership_id: int = 7) -> dict:
+    metadata = {"user_membership_id": str(user_membership_id)}
+    return {
+        "mode": "subscription",
+        "line_items": [{"price": "price_annual", "quantity": 1}],
+        "metadata": metadata,
+        "subscription_data": {"metadata": metadata},
+        "customer_email": "member@example.com",
+    }
+
+
+def test_parse_form():
+    pairs = [
+        ("mode", "subscription"),
+        ("line_items[0][price]", "price_1"),
+        ("line_items[0][quantity]", "1"),
+        ("metadata[user_membership_id]", "7"),
+        ("expand[0]", "subscription"),
+        ("expand[1]", "invoice"),
+    ]
+
+    assert parse_form(pairs) == {
+        "mode": "subscription",
+        "line_items": [{"price": "price_1", "quantity": "1"}],
+        "metadata": {"user_membership_id": "7"},
+        "expand": ["subscription", "invoice"],
+    }
+
+
+def test_latency_stats():
+    stats = LatencyStats()
+    for latency in range(1, 101):
+        stats.record(latency / 1000, "HTTP 500" if latency % 10 == 0 else None)
+
+    summary = stats.summary()
+
+    assert percentile([], 50) == 0.0
+    assert (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"]) == pytest.approx((50, 95, 99))
+    assert summary["error_rate"] == pytest.approx(0.1)
+    assert summary["errors"] == {"HTTP 500": 10}
+
+
+async def test_gateway_checkout_flow():
+    fake = FakeStripe(public_url=FAKE_STRIPE_URL)
+    gateway = _gateway(fake)
+
+    session = await gateway.create_checkout_session(_checkout_params(), idempotency_key="checkout-7")
+    repeated = await gateway.create_checkout_session(_checkout_params(), idempotency_key="checkout-7")
+    fake.complete_checkout_session(session.id)
+    completed = await gateway.retrieve_checkout_session(session.id, expand=["subscription", "invoice", "customer"])
+    invoice = await gateway.retrieve_invoice(completed["invoice"]["id"], expand=["subscription", "customer"])
+    subscription = await gateway.retrieve_subscription(completed["subscription"]["id"])
+    await gateway.close()
+
+    assert repeated.id == session.id
+    assert session.url == f"{FAKE_STRIPE_URL}/c/pay/{session.id}"
+    assert completed["status"] == "complete"
+    assert completed["customer"]["email"] == "member@example.com"
+    assert invoice["billing_reason"] == "subscription_create"
+    assert invoice["customer"]["id"] == completed["customer"]["id"]
+    assert invoice["parent"]["subscription_details"]["metadata"]["user_membership_id"] == "7"
+    assert invoice["lines"]["data"][0]["pricing"]["price_details"]["price"] == "price_annual"
+    assert subscription["status"] == "active"
+    assert subscription["items"]["data"][0]["current_period_end"] > completed["created"]
+
+
+async def test_list_subscriptions_pagination():
+    fake = FakeStripe(public_url=FAKE_STRIPE_URL)
+    gateway = _gateway(fake)
+    for user_membership_id in range(3):
+        session = await gateway.create_checkout_session(_checkout_params(user_membership_id))
+        fake.complete_checkout_session(session.id)
+
+    first_page = await gateway.list_subscriptions({"status": "all", "limit": 2})
+    second_page = await gateway.list_subscriptions(
+        {"status": "all", "limit": 2, "starting_after": first_page.data[-1].id}
+    )
+    await gateway.close()
+
+    assert first_page.has_more and not second_page.has_more
+    # новые подписки первыми
+    metadata_ids = [subscription.metadata["user_membership_id"] for subscription in first_page.data + second_page.data]
+    assert metadata_ids == ["2", "1", "0"]
+
+
+async def test_unknown_object_is_not_found():
+    gateway = _gateway(FakeStripe(public_url=FAKE_STRIPE_URL))
+
+    with pytest.raises(stripe.InvalidRequestError):
+        await gateway.retrieve_invoice("in_missing")
+    await gateway.close()
+
+
+async def test_webhooks_are_signed_and_duplicated():
+    deliveries = []
+
+    def webhook_endpoint(request: httpx.Request) -> httpx.Response:
+        deliveries.append(request)
+        return httpx.Response(200)
+
+    fake = FakeStripe(
+        public_url=FAKE_STRIPE_URL,
+        webhook_url="http://app/api/payments/stripe/webhook",
+        webhook_secret=WEBHOOK_SECRET,
+        webhook_transport=httpx.MockTransport(webhook_endpoint),
+    )
+    session = fake.create_checkout_session(_checkout_params())
+
+    events = fake.complete_checkout_session(session["id"], duplicates=2, shuffle=True)
+    await fake.close()
+
+    delivered = [
+        stripe.Webhook.construct_event(request.content, request.headers["Stripe-Signature"], WEBHOOK_SECRET)
+        for request in deliveries
+    ]
+    assert len(delivered) == 2 * len(events)
+    assert {event.type for event in delivered} == {
+        "checkout.session.completed",
+        "customer.subscription.created",
+        "customer.subscription.updated",
+        "invoice.paid",
+    }
+    assert fake.webhook_stats.count == len(deliveries) and fake.webhook_stats.error_count == 0
+
+
+async def test_failed_webhooks_are_retried():
+    responses = iter([httpx.Response(500), httpx.Response(200)])
+    deliveries = []
+
+    def webhook_endpoint(request: httpx.Request) -> httpx.Response:
+        deliveries.append(orjson.loads(request.content)["id"])
+        return next(responses)
+
+    fake = FakeStripe(
+        public_url=FAKE_STRIPE_URL,
+        webhook_url="http://app/api/payments/stripe/webhook",
+        webhook_backoff=0,
+        webhook_transport=httpx.MockTransport(webhook_endpoint),
+    )
+
+    fake.deliver([fake._event("customer.subscription.updated", {"id": "sub_1", "object": "subscription"})])
+    await fake.close()
+
+    assert len(deliveries) == 2 and deliveries[0] == deliveries[1]
+    assert fake.webhook_stats.errors == {"HTTP 500": 1}
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+import stripe
+from faker import Faker
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.domains.memberships.infrastructure import MembershipUnitOfWork
+from app.domains.memberships.models import UserMembership
+from app.domains.memberships.routes.api import create_checkout_session
+from app.domains.memberships.services import MembershipService
+from app.domains.memberships.utils.checkout_session_utils import (
+    CHECKOUT_SESSION_EXPIRY_MARGIN_SECONDS,
+    CHECKOUT_SESSION_WINDOW_SECONDS,
+    get_checkout_session_idempotency,
+)
+from app.domains.payments.gateway import get_stripe_gateway
+from app.domains.users.infrastructure import UserUnitOfWork
+from app.domains.users.models import User
+from app.main import app
+
+pytestmark = [pytest.mark.anyio, pytest.mark.usefixtures("setup_database")]
+
+
+class FakeCheckoutGateway:
+    """Creates one session per idempotency key, like Stripe does"""
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.calls: list[tuple[dict, str | None]] = []
+        self.sessions: dict[str, stripe.checkout.Session] = {}
+
+    async def create_checkout_session(self, params: dict, idempotency_key: str | None = None, timeout=None):
+        self.calls.append((params, idempotency_key))
+        await asyncio.sleep(self.delay)
+        if idempotency_key not in self.sessions:
+            session_id = f"cs_test_{len(self.sessions)}_{idempotency_key}"
+            self.sessions[idempotency_key] = stripe.checkout.Session.construct_from(
+                {"id": session_id, "object": "checkout.session", "url": f"https://checkout.stripe.com/c/{session_id}"},
+                "sk_test",
+            )
+        return self.sessions[idempotency_key]
+
+
+@pytest.fixture
+def fake_gateway():
+    gateway = FakeCheckoutGateway()
+    app.dependency_overrides[get_stripe_gateway] = lambda: gateway
+    yield gateway
+    app.dependency_overrides.pop(get_stripe_gateway, None)
+
+
+async def test_concurrent_requests_share_one_session(
+    test_session_factory: async_sessionmaker[AsyncSession],
+    user_uow: UserUnitOfWork,
+    insert_test_data: None,
+    faker: Faker,
+):
+    async with user_uow:
+        user = await user_uow.user_repository.create(
+            email=faker.unique.email(),
+            password=faker.password(),
+            firstname=faker.first_name(),
+            lastname=faker.last_name(),
+            institution=faker.company(),
+            role=faker.job(),
+        )
+    gateway = FakeCheckoutGateway(delay=0.2)
+
+    async def request() -> str:
+        # у каждого запроса своя сессия, как в приложении
+        async with test_session_factory() as session:
+            service = MembershipService(MembershipUnitOfWork(session))
+            current_user = await session.get(User, user.id)
+            return await create_checkout_session(1, service, gateway, current_user)
+
+    urls = await asyncio.gather(*[request() for _ in range(3)])
+
+    assert len(gateway.calls) == 1
+    assert len(set(urls)) == 1
+    async with test_session_factory() as session:
+        memberships = (await session.scalars(select(UserMembership).where(UserMembership.user_id == user.id))).all()
+    assert [membership.checkout_url for membership in memberships] == urls[:1]
+
+
+async def test_checkout_session_uses_idempotency_key(
+    client: AsyncClient,
+    fake_gateway: FakeCheckoutGateway,
+    authentication_data: tuple[dict[str, str], dict[str, str], str],
+    membership_uow: MembershipUnitOfWork,
+):
+    headers, _, email = authentication_data
+
+    first = await client.post("api/memberships/membership-types/1/checkout-sessions", headers=headers)
+    second = await client.post("api/memberships/membership-types/1/checkout-sessions", headers=headers)
+
+    async with membership_uow:
+        user = await membership_uow.user_repository.get_first_by_kwargs(email=email)
+        membership = await membership_uow.user_membership_repository.get_first_by_kwargs(user_id=user.id)
+    params, idempotency_key = fake_gateway.calls[0]
+    expected_key, expires_at = get_checkout_session_idempotency(membership.id, params["line_items"][0]["price"])
+    assert (first.status_code, second.status_code) == (201, 201)
+    assert first.json() == second.json() == membership.checkout_url
+    assert len(fake_gateway.calls) == 1
+    assert (idempotency_key, params["expires_at"]) == (expected_key, expires_at)
+    assert membership.checkout_session_expires_at.timestamp() == expires_at
+
+
+def test_idempotency_key_is_stable_within_window():
+    window_start = 1_800_000_000 // CHECKOUT_SESSION_WINDOW_SECONDS * CHECKOUT_SESSION_WINDOW_SECONDS
+    first_key, first_expires_at = get_checkout_session_idempotency(1, "price_1", window_start)
+    last_key, last_expires_at = get_checkout_session_idempotency(1, "price_1", window_start + 1799)
+    next_key, _ = get_checkout_session_idempotency(1, "price_1", window_start + 1800)
+
+    assert (first_key, first_expires_at) == (last_key, last_expires_at)
+    assert next_key != first_key
+    assert get_checkout_session_idempotency(1, "price_2", window_start)[0] != first_key
+    assert get_checkout_session_idempotency(2, "price_1", window_start)[0] != first_key
+
+
+def test_expires_at_has_margin_at_window_end():
+    window = 1_800_000_000 // CHECKOUT_SESSION_WINDOW_SECONDS
+    now = (window + 1) * CHECKOUT_SESSION_WINDOW_SECONDS - 1
+
+    _, expires_at = get_checkout_session_idempotency(1, "price_1", now)
+
+    # Stripe отклоняет expires_at раньше чем через 30 минут, запас - на задержки и повторы запроса
+    assert expires_at - now >= CHECKOUT_SESSION_WINDOW_SECONDS + CHECKOUT_SESSION_EXPIRY_MARGIN_SECONDS
+    assert expires_at - now < 24 * 3600
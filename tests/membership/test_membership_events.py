@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.domains.memberships.infrastructure import MembershipUnitOfWork
+from app.domains.memberships.models import MembershipStatusEnum
+from app.domains.memberships.notifications import (
+    MembershipUpdatesBroker,
+    TooManyStreamsError,
+    membership_updates_broker,
+    stream_membership_updates,
+)
+from app.domains.memberships.services import MembershipService
+from app.domains.users.infrastructure import UserUnitOfWork
+from tests.fixtures.memberships import MembershipFactory
+
+pytestmark = [pytest.mark.anyio, pytest.mark.usefixtures("setup_database")]
+
+
+@pytest.fixture()
+async def broker(test_engine: AsyncEngine) -> MembershipUpdatesBroker:
+    broker = MembershipUpdatesBroker(test_engine, max_streams=10, max_streams_per_user=2)
+    yield broker
+    await broker.stop()
+
+
+async def test_committed_update_is_delivered(
+    broker: MembershipUpdatesBroker,
+    create_membership: MembershipFactory,
+    membership_uow: MembershipUnitOfWork,
+):
+    membership = await create_membership(status=MembershipStatusEnum.INCOMPLETE)
+    subscription = broker.subscribe(membership.user_id)
+    other_subscription = broker.subscribe(membership.user_id + 1)
+    await broker.start()
+
+    await MembershipService(membership_uow).update_user_membership(
+        membership.id, {"status": MembershipStatusEnum.ACTIVE}
+    )
+
+    message = await asyncio.wait_for(subscription.queue.get(), 5)
+    assert message == {"user_id": membership.user_id, "user_membership_id": membership.id}
+    assert other_subscription.queue.empty()
+
+
+async def test_rolled_back_update_is_not_delivered(
+    broker: MembershipUpdatesBroker,
+    create_membership: MembershipFactory,
+    membership_uow: MembershipUnitOfWork,
+):
+    membership = await create_membership(status=MembershipStatusEnum.INCOMPLETE)
+    subscription = broker.subscribe(membership.user_id)
+    await broker.start()
+
+    with pytest.raises(ValueError):
+        async with membership_uow:
+            await membership_uow.user_membership_repository.notify_updated(membership)
+            raise ValueError
+
+    await asyncio.sleep(0.5)
+    assert subscription.queue.empty()
+
+
+async def test_broker_reconnects_after_connection_loss(broker: MembershipUpdatesBroker):
+    subscription = broker.subscribe(1)
+    await broker.start()
+    await broker._connection.sync_connection.connection.driver_connection.close()
+
+    await broker.start()
+    await broker._connection.exec_driver_sql('NOTIFY membership_updates, \'{"user_id": 1, "user_membership_id": 2}\'')
+    await broker._connection.commit()
+
+    assert await asyncio.wait_for(subscription.queue.get(), 5) == {"user_id": 1, "user_membership_id": 2}
+
+
+async def test_streams_limits(broker: MembershipUpdatesBroker):
+    subscriptions = [broker.subscribe(1), broker.subscribe(1)]
+    with pytest.raises(TooManyStreamsError):
+        broker.subscribe(1)
+
+    subscriptions[0].close()
+    subscriptions[0].close()
+    assert broker.streams_count == 1
+    broker.subscribe(1)
+
+
+class _State(BaseModel):
+    status: str
+
+
+async def test_stream_sends_state_heartbeats_and_updates(broker: MembershipUpdatesBroker):
+    states = iter([_State(status="INCOMPLETE"), _State(status="ACTIVE")])
+
+    async def load_membership() -> _State:
+        return next(states)
+
+    subscription = broker.subscribe(1)
+    stream = stream_membership_updates(subscription, load_membership, heartbeat=0.1)
+
+    assert await stream.__anext__() == 'event: membership\ndata: {"status":"INCOMPLETE"}\n\n'
+    assert await stream.__anext__() == ": heartbeat\n\n"
+    broker.publish({"user_id": 1, "user_membership_id": 1})
+    assert await stream.__anext__() == 'event: membership\ndata: {"status":"ACTIVE"}\n\n'
+
+    await stream.aclose()
+    assert broker.streams_count == 0
+
+
+async def test_events_endpoint_limits_streams_per_user(
+    client: AsyncClient,
+    authentication_data: tuple[dict[str, str], dict[str, str], str],
+    user_uow: UserUnitOfWork,
+):
+    headers, _, email = authentication_data
+    async with user_uow:
+        user = await user_uow.user_repository.get_first_by_kwargs(email=email)
+    subscriptions = [
+        membership_updates_broker.subscribe(user.id) for _ in range(membership_updates_broker.max_streams_per_user)
+    ]
+
+    try:
+        response = await client.get(
+            "api/memberships/user-memberships/current-user-membership/events",
+            headers=headers,
+        )
+    finally:
+        for subscription in subscriptions:
+            subscription.close()
+
+    assert response.status_code == 429
+    assert membership_updates_broker.streams_count == 0
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.domains.memberships.infrastructure import MembershipUnitOfWork
+from app.domains.memberships.models import MembershipStatusEnum, MembershipType, UserMembership
+from app.domains.memberships.notifications import MembershipUpdatesBroker
+from app.domains.memberships.services import MembershipService
+from app.domains.memberships.utils.checkout_session_utils import check_membership_type_already_purchased
+from tests.fixtures.memberships import MembershipFactory
+
+pytestmark = [pytest.mark.anyio, pytest.mark.usefixtures("setup_database")]
+
+GRACE = timedelta(days=1)
+
+
+def _active_membership(period_end: datetime) -> dict:
+    return {"status": MembershipStatusEnum.ACTIVE, "current_period_end": period_end, "has_access": True}
+
+
+async def test_expired_memberships_lose_access(
+    create_membership: MembershipFactory,
+    membership_uow: MembershipUnitOfWork,
+    test_session: AsyncSession,
+    test_engine: AsyncEngine,
+):
+    now = datetime.now(timezone.utc)
+    expired = await create_membership(**_active_membership(now - GRACE - timedelta(hours=1)))
+    in_grace = await create_membership(**_active_membership(now - timedelta(hours=1)))
+    active = await create_membership(**_active_membership(now + timedelta(days=30)))
+    broker = MembershipUpdatesBroker(test_engine, max_streams=10, max_streams_per_user=1)
+    subscription = broker.subscribe(expired.user_id)
+    await broker.start()
+
+    try:
+        assert await MembershipService(membership_uow).expire_memberships(GRACE, limit=1000) >= 1
+        message = await asyncio.wait_for(subscription.queue.get(), 5)
+    finally:
+        await broker.stop()
+
+    assert message == {"user_id": expired.user_id, "user_membership_id": expired.id}
+    for membership, has_access in ((expired, False), (in_grace, True), (active, True)):
+        membership = await test_session.get(UserMembership, membership.id, populate_existing=True)
+        assert membership.has_access is has_access
+        assert membership.status == MembershipStatusEnum.ACTIVE
+
+
+async def test_expiry_is_limited_by_batch_size(
+    create_membership: MembershipFactory, membership_uow: MembershipUnitOfWork
+):
+    period_end = datetime.now(timezone.utc) - GRACE - timedelta(days=1)
+    for _ in range(3):
+        await create_membership(**_active_membership(period_end))
+    service = MembershipService(membership_uow)
+
+    assert await service.expire_memberships(GRACE, limit=2) == 2
+    while await service.expire_memberships(GRACE, limit=2):
+        pass
+    assert await service.expire_memberships(GRACE, limit=2) == 0
+
+
+@pytest.mark.parametrize(
+    ("has_access", "period_end", "purchased"),
+    [
+        (True, timedelta(days=30), True),
+        (False, timedelta(days=-30), False),
+        (False, None, True),
+    ],
+)
+async def test_already_purchased_relies_on_access(has_access: bool, period_end: timedelta | None, purchased: bool):
+    membership_type = MembershipType(id=1)
+    membership = UserMembership(
+        membership_type_id=1,
+        status=MembershipStatusEnum.ACTIVE,
+        has_access=has_access,
+        current_period_end=datetime.now(timezone.utc) + period_end if period_end else None,
+    )
+
+    assert check_membership_type_already_purchased(membership, membership_type) is purchased
@@ -0,0 +1,105 @@
+import pytest
+from faker import Faker
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.common.responses import etag_matches
+from app.domains.memberships.catalog import membership_type_catalog
+from app.domains.memberships.infrastructure import MembershipUnitOfWork
+from app.domains.memberships.models import MembershipType
+from app.domains.memberships.services import MembershipService
+
+pytestmark = [pytest.mark.anyio, pytest.mark.usefixtures("setup_database")]
+
+
+async def test_membership_types_are_revalidated_with_etag(client: AsyncClient):
+    response = await client.get("api/memberships/membership-types")
+    etag = response.headers["ETag"]
+
+    not_modified = await client.get("api/memberships/membership-types", headers={"If-None-Match": f"W/{etag}"})
+    modified = await client.get("api/memberships/membership-types", headers={"If-None-Match": '"stale"'})
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"].startswith("public, max-age=")
+    assert [membership_type["id"] for membership_type in response.json()][:5] == [1, 2, 3, 4, 5]
+    assert (not_modified.status_code, not_modified.content) == (304, b"")
+    assert not_modified.headers["ETag"] == etag
+    assert modified.status_code == 200
+
+
+async def test_membership_type_detail_etag(client: AsyncClient):
+    response = await client.get("api/memberships/membership-types/1")
+    not_modified = await client.get(
+        "api/memberships/membership-types/1", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    other = await client.get("api/memberships/membership-types/2")
+    missing = await client.get("api/memberships/membership-types/100000")
+
+    assert response.json()["id"] == 1
+    assert not_modified.status_code == 304
+    assert other.headers["ETag"] != response.headers["ETag"]
+    assert missing.status_code == 404
+
+
+async def test_update_replaces_snapshot(client: AsyncClient, membership_uow: MembershipUnitOfWork, faker: Faker):
+    service = MembershipService(membership_uow)
+    snapshot = await service.get_membership_types_snapshot()
+    assert await service.get_membership_types_snapshot() is snapshot
+
+    description = faker.sentence()
+    await service.update_membership_type(1, {"description": description})
+    response = await client.get("api/memberships/membership-types/1")
+
+    assert response.json()["description"] == description
+    assert response.headers["ETag"] != snapshot.entries[1].etag
+    assert membership_type_catalog.snapshot.version == snapshot.version + 1
+
+
+async def test_update_on_other_node_is_picked_up_by_version(
+    client: AsyncClient,
+    membership_uow: MembershipUnitOfWork,
+    test_session_factory: async_sessionmaker[AsyncSession],
+    monkeypatch: pytest.MonkeyPatch,
+    faker: Faker,
+):
+    service = MembershipService(membership_uow)
+    snapshot = await service.get_membership_types_snapshot()
+
+    # другой узел: данные и версия меняются в одной транзакции, локальный снимок не сбрасывается
+    description = faker.sentence()
+    async with MembershipUnitOfWork(test_session_factory()) as other_uow:
+        await other_uow.membership_repository.update(1, {"description": description})
+        await other_uow.membership_repository.bump_catalog_version()
+
+    assert (await service.get_membership_types_snapshot()) is snapshot
+    monkeypatch.setattr(membership_type_catalog, "check_interval", 0)
+    reloaded = await service.get_membership_types_snapshot()
+
+    assert reloaded.version == snapshot.version + 1
+    assert reloaded.entries[1].schema.description == description
+
+
+async def test_snapshot_is_kept_when_version_is_unchanged(
+    membership_uow: MembershipUnitOfWork,
+    test_session: AsyncSession,
+    insert_test_data: None,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    membership_type_catalog.invalidate()
+    service = MembershipService(membership_uow)
+    snapshot = await service.get_membership_types_snapshot()
+
+    monkeypatch.setattr(membership_type_catalog, "check_interval", 0)
+    # изменение в обход update_membership_type не видно, пока версия не изменится
+    await test_session.execute(update(MembershipType).where(MembershipType.id == 2).values(name="Renamed"))
+    await test_session.commit()
+
+    assert await service.get_membership_types_snapshot() is snapshot
+
+
+def test_etag_matches():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
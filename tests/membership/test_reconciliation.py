@@ -0,0 +1,129 @@
+from datetime import datetime, timezone
+from typing import Any
+
+import httpx
+import pytest
+from faker import Faker
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domains.memberships.infrastructure import MembershipUnitOfWork
+from app.domains.memberships.models import MembershipStatusEnum, UserMembership
+from app.domains.memberships.reconciliation import MembershipReconciler
+from app.domains.payments.gateway import StripeGateway
+from tests.fixtures.memberships import MembershipFactory
+
+pytestmark = [pytest.mark.anyio, pytest.mark.usefixtures("setup_database")]
+
+PERIOD_END = 1_900_000_000
+
+
+class FakeStripeSubscriptions:
+    """``GET /v1/subscriptions`` of Stripe: newest first, paginated with ``starting_after``"""
+
+    def __init__(self, subscriptions: list[dict[str, Any]]):
+        self.subscriptions = subscriptions
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        assert request.url.path == "/v1/subscriptions"
+        limit = int(request.url.params["limit"])
+        start = 0
+        if starting_after := request.url.params.get("starting_after"):
+            start = [subscription["id"] for subscription in self.subscriptions].index(starting_after) + 1
+        data = self.subscriptions[start : start + limit]
+        return httpx.Response(
+            200,
+            json={
+                "object": "list",
+                "url": "/v1/subscriptions",
+                "data": data,
+                "has_more": start + limit < len(self.subscriptions),
+            },
+        )
+
+
+def _subscription(subscription_id: str, status: str, user_membership_id: int | None = None, **fields) -> dict:
+    return {
+        "id": subscription_id,
+        "object": "subscription",
+        "status": status,
+        "customer": f"cus_{subscription_id}",
+        "cancel_at_period_end": False,
+        "metadata": {"user_membership_id": str(user_membership_id)} if user_membership_id else {},
+        "items": {"object": "list", "data": [{"id": f"si_{subscription_id}", "current_period_end": PERIOD_END}]},
+        **fields,
+    }
+
+
+def _reconciler(fake_stripe: FakeStripeSubscriptions, test_session: AsyncSession, **kwargs) -> MembershipReconciler:
+    gateway = StripeGateway(api_key="sk_test_reconciliation", transport=httpx.MockTransport(fake_stripe))
+    return MembershipReconciler(gateway, uow_factory=lambda: MembershipUnitOfWork(test_session), **kwargs)
+
+
+async def test_drifted_memberships_are_corrected(
+    create_membership: MembershipFactory, test_session: AsyncSession, faker: Faker
+):
+    prefix = f"sub_{faker.pystr(min_chars=12, max_chars=12)}"
+    period_end = datetime.fromtimestamp(PERIOD_END, tz=timezone.utc)
+    in_sync = await create_membership(
+        status=MembershipStatusEnum.ACTIVE,
+        stripe_subscription_id=f"{prefix}_1",
+        current_period_end=period_end,
+        has_access=True,
+    )
+    canceled = await create_membership(
+        status=MembershipStatusEnum.ACTIVE,
+        stripe_subscription_id=f"{prefix}_2",
+        current_period_end=period_end,
+        has_access=True,
+    )
+    # invoice.paid потерян: подписка не привязана, доступа нет
+    unlinked = await create_membership(status=MembershipStatusEnum.INCOMPLETE)
+    fake_stripe = FakeStripeSubscriptions(
+        [
+            _subscription(f"{prefix}_1", "active"),
+            _subscription(f"{prefix}_2", "canceled"),
+            _subscription(f"{prefix}_3", "active", unlinked.id),
+            _subscription(f"{prefix}_4", "active"),
+            _subscription(f"{prefix}_5", "paused", in_sync.id),
+        ]
+    )
+
+    report = await _reconciler(fake_stripe, test_session, page_size=2).run()
+
+    assert len(fake_stripe.requests) == 3
+    assert fake_stripe.requests[1].url.params["starting_after"] == f"{prefix}_2"
+    assert (report.subscriptions, report.matched, report.unmatched) == (5, 3, 2)
+    assert (report.linked, report.updated) == (1, 2)
+    assert report.drift == {
+        "status": 2,
+        "has_access": 2,
+        "current_period_end": 1,
+        "stripe_subscription_id": 1,
+        "stripe_customer_id": 1,
+    }
+
+    canceled = await test_session.get(UserMembership, canceled.id, populate_existing=True)
+    assert (canceled.status, canceled.has_access) == (MembershipStatusEnum.CANCELED, False)
+    unlinked = await test_session.get(UserMembership, unlinked.id, populate_existing=True)
+    assert unlinked.status == MembershipStatusEnum.ACTIVE
+    assert unlinked.has_access is True
+    assert unlinked.current_period_end == period_end
+    assert (unlinked.stripe_subscription_id, unlinked.stripe_customer_id) == (f"{prefix}_3", f"cus_{prefix}_3")
+
+
+async def test_dry_run_only_reports_drift(
+    create_membership: MembershipFactory, test_session: AsyncSession, faker: Faker
+):
+    subscription_id = f"sub_{faker.pystr(min_chars=12, max_chars=12)}"
+    membership = await create_membership(status=MembershipStatusEnum.ACTIVE, stripe_subscription_id=subscription_id)
+    fake_stripe = FakeStripeSubscriptions([_subscription(subscription_id, "past_due", cancel_at_period_end=True)])
+
+    report = await _reconciler(fake_stripe, test_session, dry_run=True).run()
+
+    assert report.updated == 0
+    assert report.drift["status"] == 1
+    assert report.drift["cancel_at_period_end"] == 1
+    membership = await test_session.get(UserMembership, membership.id, populate_existing=True)
+    assert membership.status == MembershipStatusEnum.ACTIVE
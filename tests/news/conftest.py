@@ -0,0 +1,46 @@
+import pytest
+from faker import Faker
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domains.news.infrastructure import NewsUnitOfWork
+from app.domains.news.models import News
+from app.domains.users.infrastructure import UserUnitOfWork
+
+
+@pytest.fixture()
+def news_uow(test_session: AsyncSession) -> NewsUnitOfWork:
+    return NewsUnitOfWork(test_session)
+
+
+@pytest.fixture(scope="function")
+async def searchable_news(
+    test_session: AsyncSession, user_uow: UserUnitOfWork, news_uow: NewsUnitOfWork, faker: Faker
+) -> [list[News], str]:
+    """News with a unique word, the first one mentions it in the title and the text, the others only in the text"""
+    word = faker.pystr(min_chars=12, max_chars=12).lower()
+
+    async with user_uow:
+        author = await user_uow.user_repository.create(
+            email=faker.unique.email(),
+            password=faker.password(),
+            firstname=faker.first_name(),
+            lastname=faker.last_name(),
+            institution=faker.company(),
+            role=faker.job(),
+        )
+        await test_session.flush()
+
+    async with news_uow:
+        news = [
+            await news_uow.news_repository.create(
+                author_id=author.id,
+                body={
+                    "title": f"{word} {faker.sentence()}" if index == 0 else faker.sentence(),
+                    "blocks": [{"type": "paragraph", "text": f"{faker.sentence()} {word} {faker.sentence()}"}],
+                    "cover": 42,
+                },
+            )
+            for index in range(3)
+        ]
+
+    return news, word
@@ -0,0 +1,55 @@
+import pytest
+from httpx import AsyncClient
+
+from app.domains.news.models import News
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_search_ranks_and_highlights(client: AsyncClient, searchable_news: [list[News], str]) -> None:
+    news, word = searchable_news
+
+    response = await client.get("api/news/search", params={"q": word.upper()})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == len(news)
+    # слово в заголовке и в тексте - выше по рангу
+    assert data["data"][0]["id"] == news[0].id
+    assert data["data"][0]["rank"] > data["data"][-1]["rank"]
+    assert all(f"<b>{word}</b>" in item["headline"] for item in data["data"])
+
+
+async def test_search_web_syntax_excludes_words(client: AsyncClient, searchable_news: [list[News], str]) -> None:
+    _, word = searchable_news
+
+    response = await client.get("api/news/search", params={"q": f"{word} -{word}"})
+
+    assert response.json()["count"] == 0
+
+
+async def test_search_skips_deleted_news(client: AsyncClient, searchable_news: [list[News], str]) -> None:
+    news, word = searchable_news
+
+    await client.delete(f"api/news/{news[0].id}")
+    response = await client.get("api/news/search", params={"q": word})
+
+    assert [item["id"] for item in response.json()["data"]] == [item.id for item in reversed(news[1:])]
+
+
+async def test_search_sparse_fields(client: AsyncClient, searchable_news: [list[News], str]) -> None:
+    _, word = searchable_news
+
+    response = await client.get("api/news/search", params={"q": word, "fields": "id,headline"})
+
+    assert response.status_code == 200
+    assert all(set(item) == {"id", "headline"} for item in response.json()["data"])
+
+
+async def test_search_offset_beyond_results(client: AsyncClient, searchable_news: [list[News], str]) -> None:
+    news, word = searchable_news
+
+    response = await client.get("api/news/search", params={"q": word, "page": 5, "page_size": 1})
+
+    assert response.json()["data"] == []
+    assert response.json()["count"] == len(news)
@@ -0,0 +1,190 @@
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+import pytest
+import stripe
+from faker import Faker
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domains.memberships.infrastructure import MembershipUnitOfWork
+from app.domains.memberships.models import MembershipStatusEnum, UserMembership
+from app.domains.memberships.services import MembershipService
+from app.domains.payments.gateway import get_stripe_gateway
+from app.domains.payments.models import Payment, PaymentStatus, PaymentType
+from app.main import app
+from tests.fixtures.memberships import MembershipFactory
+
+pytestmark = pytest.mark.anyio
+
+AuthenticationDataFactory = Callable[[], Awaitable[tuple[dict[str, str], dict[str, str], str]]]
+
+
+class FakeStripeGateway:
+    def __init__(self, session: dict | None = None):
+        self.session = session
+        self.retrieved = []
+
+    async def retrieve_checkout_session(self, session_id: str, expand=(), timeout=None) -> stripe.checkout.Session:
+        self.retrieved.append(session_id)
+        if self.session is None:
+            raise AssertionError("Stripe must not be called")
+        return stripe.checkout.Session.construct_from(self.session, "sk_test")
+
+
+@pytest.fixture
+def fake_gateway():
+    gateway = FakeStripeGateway()
+    app.dependency_overrides[get_stripe_gateway] = lambda: gateway
+    yield gateway
+    app.dependency_overrides.pop(get_stripe_gateway, None)
+
+
+def _checkout_session_id(faker: Faker) -> str:
+    return f"cs_test_{faker.pystr(min_chars=16, max_chars=16)}"
+
+
+async def _create_payment(membership_uow: MembershipUnitOfWork, faker: Faker, **kwargs) -> Payment:
+    async with membership_uow:
+        return await membership_uow.payment_repository.create(
+            type=PaymentType.SUBSCRIPTION_INITIAL,
+            status=PaymentStatus.SUCCEEDED,
+            amount_total=2000,
+            currency="usd",
+            invoice_id=f"in_{faker.pystr(min_chars=16, max_chars=16)}",
+            subscription_id="sub_1",
+            stripe_customer_id="cus_1",
+            price_id="price_1",
+            product_id="prod_1",
+            billing_reason="subscription_create",
+            stripe_created_at=datetime.now(tz=timezone.utc),
+            **kwargs,
+        )
+
+
+async def test_summary_is_built_from_local_data(
+    client: AsyncClient,
+    membership_uow: MembershipUnitOfWork,
+    authentication_data_factory: AuthenticationDataFactory,
+    create_membership: MembershipFactory,
+    fake_gateway: FakeStripeGateway,
+    faker: Faker,
+):
+    authorization_header, _, email = await authentication_data_factory()
+    membership = await create_membership(
+        email,
+        stripe_checkout_session_id=_checkout_session_id(faker),
+        status=MembershipStatusEnum.ACTIVE,
+        stripe_subscription_id="sub_local",
+    )
+    payment = await _create_payment(membership_uow, faker, checkout_session_id=membership.stripe_checkout_session_id)
+
+    response = await client.get(
+        f"api/payments/checkout-sessions/{membership.stripe_checkout_session_id}", headers=authorization_header
+    )
+
+    assert response.status_code == 200
+    assert not fake_gateway.retrieved
+    summary = response.json()
+    assert summary["memberships"]["id"] == membership.id
+    assert summary["subscription"] == {"id": "sub_local", "status": MembershipStatusEnum.ACTIVE.value}
+    assert summary["payment"] == {"amount_total": 2000, "currency": "usd", "invoice_id": payment.invoice_id}
+
+
+async def test_summary_falls_back_to_stripe_before_webhooks(
+    client: AsyncClient,
+    authentication_data_factory: AuthenticationDataFactory,
+    create_membership: MembershipFactory,
+    fake_gateway: FakeStripeGateway,
+    faker: Faker,
+):
+    authorization_header, _, email = await authentication_data_factory()
+    membership = await create_membership(
+        email, stripe_checkout_session_id=_checkout_session_id(faker), status=MembershipStatusEnum.INCOMPLETE
+    )
+    fake_gateway.session = {
+        "id": membership.stripe_checkout_session_id,
+        "object": "checkout.session",
+        "mode": "subscription",
+        "metadata": {"user_membership_id": str(membership.id)},
+        "subscription": {"id": "sub_remote", "object": "subscription", "status": "active"},
+        "invoice": {"id": "in_remote", "object": "invoice"},
+        "amount_total": 2000,
+        "currency": "usd",
+    }
+
+    response = await client.get(
+        f"api/payments/checkout-sessions/{membership.stripe_checkout_session_id}", headers=authorization_header
+    )
+
+    assert response.status_code == 200
+    assert fake_gateway.retrieved == [membership.stripe_checkout_session_id]
+    assert response.json()["subscription"]["id"] == "sub_remote"
+
+
+async def test_summary_of_other_user_session(
+    client: AsyncClient,
+    authentication_data_factory: AuthenticationDataFactory,
+    create_membership: MembershipFactory,
+    fake_gateway: FakeStripeGateway,
+    faker: Faker,
+):
+    _, _, owner_email = await authentication_data_factory()
+    authorization_header, _, _ = await authentication_data_factory()
+    membership = await create_membership(
+        owner_email,
+        stripe_checkout_session_id=_checkout_session_id(faker),
+        status=MembershipStatusEnum.ACTIVE,
+        stripe_subscription_id="sub_owner",
+    )
+
+    response = await client.get(
+        f"api/payments/checkout-sessions/{membership.stripe_checkout_session_id}", headers=authorization_header
+    )
+
+    assert response.status_code == 403
+    assert not fake_gateway.retrieved
+
+
+async def test_checkout_session_completed_is_saved(
+    client: AsyncClient,
+    test_session: AsyncSession,
+    membership_uow: MembershipUnitOfWork,
+    authentication_data_factory: AuthenticationDataFactory,
+    create_membership: MembershipFactory,
+    faker: Faker,
+):
+    _, _, email = await authentication_data_factory()
+    membership = await create_membership(
+        email, stripe_checkout_session_id=_checkout_session_id(faker), status=MembershipStatusEnum.ACTIVE
+    )
+    # invoice.paid обработан раньше checkout.session.completed
+    payment = await _create_payment(membership_uow, faker)
+    session_id = f"cs_test_{faker.pystr(min_chars=16, max_chars=16)}"
+    event = stripe.Event.construct_from(
+        {
+            "id": "evt_1",
+            "object": "event",
+            "type": "checkout.session.completed",
+            "data": {
+                "object": {
+                    "id": session_id,
+                    "object": "checkout.session",
+                    "mode": "subscription",
+                    "subscription": "sub_completed",
+                    "customer": f"cus_{faker.pystr(min_chars=16, max_chars=16)}",
+                    "invoice": payment.invoice_id,
+                    "metadata": {"user_membership_id": str(membership.id)},
+                }
+            },
+        },
+        "sk_test",
+    )
+
+    await MembershipService(MembershipUnitOfWork(test_session)).process_stripe_webhook_event(event)
+
+    saved_membership = await test_session.get(UserMembership, membership.id, populate_existing=True)
+    saved_payment = await test_session.get(Payment, payment.id, populate_existing=True)
+    assert saved_membership.stripe_checkout_session_id == session_id
+    assert saved_membership.stripe_subscription_id == "sub_completed"
+    assert saved_payment.checkout_session_id == session_id
@@ -0,0 +1,190 @@
+import hashlib
+import hmac
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+import orjson
+import pytest
+import stripe
+from faker import Faker
+from httpx import AsyncClient
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.domains.memberships.infrastructure import MembershipUnitOfWork
+from app.domains.memberships.models import MembershipStatusEnum, MembershipType, UserMembership
+from app.domains.payments.inbox import StripeEventInbox, handle_stripe_event
+from app.domains.payments.infrastructure import PaymentUnitOfWork
+from app.domains.payments.models import StripeEvent, StripeEventStatus
+from app.domains.users.models import User
+
+pytestmark = [pytest.mark.anyio, pytest.mark.usefixtures("setup_database")]
+
+
+def _stripe_sig(secret: str, raw_body: bytes, ts: int) -> str:
+    payload = f"{ts}.{raw_body.decode('utf-8')}".encode("utf-8")
+    v1 = hmac.new(secret.encode("utf-8"), payload, hashlib.sha256).hexdigest()
+    return f"t={ts},v1={v1}"
+
+
+def _event(faker: Faker, event_type: str, data: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "id": f"evt_{faker.pystr(min_chars=24, max_chars=24)}",
+        "object": "event",
+        "type": event_type,
+        "data": {"object": data},
+    }
+
+
+def _inbox(handler=None, max_attempts: int = 3) -> StripeEventInbox:
+    return StripeEventInbox(
+        workers=1,
+        poll_interval=1,
+        max_attempts=max_attempts,
+        retry_base=60,
+        retry_max=60,
+        handler=handler or handle_stripe_event,
+    )
+
+
+async def _store(test_session: AsyncSession, event: dict[str, Any]) -> None:
+    async with PaymentUnitOfWork(test_session) as uow:
+        await uow.stripe_event_repository.add_if_new(event["id"], event["type"], event)
+
+
+async def _drain(inbox: StripeEventInbox, test_session: AsyncSession) -> None:
+    # в таблице могут остаться события других тестов, обрабатываются все готовые
+    while await inbox.process_next(test_session):
+        pass
+
+
+async def test_webhook_stores_event_once(client: AsyncClient, test_session: AsyncSession, faker: Faker):
+    event = _event(faker, "customer.subscription.updated", {"id": "sub_unknown", "status": "active"})
+    body = orjson.dumps(event)
+    headers = {"Stripe-Signature": _stripe_sig(settings.STRIPE_WEBHOOK_SECRET_KEY, body, int(time.time()))}
+
+    for _ in range(2):  # Stripe повторяет доставку
+        response = await client.post("api/payments/stripe/webhook", content=body, headers=headers)
+        assert response.status_code == 200
+
+    count = await test_session.scalar(select(func.count()).where(StripeEvent.id == event["id"]))
+    stored = await test_session.get(StripeEvent, event["id"])
+    assert count == 1
+    assert stored.status == StripeEventStatus.PENDING
+    assert stored.payload == event
+
+
+async def test_webhook_invalid_signature(client: AsyncClient, faker: Faker):
+    body = orjson.dumps(_event(faker, "invoice.paid", {}))
+    headers = {"Stripe-Signature": _stripe_sig("wrong", body, int(time.time()))}
+
+    response = await client.post("api/payments/stripe/webhook", content=body, headers=headers)
+
+    assert response.status_code == 400
+
+
+async def test_event_is_processed_by_handler(test_session: AsyncSession, faker: Faker):
+    handled = []
+
+    async def handler(session: AsyncSession, event: stripe.Event) -> None:
+        handled.append((event.id, event.type, event["data"]["object"]["id"]))
+
+    event = _event(faker, "invoice.paid", {"id": "in_1"})
+    await _store(test_session, event)
+    inbox = _inbox(handler)
+
+    await _drain(inbox, test_session)
+
+    stored = await test_session.get(StripeEvent, event["id"])
+    assert (event["id"], "invoice.paid", "in_1") in handled
+    assert stored.status == StripeEventStatus.PROCESSED
+    assert stored.attempts == 1
+    assert stored.processed_at is not None
+    assert inbox.stats["invoice.paid"].processed >= 1
+
+
+async def test_failed_event_is_retried_and_dead_lettered(test_session: AsyncSession, faker: Faker):
+    event = _event(faker, "invoice.payment_failed", {"id": "sub_1"})
+
+    async def handler(session: AsyncSession, stripe_event: stripe.Event) -> None:
+        if stripe_event.id == event["id"]:
+            raise ValueError("handler failed")
+
+    await _store(test_session, event)
+    inbox = _inbox(handler, max_attempts=2)
+
+    await _drain(inbox, test_session)
+    stored = await test_session.get(StripeEvent, event["id"])
+    assert stored.status == StripeEventStatus.PENDING
+    assert stored.attempts == 1
+    assert stored.next_attempt_at > datetime.now(tz=timezone.utc)
+    assert "handler failed" in stored.last_error
+
+    # время повтора наступило
+    await test_session.execute(
+        update(StripeEvent).where(StripeEvent.id == event["id"]).values(next_attempt_at=func.now())
+    )
+    await test_session.commit()
+    await _drain(inbox, test_session)
+
+    stored = await test_session.get(StripeEvent, event["id"], populate_existing=True)
+    assert stored.status == StripeEventStatus.DEAD
+    assert stored.attempts == 2
+    assert inbox.stats["invoice.payment_failed"].dead == 1
+
+
+async def test_failed_handler_changes_are_rolled_back(test_session: AsyncSession, faker: Faker):
+    event = _event(faker, "invoice.paid", {"id": "in_2"})
+    email = faker.unique.email()
+
+    async def handler(session: AsyncSession, stripe_event: stripe.Event) -> None:
+        if stripe_event.id == event["id"]:
+            session.add(User(email=email, firstname="a", lastname="b", institution="c", role="d", password="password"))
+            await session.flush()
+            raise ValueError("handler failed")
+
+    await _store(test_session, event)
+    await _drain(_inbox(handler), test_session)
+
+    assert await test_session.scalar(select(User).where(User.email == email)) is None
+    assert (await test_session.get(StripeEvent, event["id"])).attempts == 1
+
+
+async def test_subscription_updated_event_updates_membership(
+    test_session: AsyncSession,
+    membership_uow: MembershipUnitOfWork,
+    insert_test_data: None,
+    faker: Faker,
+):
+    subscription_id = f"sub_{faker.pystr(min_chars=16, max_chars=16)}"
+    async with membership_uow:
+        user = await membership_uow.user_repository.create(
+            email=faker.unique.email(),
+            password=faker.password(),
+            firstname=faker.first_name(),
+            lastname=faker.last_name(),
+            institution=faker.company(),
+            role=faker.job(),
+        )
+        membership_type = await test_session.scalar(select(MembershipType).limit(1))
+        membership = await membership_uow.user_membership_repository.create(
+            user_id=user.id,
+            membership_type_id=membership_type.id,
+            status=MembershipStatusEnum.ACTIVE,
+            stripe_subscription_id=subscription_id,
+        )
+
+    event = _event(
+        faker,
+        "customer.subscription.updated",
+        {"id": subscription_id, "status": "past_due", "cancel_at_period_end": True},
+    )
+    await _store(test_session, event)
+    await _drain(_inbox(), test_session)
+
+    updated = await test_session.get(UserMembership, membership.id, populate_existing=True)
+    assert (await test_session.get(StripeEvent, event["id"])).status == StripeEventStatus.PROCESSED
+    assert updated.status == MembershipStatusEnum.PAST_DUE
+    assert updated.cancel_at_period_end is True
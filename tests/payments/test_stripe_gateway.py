@@ -0,0 +1,120 @@
+import asyncio
+import ssl
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+import stripe
+
+from app.domains.payments.gateway import PooledHTTPXClient, StripeGateway
+
+pytestmark = pytest.mark.anyio
+
+CHECKOUT_SESSION = {"id": "cs_test_1", "object": "checkout.session", "url": "https://checkout.stripe.com/c/cs_test_1"}
+
+
+def _gateway(handler, **kwargs) -> StripeGateway:
+    return StripeGateway(api_key="sk_test_gateway", transport=httpx.MockTransport(handler), **kwargs)
+
+
+async def test_create_checkout_session():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=CHECKOUT_SESSION)
+
+    gateway = _gateway(handler, api_base="http://fake-stripe:12111")
+    session = await gateway.create_checkout_session(
+        {"mode": "subscription", "line_items": [{"price": "price_1", "quantity": 1}]}, idempotency_key="checkout-1"
+    )
+    await gateway.close()
+
+    request = requests[0]
+    form = parse_qs(request.content.decode())
+    assert session.id == "cs_test_1"
+    assert session.url == CHECKOUT_SESSION["url"]
+    assert (request.method, request.url.host, request.url.path) == ("POST", "fake-stripe", "/v1/checkout/sessions")
+    assert request.headers["Idempotency-Key"] == "checkout-1"
+    assert form["line_items[0][price]"] == ["price_1"]
+
+
+async def test_retrieve_checkout_session_with_expand():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=CHECKOUT_SESSION)
+
+    gateway = _gateway(handler)
+    await gateway.retrieve_checkout_session("cs_test_1", expand=["subscription", "invoice"])
+
+    assert requests[0].url.path == "/v1/checkout/sessions/cs_test_1"
+    assert requests[0].url.params.get_list("expand[0]") == ["subscription"]
+
+
+async def test_server_errors_are_retried():
+    responses = [
+        httpx.Response(500, json={"error": {"type": "api_error", "message": "boom"}}),
+        httpx.Response(200, json={"id": "sub_1", "object": "subscription", "cancel_at_period_end": True}),
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return responses.pop(0)
+
+    gateway = _gateway(handler, max_retries=1)
+    subscription = await gateway.update_subscription("sub_1", {"cancel_at_period_end": True})
+
+    assert subscription.cancel_at_period_end is True
+    assert not responses
+
+
+async def test_client_errors_are_not_retried():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(404, json={"error": {"type": "invalid_request_error", "message": "No such invoice"}})
+
+    gateway = _gateway(handler, max_retries=2)
+    with pytest.raises(stripe.InvalidRequestError):
+        await gateway.retrieve_invoice("in_missing")
+
+    assert len(calls) == 1
+
+
+async def test_call_timeout():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(1)
+        return httpx.Response(200, json={"id": "sub_1", "object": "subscription"})
+
+    gateway = _gateway(handler, call_timeout=0.1)
+    with pytest.raises(stripe.APIConnectionError):
+        await gateway.retrieve_subscription("sub_1")
+
+
+async def test_concurrent_calls_are_capped():
+    in_flight = max_in_flight = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        return httpx.Response(200, json={"id": "sub_1", "object": "subscription"})
+
+    gateway = _gateway(handler, max_concurrent=2)
+    await asyncio.gather(*(gateway.retrieve_subscription("sub_1") for _ in range(6)))
+
+    assert max_in_flight == 2
+
+
+@pytest.mark.parametrize("verify_ssl_certs", [True, False])
+async def test_pooled_http_client(verify_ssl_certs: bool):
+    http_client = PooledHTTPXClient(httpx.Timeout(5), max_connections=3, verify_ssl_certs=verify_ssl_certs)
+    pool = http_client._client_async._transport._pool
+    await http_client.close_async()
+
+    assert pool._max_connections == pool._max_keepalive_connections == 3
+    assert pool._ssl_context.verify_mode == (ssl.CERT_REQUIRED if verify_ssl_certs else ssl.CERT_NONE)
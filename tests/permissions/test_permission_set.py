@@ -0,0 +1,29 @@
+from app.domains.permissions.catalog import PermissionCatalog, PermissionSet
+from app.domains.permissions.models import Permission
+
+
+def make_catalog() -> PermissionCatalog:
+    catalog = PermissionCatalog()
+    catalog.load(
+        [
+            Permission(id=1, action="admin.create", name=""),
+            Permission(id=5, action="permissions.create", name=""),
+            Permission(id=70, action="news.create", name=""),
+        ]
+    )
+    return catalog
+
+
+def test_permission_set_membership() -> None:
+    permissions = PermissionSet.from_ids([5, 70], make_catalog())
+
+    assert "permissions.create" in permissions
+    assert "news.create" in permissions
+    assert "admin.create" not in permissions
+    assert list(permissions) == ["news.create", "permissions.create"]
+
+
+def test_unknown_action_is_not_granted() -> None:
+    permissions = PermissionSet((1 << 128) - 1, make_catalog())
+
+    assert "unknown.action" not in permissions
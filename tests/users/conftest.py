@@ -0,0 +1,25 @@
+import pytest
+from faker import Faker
+
+from app.domains.users.infrastructure import UserUnitOfWork
+from app.domains.users.models import User
+
+
+@pytest.fixture(scope="function")
+async def users_with_common_prefix(user_uow: UserUnitOfWork, faker: Faker) -> [list[User], str]:
+    prefix = faker.pystr(min_chars=12, max_chars=12).lower()
+
+    async with user_uow:
+        users = [
+            await user_uow.user_repository.create(
+                email=f"{prefix}{index}@{faker.domain_name()}",
+                password=faker.password(),
+                firstname=faker.first_name(),
+                lastname=faker.last_name(),
+                institution=faker.company(),
+                role=faker.job(),
+            )
+            for index in range(5)
+        ]
+
+    return users, prefix
@@ -0,0 +1,38 @@
+import pytest
+from faker import Faker
+from httpx import AsyncClient
+
+from app.domains.shared.deps import create_access_token
+from app.domains.users.services import user_cache
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_current_user_is_cached(client: AsyncClient, authentication_data: [dict, dict, str]) -> None:
+    headers, _, email = authentication_data
+
+    await client.get("api/users/current-user", headers=headers)
+    response = await client.get("api/users/current-user", headers=headers)
+
+    assert response.json()["email"] == email
+    assert response.headers["X-DB-Queries"] == "0"
+
+
+async def test_update_invalidates_cached_user(client: AsyncClient, authentication_data: [dict, dict, str]) -> None:
+    headers, _, _ = authentication_data
+    user = (await client.get("api/users/current-user", headers=headers)).json()
+
+    await client.put(f"api/users/{user['id']}", headers=headers, json={"firstname": "Updated"})
+    response = await client.get("api/users/current-user", headers=headers)
+
+    assert response.json()["firstname"] == "Updated"
+
+
+async def test_unknown_email_is_not_cached(client: AsyncClient, faker: Faker) -> None:
+    email = faker.unique.email()
+    headers = {"Authorization": f"Bearer {create_access_token({'email': email})}"}
+
+    response = await client.get("api/users/current-user", headers=headers)
+
+    assert response.status_code == 401
+    assert user_cache.get(email) is None
@@ -0,0 +1,51 @@
+import pytest
+from httpx import AsyncClient
+
+from app.domains.users.models import User
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_list_returns_only_requested_fields(
+    client: AsyncClient,
+    users_with_common_prefix: [list[User], str],
+) -> None:
+    _, prefix = users_with_common_prefix
+
+    response = await client.get("api/users/", params={"email__startswith": prefix, "fields": "id, email"})
+
+    assert response.status_code == 200
+    assert all(set(user) == {"id", "email"} for user in response.json()["data"])
+
+
+async def test_cursor_works_with_fields_without_ordering_columns(
+    client: AsyncClient,
+    users_with_common_prefix: [list[User], str],
+) -> None:
+    _, prefix = users_with_common_prefix
+    params = {"email__startswith": prefix, "fields": "email", "ordering": "-created_at", "page_size": 2}
+
+    first_page = (await client.get("api/users/", params=params)).json()
+    second_page = (await client.get("api/users/", params={**params, "cursor": first_page["next_cursor"]})).json()
+
+    assert first_page["next_cursor"] is not None
+    assert {user["email"] for user in first_page["data"]}.isdisjoint(user["email"] for user in second_page["data"])
+
+
+async def test_detail_returns_only_requested_fields(
+    client: AsyncClient,
+    users_with_common_prefix: [list[User], str],
+) -> None:
+    user = users_with_common_prefix[0][0]
+
+    response = await client.get(f"api/users/{user.id}", params={"fields": "firstname,lastname"})
+
+    assert response.status_code == 200
+    assert response.json() == {"firstname": user.firstname, "lastname": user.lastname}
+
+
+@pytest.mark.parametrize("fields", ["password", "id,unknown", "email.domain"])
+async def test_unknown_fields(client: AsyncClient, fields: str) -> None:
+    response = await client.get("api/users/", params={"fields": fields})
+
+    assert response.status_code == 400
@@ -0,0 +1,35 @@
+import pytest
+from httpx import AsyncClient
+
+from app.domains.users.models import User
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_startswith_is_case_insensitive(client: AsyncClient, users_with_common_prefix: [list[User], str]) -> None:
+    users, prefix = users_with_common_prefix
+
+    response = await client.get("api/users/", params={"email__startswith": prefix.upper()})
+
+    assert response.json()["count"] == len(users)
+
+
+async def test_icontains(client: AsyncClient, users_with_common_prefix: [list[User], str]) -> None:
+    users, prefix = users_with_common_prefix
+
+    response = await client.get("api/users/", params={"email__icontains": prefix[3:9]})
+
+    assert response.json()["count"] == len(users)
+
+
+@pytest.mark.parametrize("filter_name", ["email__startswith", "email__icontains"])
+async def test_like_wildcards_are_matched_literally(
+    client: AsyncClient,
+    users_with_common_prefix: [list[User], str],
+    filter_name: str,
+) -> None:
+    _, prefix = users_with_common_prefix
+
+    response = await client.get("api/users/", params={filter_name: f"{prefix[:3]}%"})
+
+    assert response.json()["count"] == 0
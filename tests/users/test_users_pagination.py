@@ -0,0 +1,139 @@
+import pytest
+from faker import Faker
+from httpx import AsyncClient
+
+from app.domains.users.infrastructure import UserUnitOfWork
+from app.domains.users.models import User
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("ordering", [None, "-created_at", "firstname,-id"])
+async def test_cursor_pagination_walks_all_rows(
+    client: AsyncClient,
+    users_with_common_prefix: [list[User], str],
+    ordering: str | None,
+) -> None:
+    users, prefix = users_with_common_prefix
+    params = {"email__startswith": prefix, "page_size": 2}
+    if ordering is not None:
+        params["ordering"] = ordering
+
+    offset_ids = []
+    for page in range(1, 4):
+        response = await client.get("api/users/", params={**params, "page": page})
+        offset_ids.extend(user["id"] for user in response.json()["data"])
+
+    cursor_ids = []
+    cursor = None
+    for _ in range(3):
+        response = await client.get("api/users/", params={**params, "cursor": cursor} if cursor else params)
+        body = response.json()
+        cursor_ids.extend(user["id"] for user in body["data"])
+        cursor = body["next_cursor"]
+
+    assert response.status_code == 200
+    assert cursor is None
+    assert body["count"] == len(users)
+    assert cursor_ids == offset_ids
+    assert sorted(cursor_ids) == sorted(user.id for user in users)
+
+
+@pytest.mark.parametrize("ordering", ["description", "-description", "-description,created_at"])
+async def test_cursor_pagination_keeps_rows_with_null_sort_keys(
+    client: AsyncClient,
+    users_with_common_prefix: [list[User], str],
+    user_uow: UserUnitOfWork,
+    ordering: str,
+) -> None:
+    users, prefix = users_with_common_prefix
+    async with user_uow:
+        # у трех пользователей description остается NULL, граница страниц попадает на них
+        await user_uow.user_repository.update(users[0].id, {"description": "b"})
+        await user_uow.user_repository.update(users[3].id, {"description": "a"})
+
+    params = {"email__startswith": prefix, "page_size": 2, "ordering": ordering}
+    offset_ids = []
+    for page in range(1, 4):
+        response = await client.get("api/users/", params={**params, "page": page})
+        offset_ids.extend(user["id"] for user in response.json()["data"])
+
+    cursor_ids = []
+    cursor = None
+    for _ in range(3):
+        response = await client.get("api/users/", params={**params, "cursor": cursor} if cursor else params)
+        body = response.json()
+        cursor_ids.extend(user["id"] for user in body["data"])
+        cursor = body["next_cursor"]
+
+    assert response.status_code == 200
+    assert cursor is None
+    assert cursor_ids == offset_ids
+    assert sorted(cursor_ids) == sorted(user.id for user in users)
+
+
+async def test_cursor_for_another_ordering_is_rejected(
+    client: AsyncClient,
+    users_with_common_prefix: [list[User], str],
+) -> None:
+    _, prefix = users_with_common_prefix
+
+    first_page = await client.get("api/users/", params={"email__startswith": prefix, "page_size": 2})
+    response = await client.get(
+        "api/users/",
+        params={
+            "email__startswith": prefix,
+            "page_size": 2,
+            "ordering": "-created_at",
+            "cursor": first_page.json()["next_cursor"],
+        },
+    )
+
+    assert response.status_code == 400
+
+
+async def test_malformed_cursor(client: AsyncClient, faker: Faker) -> None:
+    response = await client.get("api/users/", params={"cursor": faker.pystr()})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("count_strategy", ["exact", "window", "capped"])
+async def test_count_strategies_return_exact_count_for_small_lists(
+    client: AsyncClient,
+    users_with_common_prefix: [list[User], str],
+    count_strategy: str,
+) -> None:
+    users, prefix = users_with_common_prefix
+
+    for page in (1, 3, 4):
+        response = await client.get(
+            "api/users/",
+            params={"email__startswith": prefix, "page_size": 2, "page": page, "count": count_strategy},
+        )
+        body = response.json()
+
+        assert response.status_code == 200
+        assert body["count"] == len(users)
+        assert body["count_strategy"] == count_strategy
+        assert body["count_capped"] is False
+
+
+async def test_estimated_count(client: AsyncClient, users_with_common_prefix: [list[User], str]) -> None:
+    _, prefix = users_with_common_prefix
+
+    response = await client.get("api/users/", params={"email__startswith": prefix, "count": "estimated"})
+
+    assert response.status_code == 200
+    assert isinstance(response.json()["count"], int)
+
+
+async def test_count_can_be_skipped(client: AsyncClient, users_with_common_prefix: [list[User], str]) -> None:
+    users, prefix = users_with_common_prefix
+
+    response = await client.get("api/users/", params={"email__startswith": prefix, "count": "none"})
+    body = response.json()
+
+    assert response.status_code == 200
+    assert body["count"] is None
+    assert len(body["data"]) == len(users)